@@ -1,107 +1,95 @@
 # agents/chat_agent.py
+import asyncio
+import logging
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
-import os
-import requests
-from dotenv import load_dotenv
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+from services.settings import get_settings
+from services.llm_client import build_llm_client
+from services.session_store import build_session_store, pack_message, unpack_message
+from agents.context_window import ContextManager
+from agents.intent_classifier import intent_classifier
+from agents.normalizer import normalize
+from agents.reply_cache import ReplyCache
+from services.admission import Overloaded
+from services.metrics import LLM_FALLBACKS, stage
+from services.supabase_client import get_supabase_service
 
-load_dotenv()
+settings = get_settings()
+logger = logging.getLogger("sauti.chat")
 
-# Prefer environment variable; fallback to provided API key only if env not set
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-AI_ML_API_KEY = os.getenv("AI_ML_API_KEY", "9d0da856e8cc438c95e659b35e76a378")
+# Session storage: in-process LRU+TTL by default, SQLite (shared by workers) with SESSION_STORE=sqlite
+session_store = build_session_store(settings)
 
-# In-memory storage (same as your original)
-chat_sessions: Dict[str, Dict[str, Any]] = {}
+SYSTEM_PROMPT = (
+    "You are a maternal health assistant. Provide empathetic, safe guidance. "
+    "Always encourage professional care for serious symptoms. "
+    "If the backend provides clinic/hospital data, incorporate it naturally."
+)
+
+async def session_io(method: Callable, *args):
+    """
+    Run a session_store call (or a function making one) from async code.
+    SQLite calls can wait on another worker's write lock, so they run in a
+    worker thread rather than stalling every request on the event loop.
+    """
+    if session_store.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+# Token-budgeted LLM history per session; older turns are folded into a rolling summary
+context_manager = ContextManager(
+    SYSTEM_PROMPT,
+    budget=settings.context_token_budget,
+    pin_recent=settings.context_pin_recent,
+    on_summary=lambda session_id, summary, upto: session_io(
+        session_store.update_context, session_id, {'summary': summary, 'summarized_upto': upto}
+    )
+)
+
+# Requests for nearby care (normalizer concepts, so "hospitali", "karibu nami" count too);
+# checked before the LLM call so the maps lookup can overlap it
+LOCATION_KEYWORDS = frozenset(["hospital", "clinic", "doctor", "nearby"])
+
+# How long the LLM call may wait for an in-flight nearby lookup so its results reach the prompt.
+# Cached and local-index lookups finish well inside it; a cold Google call is not waited for.
+NEARBY_CONTEXT_WAIT = settings.nearby_context_wait
 
 # ---------------------------
-# Helper: Call Mistral (primary) or AI/ML fallback
+# LLM chain: Mistral (primary) -> AI/ML fallback, pooled + hedged
 # ---------------------------
-def _call_mistral(messages: list, model: str = "mistral-medium") -> Optional[str]:
-    """Call Mistral chat completions. Return text or None on failure."""
-    if not MISTRAL_API_KEY:
-        return None
-    try:
-        url = "https://api.mistral.ai/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {MISTRAL_API_KEY}"}
-        payload = {"model": model, "messages": messages, "temperature": 0.7}
-        resp = requests.post(url, headers=headers, json=payload, timeout=12)
-        resp.raise_for_status()
-        data = resp.json()
-        # defensive extraction
-        return data.get("choices", [])[0].get("message", {}).get("content", None)
-    except Exception as e:
-        print("⚠️ Mistral call failed:", e)
-        return None
+llm_client = build_llm_client(settings)
 
-def _call_ai_ml_fallback(messages: list) -> Optional[str]:
-    """Fallback to AI/ML API if provided. Return text or None on failure."""
-    if not AI_ML_API_KEY:
-        return None
-    try:
-        url = "https://api.aimlapi.com/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {AI_ML_API_KEY}"}
-        payload = {"model": "gpt-4o-mini", "messages": messages, "temperature": 0.7}
-        resp = requests.post(url, headers=headers, json=payload, timeout=12)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("choices", [])[0].get("message", {}).get("content", None)
-    except Exception as e:
-        print("⚠️ AI/ML fallback failed:", e)
-        return None
+# Replies to common first-turn questions; anything the triage rules flag bypasses it
+reply_cache = ReplyCache(
+    max_entries=settings.reply_cache_size,
+    ttl=settings.reply_cache_ttl,
+    similarity=settings.reply_cache_similarity
+)
 
 # ---------------------------
-# Classic rule-based fallback (your original)
+# Classic rule-based fallback: intents and replies live in data/intents.json
 # ---------------------------
 def generate_health_response(message: str, session: Dict[str, Any]) -> str:
-    message_lower = message.lower()
-
-    emergency_keywords = ['emergency', 'urgent', 'severe pain', 'bleeding', 'contractions', 'water broke']
-    if any(keyword in message_lower for keyword in emergency_keywords):
-        return "🚨 This sounds like an emergency! Please call your healthcare provider immediately or go to the nearest emergency room. If you're experiencing severe symptoms, call emergency services right away."
-
-    if any(symptom in message_lower for symptom in ['pain', 'ache', 'cramp', 'discomfort']):
-        return "I understand you're experiencing some discomfort. Can you tell me more about the location and intensity of the pain? Also, when did it start and has it been getting worse?"
-
-    if any(nutrition in message_lower for nutrition in ['food', 'eat', 'diet', 'nutrition', 'vitamin']):
-        return "Nutrition is very important during pregnancy! I'd recommend consulting with your healthcare provider about your specific nutritional needs. Generally, focus on a balanced diet with plenty of fruits, vegetables, lean proteins, and whole grains."
-
-    if any(exercise in message_lower for exercise in ['exercise', 'workout', 'fitness', 'activity']):
-        return "Exercise during pregnancy is generally beneficial, but it's important to consult with your healthcare provider first. Low-impact activities like walking, swimming, and prenatal yoga are often recommended."
-
-    if any(preg in message_lower for preg in ['pregnant', 'pregnancy', 'baby', 'fetus']):
-        return "Congratulations on your pregnancy! I'm here to help with any questions you have about maternal health. What specific aspect of pregnancy would you like to know more about?"
-
-    if any(location in message_lower for location in ['hospital', 'clinic', 'doctor', 'near me', 'nearby']):
-        return "I can help you find nearby healthcare facilities. Please share your location or the area you're in, and I'll provide you with the closest hospitals and clinics."
-
-    return "I'm here to help with your maternal health questions. Could you please provide more details about what you'd like to know? I can help with symptoms, nutrition, exercise, or any other pregnancy-related concerns."
+    # Indexed by keyword, so offline mode stays cheap enough to serve all traffic during an outage
+    return intent_classifier.respond(message)
 
 # ---------------------------
 # Public API: initialize_chat (same signature)
 # ---------------------------
 def initialize_chat(patient_id: str) -> Dict[str, Any]:
     session_id = str(uuid.uuid4())
-    chat_sessions[session_id] = {
-        'patient_id': patient_id,
-        'created_at': datetime.now().isoformat(),
-        'messages': [
-            {
-                "role": "system",
-                "content": (
-                    "You are a maternal health assistant. Provide empathetic, safe guidance. "
-                    "Always encourage professional care for serious symptoms. "
-                    "If the backend provides clinic/hospital data, incorporate it naturally."
-                )
-            }
-        ],
-        'context': {
+    session_store.create(
+        session_id,
+        patient_id,
+        messages=[pack_message("system", SYSTEM_PROMPT)],
+        context={
             'patient_history': [],
             'current_symptoms': [],
             'risk_level': 'LOW'
         }
-    }
+    )
     return {
         'session_id': session_id,
         'patient_id': patient_id,
@@ -112,64 +100,162 @@ def initialize_chat(patient_id: str) -> Dict[str, Any]:
 # ---------------------------
 # Public API: chat_with_agent (same signature)
 # ---------------------------
-def chat_with_agent(session_id: str, message: str) -> str:
+async def chat_with_agent(session_id: str, message: str, nearby: Optional[Awaitable] = None) -> str:
     """
-    Keep signature exactly the same as your original code.
-    Will try Mistral -> AI/ML fallback -> original rule-based responder.
-    """
-    if session_id not in chat_sessions:
-        return "❌ Session not found. Please start a new chat."
-
-    session = chat_sessions[session_id]
-
-    # Append user message
-    user_message = {
-        'role': 'user',
-        'content': message,
-        'timestamp': datetime.now().isoformat()
-    }
-    session['messages'].append(user_message)
+    Same arguments as the original code, but async so provider calls don't
+    hold a worker thread. Will try Mistral -> AI/ML fallback (hedged) ->
+    original rule-based responder.
 
-    # Prepare messages for LLM (strip timestamps)
-    history_messages = [
-        {"role": msg.get("role", "user"), "content": msg.get("content", "")}
-        for msg in session['messages']
-        if msg.get("role") in ("system", "user", "assistant")
-    ]
+    `nearby` is an in-flight lookup from start_nearby_lookup(); if it
+    finishes within NEARBY_CONTEXT_WAIT its hospitals are added to the prompt.
+    """
+    with stage("session"):
+        session = await session_io(session_store.get, session_id)
+        if session is None:
+            return "❌ Session not found. Please start a new chat."
+        history_messages = await _append_user_message(session_id, session, message)
+    history_messages = await _with_nearby_context(history_messages, nearby)
 
-    # 1) Try Mistral
-    ai_reply = None
-    ai_reply = _call_mistral(history_messages)
+    # 0) A first-turn question asked before (nearby results make the prompt location-specific)
+    cache_key = reply_cache.key(history_messages) if nearby is None else None
+    ai_reply = reply_cache.get(cache_key)
 
-    # 2) Fallback to AI/ML service if Mistral unavailable
+    # 1) + 2) Mistral, with AI/ML fallback if it fails or is slower than the hedge delay
     if ai_reply is None:
-        ai_reply = _call_ai_ml_fallback(history_messages)
+        with stage("llm"):
+            started = time.monotonic()
+            try:
+                ai_reply = await llm_client.complete(history_messages)
+            except Overloaded:
+                # Admitted by the endpoint moments ago; the turn is recorded, so answer it from the rules
+                ai_reply = None
+        if ai_reply is not None:
+            reply_cache.put(cache_key, ai_reply, time.monotonic() - started)
 
     # 3) If still None, use the original rule-based generator (guaranteed response)
     if ai_reply is None:
+        LLM_FALLBACKS.inc("rule_based")
         ai_reply = generate_health_response(message, session)
 
-    # Append assistant message
-    ai_message = {
-        'role': 'assistant',
-        'content': ai_reply,
-        'timestamp': datetime.now().isoformat()
-    }
-    session['messages'].append(ai_message)
-
+    with stage("session"):
+        await _append_assistant_message(session_id, session, ai_reply)
     return ai_reply
 
+async def stream_chat_with_agent(session_id: str, message: str, nearby: Optional[Awaitable] = None):
+    """
+    Streaming variant of chat_with_agent: yields reply tokens as the provider
+    produces them. The assembled reply is appended to the session at the end.
+    """
+    session = await session_io(session_store.get, session_id)
+    if session is None:
+        yield "❌ Session not found. Please start a new chat."
+        return
+
+    history_messages = await _append_user_message(session_id, session, message)
+    history_messages = await _with_nearby_context(history_messages, nearby)
+
+    cache_key = reply_cache.key(history_messages) if nearby is None else None
+    cached = reply_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        await _append_assistant_message(session_id, session, cached)
+        return
+
+    tokens = []
+    outcome = {}
+    started = time.monotonic()
+    async for token in llm_client.stream(history_messages, outcome):
+        tokens.append(token)
+        yield token
+    # A reply cut off mid-stream is not worth repeating
+    if outcome.get("complete"):
+        reply_cache.put(cache_key, "".join(tokens), time.monotonic() - started)
+
+    if not tokens:
+        # Every provider failed before the first token: rule-based reply in one piece
+        LLM_FALLBACKS.inc("rule_based")
+        tokens.append(generate_health_response(message, session))
+        yield tokens[0]
+
+    await _append_assistant_message(session_id, session, "".join(tokens))
+
+async def _append_user_message(session_id: str, session: Dict[str, Any], message: str) -> list:
+    """Append the user turn and return the (token-budgeted) history to send to the LLM."""
+    history_messages = context_manager.add(session_id, session, "user", message)
+    await session_io(session_store.append, session_id, session, pack_message("user", message))
+    _persist_message(session_id, session, "user", message)
+    return history_messages
+
+async def _append_assistant_message(session_id: str, session: Dict[str, Any], ai_reply: str):
+    context_manager.add(session_id, session, "assistant", ai_reply)
+    await session_io(session_store.append, session_id, session, pack_message("assistant", ai_reply))
+    _persist_message(session_id, session, "assistant", ai_reply)
+
+def _persist_message(session_id: str, session: Dict[str, Any], role: str, content: str):
+    # Buffered and written to Supabase in batches (when configured); never blocks the reply
+    supabase_service = get_supabase_service()
+    if supabase_service.writer is not None:
+        supabase_service.save_chat_message(session_id, role, content, session['patient_id'])
+
+# ---------------------------
+# Nearby care lookup, run alongside the LLM call
+# ---------------------------
+def wants_nearby_care(message: str) -> bool:
+    return not LOCATION_KEYWORDS.isdisjoint(normalize(message).concepts)
+
+def start_nearby_lookup(message: str, latitude: Optional[float], longitude: Optional[float],
+                        find_hospitals: Callable[..., List[dict]]) -> Optional[asyncio.Task]:
+    """
+    Intent check up front: if the user asks for care nearby and sent a
+    location, start `find_hospitals(latitude, longitude)` in a worker thread
+    now, so the endpoint pays max(LLM, maps) rather than their sum.
+    """
+    if not (latitude and longitude) or not wants_nearby_care(message):
+        return None
+    return asyncio.ensure_future(asyncio.to_thread(find_hospitals, latitude, longitude))
+
+async def collect_nearby(lookup: Optional[asyncio.Task]) -> Optional[List[dict]]:
+    """Result of start_nearby_lookup(); a failed lookup doesn't fail the chat reply."""
+    if lookup is None:
+        return None
+    try:
+        return await lookup
+    except Exception as e:
+        logger.warning("nearby hospital lookup failed: %s", e)
+        return None
+
+async def _with_nearby_context(history_messages: list, nearby: Optional[Awaitable]) -> list:
+    if nearby is None:
+        return history_messages
+    try:
+        hospitals = await asyncio.wait_for(asyncio.shield(nearby), NEARBY_CONTEXT_WAIT)
+    except Exception:
+        # Still running (or failed): answer without it; the endpoint collects it later
+        return history_messages
+    if not hospitals:
+        return history_messages
+
+    lines = [
+        f"- {h.get('name')} ({h.get('distance_km', '?')} km) {h.get('address') or ''}".rstrip()
+        for h in hospitals[:3]
+    ]
+    last = history_messages[-1]
+    note = "\n\n[Backend clinic data - nearest facilities to the user]\n" + "\n".join(lines)
+    return history_messages[:-1] + [dict(last, content=last["content"] + note)]
+
 # ---------------------------
 # Other helpers (same as original)
 # ---------------------------
 def get_session_history(session_id: str) -> Dict[str, Any]:
-    if session_id not in chat_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         return {'error': 'Session not found'}
-    return chat_sessions[session_id]
+    return {
+        'patient_id': session['patient_id'],
+        'created_at': datetime.fromtimestamp(session['created_at']).isoformat(),
+        'messages': [unpack_message(m) for m in session['messages']],
+        'context': session['context']
+    }
 
 def update_session_context(session_id: str, context_updates: Dict[str, Any]) -> bool:
-    if session_id not in chat_sessions:
-        return False
-    session = chat_sessions[session_id]
-    session['context'].update(context_updates)
-    return True
+    return session_store.update_context(session_id, context_updates)
@@ -0,0 +1,192 @@
+# agents/context_window.py
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from services.session_store import ROLES
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token plus per-message framing)."""
+    return len(text) // 4 + 4
+
+
+class ContextWindow:
+    """
+    The already-stripped LLM history for one session, kept within a token
+    budget. The system prompt and the `pin_recent` newest messages are always
+    sent; older messages are moved to `pending` and later folded into a
+    rolling summary.
+    """
+
+    def __init__(self, system_prompt: str, budget: int, pin_recent: int,
+                 summary: str = "", folded_upto: int = 1):
+        self.system = {"role": "system", "content": system_prompt}
+        self.budget = budget
+        self.pin_recent = pin_recent
+        self.summary = summary
+        # Index into the session's message list of the first message not yet summarized
+        self.folded_upto = folded_upto
+        # Number of session messages reflected here, to spot turns added elsewhere
+        self.seen = folded_upto
+        self.recent: List[dict] = []
+        self.pending: List[dict] = []
+        self.folding = False
+        self._tokens = estimate_tokens(system_prompt) + estimate_tokens(summary)
+        self.lock = threading.Lock()
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    def add(self, role: str, content: str):
+        message = {"role": role, "content": content}
+        self.recent.append(message)
+        self.seen += 1
+        self._tokens += estimate_tokens(content)
+        while self._tokens > self.budget and len(self.recent) > self.pin_recent:
+            oldest = self.recent.pop(0)
+            self._tokens -= estimate_tokens(oldest["content"])
+            self.pending.append(oldest)
+
+    def set_summary(self, summary: str, folded: int):
+        self._tokens += estimate_tokens(summary) - estimate_tokens(self.summary)
+        self.summary = summary
+        self.folded_upto += folded
+
+    def messages(self) -> List[dict]:
+        """The payload for the LLM: system prompt, summary, then recent turns."""
+        head = [self.system]
+        if self.summary:
+            head.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return head + self.recent
+
+
+def extractive_summary(previous: str, messages: List[dict], max_tokens: int) -> str:
+    """
+    Default summarizer: one short line per folded turn, newest kept when the
+    summary outgrows `max_tokens`. Runs in microseconds, so it needs no LLM.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        if len(text) > 160:
+            text = text[:157] + "..."
+        lines.append(f"- {message['role']}: {text}")
+    while lines and sum(estimate_tokens(line) for line in lines) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ContextManager:
+    """
+    Keeps one ContextWindow per session in a bounded LRU, so each turn costs
+    O(window) rather than O(history). Windows are rebuilt from the session on
+    a cache miss using the summary persisted in the session context, and a
+    cached window that is behind the session (another worker served some
+    turns of a shared store) takes the missing messages from it first.
+
+    Folding pending messages into the summary is scheduled as a background
+    task when an event loop is running, keeping it off the request path.
+    `summarizer` may be sync or async: (previous_summary, messages, max_tokens) -> str,
+    and so may `on_summary`: (session_id, summary, folded_upto).
+    """
+
+    def __init__(self, system_prompt: str, budget: int = 3000, pin_recent: int = 6,
+                 summary_tokens: int = 600, max_windows: int = 10000,
+                 summarizer: Callable = extractive_summary,
+                 on_summary: Optional[Callable[[str, str, int], Any]] = None):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.pin_recent = pin_recent
+        self.summary_tokens = summary_tokens
+        self.max_windows = max_windows
+        self.summarizer = summarizer
+        self.on_summary = on_summary
+        self._windows: "OrderedDict[str, ContextWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+    def window(self, session_id: str, session: Dict[str, Any]) -> ContextWindow:
+        messages = session["messages"]
+        with self._lock:
+            window = self._windows.get(session_id)
+            if window is not None:
+                self._windows.move_to_end(session_id)
+        if window is not None:
+            with window.lock:
+                if window.seen < len(messages):
+                    for role, _, content in messages[window.seen:]:
+                        window.add(ROLES[role], content)
+                if window.seen == len(messages):
+                    return window
+            # The session was recreated behind this window: rebuild it
+
+        context = session.get("context", {})
+        window = ContextWindow(
+            self.system_prompt, self.budget, self.pin_recent,
+            summary=context.get("summary", ""),
+            folded_upto=context.get("summarized_upto", 1)
+        )
+        for role, _, content in messages[window.folded_upto:]:
+            window.add(ROLES[role], content)
+
+        with self._lock:
+            self._windows[session_id] = window
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+        return window
+
+    def add(self, session_id: str, session: Dict[str, Any], role: str, content: str) -> List[dict]:
+        """
+        Record a message (call before it is appended to the session) and
+        return the trimmed history to send to the LLM.
+        """
+        window = self.window(session_id, session)
+        with window.lock:
+            window.add(role, content)
+            messages = window.messages()
+            needs_fold = bool(window.pending) and not window.folding
+            if needs_fold:
+                window.folding = True
+
+        if needs_fold:
+            try:
+                task = asyncio.get_running_loop().create_task(self.fold(session_id, window))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            except RuntimeError:
+                # No event loop (sync caller): fold inline
+                asyncio.run(self.fold(session_id, window))
+        return messages
+
+    async def fold(self, session_id: str, window: ContextWindow):
+        """Fold pending messages into the summary until none are left."""
+        while True:
+            with window.lock:
+                batch, window.pending = window.pending, []
+                previous = window.summary
+                if not batch:
+                    window.folding = False
+                    return
+
+            try:
+                summary = self.summarizer(previous, batch, self.summary_tokens)
+                if asyncio.iscoroutine(summary):
+                    summary = await summary
+            except Exception as e:
+                print(f"⚠️ Context summary failed: {e}")
+                summary = extractive_summary(previous, batch, self.summary_tokens)
+
+            with window.lock:
+                window.set_summary(summary, len(batch))
+                folded_upto = window.folded_upto
+            if self.on_summary:
+                result = self.on_summary(session_id, summary, folded_upto)
+                if asyncio.iscoroutine(result):
+                    await result
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._windows.pop(session_id, None)
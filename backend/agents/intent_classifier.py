@@ -0,0 +1,115 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from agents.normalizer import NormalizedText, Normalizer, normalize, normalizer
+from services.settings import get_settings
+
+DEFAULT_INTENTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "intents.json"
+)
+
+
+class Intent:
+    __slots__ = ("name", "priority", "responses")
+
+    def __init__(self, name: str, priority: int, responses: Dict[str, str]):
+        self.name = name
+        self.priority = priority
+        self.responses = responses
+
+    def response(self, language: str) -> str:
+        return self.responses.get(language) or self.responses["en"]
+
+
+class IntentClassifier:
+    """
+    Rule-based replies from a config file (data/intents.json). Keywords in
+    every language are run through the same normalizer as messages, then
+    compiled into an inverted index from token to intents, with
+    phrases keyed by their first token and tried longest first.
+
+    Classifying a message is one dict probe per token, and only intents
+    that matched are scored, so the cost does not grow with the number of
+    intents. The winner has the highest (priority, score); ties go to the
+    intent listed first. Emergency-style intents get a higher priority so
+    they win whenever they match at all. Replies are in the message's
+    language where the intent has one, else English.
+    """
+
+    def __init__(self, config: dict, normalizer: Normalizer = normalizer):
+        self.intents: List[Intent] = []
+        # token -> [(intent, weight, language)]; phrases keyed by their first token
+        self._words: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], int, int, str]]] = {}
+
+        for index, spec in enumerate(config["intents"]):
+            self.intents.append(Intent(spec["name"], spec.get("priority", 1), spec["responses"]))
+            seen = set()
+            for language, keywords in spec.get("keywords", {}).items():
+                for keyword in keywords:
+                    tokens = tuple(normalizer._normalize(keyword).tokens)
+                    # "uvimbe" and "swelling" normalize alike: count the concept once, or it
+                    # would outvote the message's own language
+                    if tokens in seen:
+                        continue
+                    seen.add(tokens)
+                    if len(tokens) == 1:
+                        self._words.setdefault(tokens[0], []).append((index, 1, language))
+                    elif tokens:
+                        # Phrases are more specific than single words, so they weigh more
+                        self._phrases.setdefault(tokens[0], []).append((tokens, index, len(tokens), language))
+
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+        by_name = {intent.name: intent for intent in self.intents}
+        self.default = by_name[config.get("default", "fallback")]
+
+    @classmethod
+    def from_file(cls, path: str = None) -> "IntentClassifier":
+        path = path or get_settings().intents_path or DEFAULT_INTENTS_PATH
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def scores(self, normalized: NormalizedText) -> Tuple[Dict[int, int], Dict[str, int]]:
+        """Intent index -> score for every intent with a keyword in the message, and keyword hits per language."""
+        tokens = normalized.tokens
+        scores: Dict[int, int] = {}
+        languages: Dict[str, int] = {}
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            step = 1
+            for phrase, index, weight, language in self._phrases.get(token, ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    scores[index] = scores.get(index, 0) + weight
+                    languages[language] = languages.get(language, 0) + 1
+                    step = len(phrase)
+                    break
+            else:
+                for index, weight, language in self._words.get(token, ()):
+                    scores[index] = scores.get(index, 0) + weight
+                    languages[language] = languages.get(language, 0) + 1
+            i += step
+        return scores, languages
+
+    def classify(self, message: str) -> Tuple[Intent, str]:
+        """Best intent for a message and the language to reply in."""
+        normalized = normalize(message)
+        scores, languages = self.scores(normalized)
+        # Swahili keywords count towards a Swahili reply even without Swahili function words
+        language = normalized.language
+        if languages.get("sw", 0) > languages.get("en", 0):
+            language = "sw"
+        if not scores:
+            return self.default, language
+        best = max(scores, key=lambda index: (self.intents[index].priority, scores[index], -index))
+        return self.intents[best], language
+
+    def respond(self, message: str) -> str:
+        intent, language = self.classify(message)
+        return intent.response(language)
+
+
+# ✅ Export singleton
+intent_classifier = IntentClassifier.from_file()
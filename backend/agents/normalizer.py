@@ -0,0 +1,219 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+
+# canonical concept -> surface forms by language ("en" entries are inflections and common misspellings).
+# Concepts are spelled like the triage rule keywords, so a hit can be looked up there directly.
+DEFAULT_LEXICON = {
+    # Symptoms
+    "bleeding": {
+        "sw": ["kutokwa na damu", "natokwa na damu", "ninatokwa na damu", "kuvuja damu", "navuja damu"],
+        "en": ["bleed", "bleeds", "bled", "bleding", "bleedin", "bleeding heavily"]
+    },
+    "blood": {"sw": ["damu"], "en": ["bloody", "blod"]},
+    "spotting": {"sw": ["matone ya damu", "madoa ya damu"], "en": ["spoting"]},
+    "fever": {"sw": ["homa", "nina homa", "homa kali"], "en": ["fevers", "feverish", "feaver", "fiver", "fevar"]},
+    "hot": {"sw": ["joto", "mwili una joto", "nina joto"], "en": []},
+    "chills": {"sw": ["baridi", "kutetemeka", "natetemeka", "kuhisi baridi"], "en": ["chill", "shivering", "shivers"]},
+    "temperature": {"sw": [], "en": ["temp", "temprature", "temperture"]},
+    "headache": {
+        "sw": ["maumivu ya kichwa", "kichwa kinauma", "kichwa kuuma", "kuumwa na kichwa", "naumwa na kichwa"],
+        "sheng": ["kichwa inauma"],
+        "en": ["headaches", "head ache", "head aches", "hedache", "headach", "head pain", "migraine"]
+    },
+    "blurred vision": {
+        "sw": ["kuona ukungu", "naona ukungu", "macho ukungu", "kuona vibaya", "naona vibaya", "siwezi kuona vizuri"],
+        "en": ["blurry vision", "blurry", "blured vision", "blurred", "vision blurry", "seeing spots", "see spots"]
+    },
+    "swelling": {
+        "sw": ["uvimbe", "kuvimba", "nimevimba", "imevimba", "miguu imevimba", "mikono imevimba"],
+        "en": ["swollen", "swelled", "sweling", "swolen"]
+    },
+    "pain": {"sw": ["maumivu", "naumwa", "kuuma", "inauma"], "en": ["pains", "painful", "hurts", "hurting", "ache"]},
+    "contractions": {"sw": ["uchungu", "uchungu wa kuzaa"], "en": ["contraction", "contractons"]},
+    "water broke": {"sw": ["maji yamevunjika", "chupa imepasuka"], "en": ["waters broke", "water broken"]},
+    "emergency": {"sw": ["dharura", "haraka sana"], "en": ["emergancy", "emergencies"]},
+    # Care nearby
+    "hospital": {"sw": ["hospitali", "hosipitali"], "sheng": ["hosi", "hosp"], "en": ["hospitals", "hospitl"]},
+    "clinic": {"sw": ["kliniki", "zahanati", "kituo cha afya"], "en": ["clinics", "klinik", "dispensary", "health centre"]},
+    "doctor": {"sw": ["daktari", "madaktari", "mganga"], "sheng": ["dakta", "dokta"], "en": ["doctors", "docta", "dr"]},
+    "nearby": {"sw": ["karibu", "karibu nami", "karibu yangu", "karibu na mimi"], "en": ["near me", "close by", "near by"]}
+}
+
+# Common function words, used only to guess the message language
+LANGUAGE_MARKERS = {
+    "sw": ["na", "ya", "wa", "kwa", "ni", "nina", "sana", "mimi", "kuna", "hii", "lakini", "naomba",
+           "tafadhali", "je", "nini", "gani", "wapi", "leo", "jana", "mtoto", "mimba", "siku"],
+    "en": ["i", "the", "and", "have", "my", "is", "a", "of", "to", "it", "since", "very", "what", "where", "baby"]
+}
+
+# Inflections tried for words missing from the tables ("headaches" -> "headache")
+_SUFFIXES = ("ing", "es", "ed", "s")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Case fold and strip accents; ASCII text takes the fast path."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def _fold_char(char: str) -> str:
+    return unicodedata.normalize("NFKD", char.casefold()).encode("ascii", "ignore").decode("ascii")
+
+
+def fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    `fold(text)` plus, for each folded position, the index of the original
+    character it came from (with a final entry for the end of the text), so
+    spans found in the folded text can be mapped back. Folding can drop
+    characters (emoji, curly quotes, combining accents) or expand them.
+    ASCII text folds in place and returns None for the map.
+    """
+    folded = text.casefold()
+    if folded.isascii() and len(folded) == len(text):
+        return folded, None
+    parts, positions = [], []
+    for index, char in enumerate(text):
+        part = _fold_char(char)
+        if part:
+            parts.append(part)
+            positions.extend([index] * len(part))
+    positions.append(len(text))
+    return "".join(parts), positions
+
+
+class NormalizedText:
+    """
+    One message after normalization.
+
+    - `tokens`: canonical tokens (concepts where recognised, else the word)
+    - `text`: the tokens joined by spaces, for substring-style checks
+    - `concepts`: every concept recognised
+    - `hits`: (concept, surface, (start, end)) for words that were not already
+      the concept itself, i.e. translations, inflections and misspellings;
+      `surface` is folded, spans index the original text
+    - `language`: best guess, "sw" or "en"
+    """
+    __slots__ = ("tokens", "text", "concepts", "hits", "language")
+
+    def __init__(self, tokens: List[str], concepts: FrozenSet[str], hits: list, language: str):
+        self.tokens = tokens
+        self.text = " ".join(tokens)
+        self.concepts = concepts
+        self.hits = hits
+        self.language = language
+
+
+class Normalizer:
+    """
+    Compiles the lexicon into plain dict lookups: single words map straight
+    to a concept, phrases are keyed by their first word and tried longest
+    first. Normalizing a message is one regex tokenization plus a dict probe
+    per word.
+    """
+
+    def __init__(self, lexicon: Dict[str, Dict[str, List[str]]] = None,
+                 markers: Dict[str, List[str]] = None, separator: str = "\x00"):
+        self.separator = separator
+        self._words: Dict[str, Tuple[str, str]] = {}   # word -> (concept, language)
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str, str]]] = {}
+        self._markers: Dict[str, str] = {}
+
+        for concept, forms in (lexicon or DEFAULT_LEXICON).items():
+            entries = [(concept, "en")] + [(f, lang) for lang, surface in forms.items() for f in surface]
+            for surface, lang in entries:
+                words = tuple(_TOKEN.findall(fold(surface)))
+                language = "en" if lang == "en" else "sw"  # Sheng counts as Swahili
+                if len(words) == 1:
+                    self._words.setdefault(words[0], (concept, language))
+                elif words:
+                    self._phrases.setdefault(words[0], []).append((words, concept, language))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+
+        # What a hit can start with: a surface form other than the concept itself, a word with a
+        # suffix _lookup strips ("fevers"), or a phrase's first two words. Callers that only need
+        # `hits` scan for these first and skip normalizing text that has none.
+        self.hit_terms = set()
+        for word, (concept, _) in self._words.items():
+            if word != concept:
+                self.hit_terms.add(word)
+            if len(word) > 2:
+                self.hit_terms.update(word + suffix for suffix in _SUFFIXES)
+        for candidates in self._phrases.values():
+            self.hit_terms.update(" ".join(phrase[:2]) for phrase, _, _ in candidates)
+        for lang, words in (markers or LANGUAGE_MARKERS).items():
+            for word in words:
+                self._markers.setdefault(word, lang)
+
+        self.normalize = lru_cache(maxsize=4096)(self._normalize)
+
+    def _lookup(self, word: str):
+        found = self._words.get(word)
+        if found is None:
+            for suffix in _SUFFIXES:
+                if word.endswith(suffix) and len(word) > len(suffix) + 2:
+                    found = self._words.get(word[:-len(suffix)])
+                    if found is not None:
+                        break
+        return found
+
+    def _normalize(self, text: str) -> NormalizedText:
+        folded, positions = fold_with_offsets(text)
+        words = [(m.group(), m.start(), m.end()) for m in _TOKEN.finditer(folded)]
+        tokens, hits, concepts = [], [], set()
+        votes = {"sw": 0, "en": 0}
+
+        i = 0
+        while i < len(words):
+            word, start, end = words[i]
+            match = None
+            for phrase, concept, language in self._phrases.get(word, ()):
+                n = len(phrase)
+                if (tuple(w for w, _, _ in words[i:i + n]) == phrase
+                        and self.separator not in folded[start:words[i + n - 1][2]]):
+                    match = (concept, language, n)
+                    break
+            if match is None:
+                found = self._lookup(word)
+                if found is not None:
+                    match = (found[0], found[1], 1)
+
+            if match is None:
+                tokens.append(word)
+                marker = self._markers.get(word)
+                if marker:
+                    votes[marker] += 1
+                i += 1
+                continue
+
+            concept, language, n = match
+            phrase_end = words[i + n - 1][2]
+            surface = folded[start:phrase_end]
+            tokens.append(concept)
+            concepts.add(concept)
+            if surface != concept:
+                span = (start, phrase_end) if positions is None else \
+                    (positions[start], positions[phrase_end - 1] + 1)
+                hits.append((concept, surface, span))
+                votes[language] += 1
+            i += n
+
+        language = "sw" if votes["sw"] > votes["en"] else "en"
+        return NormalizedText(tokens, frozenset(concepts), hits, language)
+
+
+# ✅ Compiled once and shared by triage and chat; repeated messages hit the cache
+normalizer = Normalizer()
+
+
+def normalize(text: str) -> NormalizedText:
+    # Long texts (joined batches) are one-offs, so they skip the cache
+    if len(text) > 2048:
+        return normalizer._normalize(text)
+    return normalizer.normalize(text)
@@ -1,20 +1,61 @@
+import logging
+
+from services.job_queue import QueueFull
+from services.metrics import stage
+from services.serialization import Encoded, encode_fields
+
+# Symptom text is health data: log who and how much, never what
+logger = logging.getLogger("sauti.orchestrator")
+
+
 class Orchestrator:
     def __init__(self):
-        from agents.triage_agent import triage_symptoms
+        from agents.triage_agent import triage_agent, triage_symptoms, triage_batch
         from agents.voice_agent import generate_health_alert
+        self.triage_agent = triage_agent
         self.triage = triage_symptoms
+        self.triage_batch = triage_batch
         self.generate_alert = generate_health_alert
 
     def handle_user_input(self, patient_id: str, symptom_text: str):
-        print(f"Orchestrator: Received input from patient {patient_id}: '{symptom_text}'")
+        logger.debug("triage request patient_id=%s chars=%d", patient_id, len(symptom_text))
 
-        diagnosis = self.triage(symptom_text, patient_id)
+        with stage("triage"):
+            diagnosis = self.triage(symptom_text, patient_id)
         result = {"diagnosis": diagnosis}
         
         if diagnosis["risk"] in ["HIGH", "MEDIUM"]:
-            print("Orchestrator: Generating voice alert...")
-            audio_data = self.generate_alert(diagnosis["recommendation"], patient_id)
-            result["audio_alert"] = audio_data
+            logger.debug("queueing voice alert patient_id=%s", patient_id)
+            with stage("voice_alert"):
+                # {"audio_url", "content_type", "language", "job_id"}; rendered in the background, served by /api/audio
+                result["audio_alert"] = self._alert(diagnosis, patient_id)
+
+        return result
+
+    def handle_batch(self, items: list):
+        """
+        Triage a batch of (patient_id, symptom_text) pairs in one pass, then
+        yield per-item results so callers can stream them as they are ready.
+        """
+        logger.debug("triage batch items=%d", len(items))
+
+        with stage("triage"):
+            diagnoses = self.triage_batch(items)
+        for index, ((patient_id, _), diagnosis) in enumerate(zip(items, diagnoses)):
+            result = {"index": index, "patient_id": patient_id, "diagnosis": diagnosis}
+            if diagnosis["risk"] in ["HIGH", "MEDIUM"]:
+                with stage("voice_alert"):
+                    result["audio_alert"] = self._alert(diagnosis, patient_id)
+            yield result
+
+    def encode(self, result: dict) -> Encoded:
+        """Response JSON for a result, splicing in the diagnosis' pre-encoded rule fields."""
+        return encode_fields(dict(result, diagnosis=self.triage_agent.encode(result["diagnosis"])))
 
-        print("Orchestrator: Workflow complete.")
-        return result
\ No newline at end of file
+    def _alert(self, diagnosis: dict, patient_id: str):
+        try:
+            return self.generate_alert(diagnosis["recommendation"], patient_id, risk=diagnosis["risk"])
+        except QueueFull as e:
+            # Backpressure: the triage result still goes out, without audio
+            logger.warning("voice alert skipped patient_id=%s: %s", patient_id, e)
+            return None
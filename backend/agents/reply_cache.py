@@ -0,0 +1,177 @@
+# agents/reply_cache.py
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from agents.normalizer import normalize
+from agents.triage_agent import triage_agent
+
+# A near-duplicate lookup scores at most this many cached questions
+_MAX_CANDIDATES = 32
+
+# Negations (normalized tokens; "don't" -> "don t"). A near-duplicate must negate the same
+# words, so "is it safe to ..." never gets the answer to "is it not safe to ..."
+NEGATIONS = frozenset([
+    "not", "no", "never", "cannot", "t", "nt", "dont", "doesnt", "isnt", "cant", "wont", "shouldnt", "without",
+    "si", "sio", "siyo", "sivyo", "hapana", "hakuna", "bila", "sina", "sijui", "siwezi", "hawezi", "hana"
+])
+
+
+def negation_signature(tokens: List[str]) -> tuple:
+    """Each negation with the word it applies to, in order: (("not", "safe"),)."""
+    return tuple(
+        ("not", tokens[i + 1] if i + 1 < len(tokens) else "")
+        for i, token in enumerate(tokens) if token in NEGATIONS
+    )
+
+
+class ReplyCache:
+    """
+    LLM replies to stateless chat turns (system prompt + one user message),
+    keyed on (system prompt digest, reply language, normalized message) in a
+    size-bounded LRU with a TTL. Normalization folds case, punctuation,
+    Swahili/Sheng forms and common misspellings into the same key.
+
+    With `similarity` > 0 a miss also checks a small TF-IDF index over the
+    cached questions and serves the closest one whose cosine similarity
+    reaches the threshold ("what should I eat" ~ "what should i eat now")
+    and negates the same words. It is off by default: similar wording can
+    still mean different medical questions.
+
+    Messages the triage rules match are never served from or written to the
+    cache: risky symptoms always get a fresh answer.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 6 * 3600.0, similarity: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        # key -> (reply, stored_at, weights, provider_seconds)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._postings: Dict[str, set] = {}   # token -> keys of cached questions containing it
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0,
+                      "stores": 0, "evictions": 0, "saved_seconds": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, messages: List[dict]) -> Optional[tuple]:
+        """Cache key for an LLM payload, or None if the turn isn't cacheable."""
+        if self.max_entries <= 0 or len(messages) != 2:
+            return None
+        system, user = messages
+        if system["role"] != "system" or user["role"] != "user":
+            return None
+        if triage_agent.find_matches(user["content"]):
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return None
+        normalized = normalize(user["content"])
+        digest = hashlib.sha1(system["content"].encode("utf-8")).hexdigest()[:16]
+        return digest, normalized.language, negation_signature(normalized.tokens), normalized.text
+
+    def get(self, key: Optional[tuple]) -> Optional[str]:
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            found = self._fresh(key, now)
+            if found is not None:
+                self.stats["hits"] += 1
+            elif self.similarity > 0:
+                found = self._closest(key, now)
+                if found is not None:
+                    self.stats["similar_hits"] += 1
+            if found is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(found)
+            reply, _, _, seconds = self._entries[found]
+            self.stats["saved_seconds"] += seconds
+            return reply
+
+    def put(self, key: Optional[tuple], reply: str, provider_seconds: float = 0.0):
+        if key is None or not reply:
+            return
+        weights = self._tf(key[3])
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (reply, time.monotonic(), weights, provider_seconds)
+            for token in weights:
+                self._postings.setdefault(token, set()).add(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _fresh(self, key: tuple, now: float) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] >= self.ttl:
+            self._remove(key)
+            return None
+        return key
+
+    def _closest(self, key: tuple, now: float) -> Optional[tuple]:
+        query = self._tf(key[3])
+        if not query:
+            return None
+        # Rarest tokens first, so common words don't drag in every cached question
+        candidates = {}
+        for token in sorted(query, key=lambda t: len(self._postings.get(t, ()))):
+            for other in self._postings.get(token, ()):
+                if other[:3] == key[:3]:
+                    candidates[other] = True
+                    if len(candidates) >= _MAX_CANDIDATES:
+                        break
+            if len(candidates) >= _MAX_CANDIDATES:
+                break
+
+        best, best_score = None, self.similarity
+        for other in candidates:
+            score = self._cosine(query, self._entries[other][2])
+            if score >= best_score and self._fresh(other, now) is not None:
+                best, best_score = other, score
+        return best
+
+    def _cosine(self, a: Dict[str, float], b: Dict[str, float]) -> float:
+        total = len(self._entries) + 1
+        idf = {t: math.log(total / (1 + len(self._postings.get(t, ())))) + 1 for t in set(a) | set(b)}
+        dot = sum(a[t] * b[t] * idf[t] ** 2 for t in a if t in b)
+        norm_a = math.sqrt(sum((w * idf[t]) ** 2 for t, w in a.items()))
+        norm_b = math.sqrt(sum((w * idf[t]) ** 2 for t, w in b.items()))
+        return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+    @staticmethod
+    def _tf(text: str) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for token in text.split():
+            weights[token] = weights.get(token, 0.0) + 1.0
+        return weights
+
+    def _remove(self, key: tuple):
+        # Called with the lock held
+        _, _, weights, _ = self._entries.pop(key)
+        for token in weights:
+            keys = self._postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[token]
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def metrics(self) -> dict:
+        served = self.stats["hits"] + self.stats["similar_hits"]
+        lookups = served + self.stats["misses"]
+        return dict(self.stats, saved_seconds=round(self.stats["saved_seconds"], 3), entries=len(self),
+                    hit_ratio=round(served / lookups, 4) if lookups else None)
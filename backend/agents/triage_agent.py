@@ -1,62 +1,247 @@
-import json
-import os
+import re
+from bisect import bisect_right
+
+from agents.normalizer import normalize, normalizer
+from services.serialization import Encoded, dumps
+
+# Higher number wins when several conditions match the same report
+RISK_PRIORITY = {"HIGH": 2, "MEDIUM": 1, "LOW": 0}
+
+# Joins reports for batch scans; it is not a word or space char, so no keyword can span it
+BATCH_SEPARATOR = "\x00"
+
+# Inflections a keyword may carry and still match ("headaches", "feverish", "bloody", "vomited")
+INFLECTIONS = ("s", "es", "ed", "ing", "ish", "y")
+
+DEFAULT_RULES = {
+    "pre_eclampsia": {
+        "keywords": ["headache", "blurred vision", "swelling", "swollen hands", "see clearly"],
+        "risk": "HIGH",
+        "recommendation": "Potential pre-eclampsia. This is serious. Please go to your nearest clinic immediately for a blood pressure check and urine test."
+    },
+    "fever": {
+        "keywords": ["fever", "hot", "chills", "temperature"],
+        "risk": "MEDIUM",
+        "recommendation": "A fever during pregnancy can be dangerous. Please contact your community health worker or visit a clinic within 24 hours."
+    },
+    "bleeding": {
+        "keywords": ["bleeding", "blood", "spotting"],
+        "risk": "HIGH",
+        "recommendation": "Bleeding during pregnancy requires immediate medical attention. Please go to the nearest clinic or hospital right away."
+    },
+    "normal": {
+        "risk": "LOW",
+        "recommendation": "Thank you for checking in. This sounds within normal range, but always contact a health worker if you are worried."
+    }
+}
+
+
+def _trie_pattern(keywords, gap: str = r"\s+") -> str:
+    """
+    Build a regex alternation shaped like a prefix trie. Python's `re` tries a
+    flat alternation branch by branch, so sharing prefixes keeps the scan cost
+    flat as the keyword list grows into the hundreds. Spaces match `gap`.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node) -> str:
+        branches = []
+        for char in sorted(k for k in node if k):
+            token = gap if char == " " else re.escape(char)
+            branches.append(token + emit(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        # A keyword ending here makes the longer continuation optional (greedy)
+        return "(?:%s)?" % body if "" in node else body
+
+    return emit(trie)
+
 
 class TriageAgent:
-    def __init__(self):
-        self.rules = {
-            "pre_eclampsia": {
-                "keywords": ["headache", "blurred vision", "swelling", "swollen hands", "see clearly"],
-                "risk": "HIGH",
-                "recommendation": "Potential pre-eclampsia. This is serious. Please go to your nearest clinic immediately for a blood pressure check and urine test."
-            },
-            "fever": {
-                "keywords": ["fever", "hot", "chills", "temperature"],
-                "risk": "MEDIUM",
-                "recommendation": "A fever during pregnancy can be dangerous. Please contact your community health worker or visit a clinic within 24 hours."
-            },
-            "bleeding": {
-                "keywords": ["bleeding", "blood", "spotting"],
-                "risk": "HIGH",
-                "recommendation": "Bleeding during pregnancy requires immediate medical attention. Please go to the nearest clinic or hospital right away."
-            },
-            "normal": {
-                "risk": "LOW",
-                "recommendation": "Thank you for checking in. This sounds within normal range, but always contact a health worker if you are worried."
-            }
-        }
+    def __init__(self, rules: dict = None):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self._compile()
 
-    def analyze_symptoms(self, text_input: str, patient_history: dict) -> dict:
-        text_input = text_input.lower()
+    def _compile(self):
+        """
+        Compile every rule keyword into a single alternation regex so a report
+        is scanned once, no matter how many conditions the protocol defines.
+        """
+        self._keyword_conditions = {}
+        for condition, rule in self.rules.items():
+            for keyword in rule.get("keywords", []):
+                key = " ".join(keyword.lower().split())
+                self._keyword_conditions.setdefault(key, []).append(condition)
+
+        if self._keyword_conditions:
+            # Keywords (optionally inflected), else the start of anything the normalizer would turn
+            # into a hit: only reports where that alternative matches are normalized
+            self._pattern = re.compile(r"\b(?:(?P<keyword>%s)(?:%s)?\b|(?P<alias>%s)(?![a-z0-9]))" % (
+                _trie_pattern(self._keyword_conditions), "|".join(INFLECTIONS),
+                _trie_pattern(normalizer.hit_terms, gap=r"[^a-z0-9\x00]+")
+            ))
+            # For the rare text whose lowercase form changes length ("İ"), so spans still index the original
+            self._pattern_nocase = re.compile(self._pattern.pattern, re.IGNORECASE)
+        else:
+            self._pattern = None
+
+        # Rank by risk, then by rule order so ties stay deterministic
+        self._rank = {
+            condition: (RISK_PRIORITY.get(rule["risk"], 0), -position)
+            for position, (condition, rule) in enumerate(self.rules.items())
+        }
 
+        # The invariant head of each result, `{"condition":..,"risk":..,"recommendation":..`, encoded once
+        self._encoded_heads = {}
         for condition, rule in self.rules.items():
-            if condition == "normal":
+            name = "no_urgent_issue_detected" if condition == "normal" else condition
+            head = {"condition": name, "risk": rule["risk"], "recommendation": rule["recommendation"]}
+            self._encoded_heads[name] = (rule["recommendation"], dumps(head)[:-1])
+
+    def find_matches(self, text_input: str) -> list:
+        """
+        Return every keyword hit as {condition, keyword, span} in a single pass.
+        A keyword also matches with one of the INFLECTIONS appended; other
+        Swahili/Sheng words, inflections and misspellings are recognised by
+        the shared normalizer. Either way the hit is reported under the rule
+        keyword, with the original words in `alias`. Spans index `text_input`.
+        """
+        if self._pattern is None:
+            return []
+
+        matches = []
+        lowered = text_input.lower()
+        if len(lowered) == len(text_input):
+            found = self._pattern.finditer(lowered)
+        else:
+            found = self._pattern_nocase.finditer(text_input)
+        # Folding can turn accented words into lexicon forms, so non-ASCII text is always normalized
+        probe = not text_input.isascii()
+        for match in found:
+            if match.lastgroup == "alias":
+                probe = True
                 continue
-            for keyword in rule["keywords"]:
-                if keyword in text_input:
-                    return {
-                        "condition": condition,
-                        "risk": rule["risk"],
-                        "recommendation": rule["recommendation"],
-                        "patient_id": patient_history.get("patient_id")
-                    }
+            keyword = " ".join(match.group("keyword").lower().split())
+            inflected = match.end() != match.end("keyword")
+            for condition in self._keyword_conditions[keyword]:
+                hit = {
+                    "condition": condition,
+                    "keyword": keyword,
+                    "span": [match.start(), match.end()]
+                }
+                if inflected:
+                    hit["alias"] = text_input[match.start():match.end()]
+                matches.append(hit)
+
+        if not probe:
+            return matches
+        taken = [m["span"] for m in matches]
+        for concept, surface, (start, end) in normalize(text_input).hits:
+            conditions = self._keyword_conditions.get(concept)
+            if not conditions or any(start < t_end and t_start < end for t_start, t_end in taken):
+                continue
+            for condition in conditions:
+                matches.append({
+                    "condition": condition,
+                    "keyword": concept,
+                    "span": [start, end],
+                    "alias": surface
+                })
+        return matches
+
+    def analyze_symptoms(self, text_input: str, patient_history: dict) -> dict:
+        return self._result(self.find_matches(text_input), patient_history)
+
+    def analyze_batch(self, text_inputs: list, patient_histories: list) -> list:
+        """
+        Triage many reports with one regex scan over the joined texts. Reports
+        are separated by NUL, which no keyword can match across, and each hit
+        is mapped back to its report by offset.
+        """
+        texts = [text.replace(BATCH_SEPARATOR, " ") for text in text_inputs]
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + len(BATCH_SEPARATOR)
+
+        per_item = [[] for _ in texts]
+        for match in self.find_matches(BATCH_SEPARATOR.join(texts)):
+            index = bisect_right(offsets, match["span"][0]) - 1
+            start = offsets[index]
+            match["span"] = [match["span"][0] - start, match["span"][1] - start]
+            per_item[index].append(match)
+
+        return [
+            self._result(matches, history)
+            for matches, history in zip(per_item, patient_histories)
+        ]
+
+    def _result(self, matches: list, patient_history: dict) -> dict:
+        if matches:
+            condition = max({m["condition"] for m in matches}, key=self._rank.__getitem__)
+            rule = self.rules[condition]
+            return {
+                "condition": condition,
+                "risk": rule["risk"],
+                "recommendation": rule["recommendation"],
+                "patient_id": patient_history.get("patient_id"),
+                "matches": matches
+            }
 
         return {
             "condition": "no_urgent_issue_detected",
             "risk": self.rules["normal"]["risk"],
             "recommendation": self.rules["normal"]["recommendation"],
-            "patient_id": patient_history.get("patient_id")
+            "patient_id": patient_history.get("patient_id"),
+            "matches": []
         }
 
+    def encode(self, result: dict) -> Encoded:
+        """
+        JSON for a result from `_result`: the rule's pre-encoded head plus the
+        per-request patient_id and matches. Anything else (a modified or
+        foreign dict) is encoded in full.
+        """
+        encoded = self._encoded_heads.get(result.get("condition"))
+        if encoded is None or len(result) != 5 or result["recommendation"] is not encoded[0]:
+            return Encoded(dumps(result))
+        return Encoded(encoded[1] + b',"patient_id":' + dumps(result["patient_id"])
+                       + b',"matches":' + dumps(result["matches"]) + b"}")
+
+
+# ✅ Rules are compiled once at import and shared by every request
+triage_agent = TriageAgent()
+
+
 def get_patient_history(patient_id: str):
-    try:
-        with open('data/patient_records.json', 'r') as f:
-            patients = json.load(f)
-            return patients.get(patient_id, {})
-    except FileNotFoundError:
+    from services.patient_store import patient_store
+    record = patient_store.get(patient_id)
+    if record is not None:
+        return record.to_dict()
+    if not patient_store.available:
         return {"patient_id": patient_id, "language": "sw", "name": "Demo User"}
+    return {}
+
+def get_patient_histories(patient_ids) -> dict:
+    """Look up each distinct patient once for a whole batch."""
+    return {pid: get_patient_history(pid) for pid in set(patient_ids)}
 
 def triage_symptoms(text_input: str, patient_id: str) -> dict:
     patient_history = get_patient_history(patient_id)
-    agent = TriageAgent()
-    result = agent.analyze_symptoms(text_input, patient_history)
-    return result
\ No newline at end of file
+    result = triage_agent.analyze_symptoms(text_input, patient_history)
+    return result
+
+def triage_batch(items: list) -> list:
+    """Triage a list of (patient_id, symptom_text) pairs in a single pass."""
+    histories = get_patient_histories(pid for pid, _ in items)
+    return triage_agent.analyze_batch(
+        [text for _, text in items],
+        [histories[pid] for pid, _ in items]
+    )
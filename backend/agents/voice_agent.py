@@ -1,20 +1,133 @@
-import os
-from dotenv import load_dotenv
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from services.job_queue import PRIORITY, Job, JobQueue, job_queue
+from services.settings import get_settings
+from services.tts import AudioStore, TTSEngine, build_tts_engine
+
+# Languages alerts are rendered in; the first one is used for triage alerts
+VOICE_LANGUAGES = get_settings().voice_languages
+
+_AUDIO_FILENAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]+)$")
+
+logger = logging.getLogger("sauti.voice")
 
-load_dotenv()
 
 class VoiceAgent:
-    def speak(self, text: str, language_code: str = "en") -> bytes:
+    """
+    Voice alerts through a pluggable TTS engine and a content-addressed disk
+    cache. A cache miss is rendered as a background job (HIGH-risk alerts
+    first, retried on failure); callers get the clip's URL straight away and
+    the audio endpoint waits for the render.
+    """
+
+    def __init__(self, engine: TTSEngine = None, store: AudioStore = None, queue: JobQueue = None):
+        self.engine = engine or build_tts_engine()
+        self.store = store or AudioStore()
+        self.queue = queue or job_queue
+        self.queue.register("voice_alert", self._render)
+        self._pending: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def speak(self, text: str, language_code: str = "en") -> Optional[bytes]:
+        """Audio bytes for `text` (rendered on first use)."""
         try:
-            # For now, return None to avoid ElevenLabs dependency issues
-            # In production, you can implement ElevenLabs integration here
-            print(f"Voice generation requested: {text}")
-            return None
+            path = self.render(text, language_code)
+            with open(path, "rb") as f:
+                return f.read()
         except Exception as e:
             print(f"Error generating speech: {e}")
             return None
 
-def generate_health_alert(recommendation: str, patient_id: str) -> bytes:
-    agent = VoiceAgent()
-    audio = agent.speak(recommendation, language_code="sw")
-    return audio
\ No newline at end of file
+    def render(self, text: str, language_code: str) -> str:
+        """Path of the cached clip, rendering it now if needed."""
+        digest = self.store.digest(self.engine, text, language_code)
+        job = self._submit(digest, text, language_code, PRIORITY["HIGH"])
+        if job:
+            job.wait()
+        return self.store.path(digest, self.engine.extension)
+
+    def alert(self, text: str, language_code: str, priority: int = PRIORITY["MEDIUM"]) -> dict:
+        """URL of the clip; rendering (if needed) continues in the background."""
+        digest = self.store.digest(self.engine, text, language_code)
+        job = self._submit(digest, text, language_code, priority)
+        return {
+            "audio_url": self._url(digest),
+            "content_type": self.engine.content_type,
+            "language": language_code,
+            "job_id": job.id if job else None
+        }
+
+    def warm_up(self, texts: Iterable[str], languages: List[str] = None) -> int:
+        """Pre-render every (text, language) pair; returns the number of clips."""
+        pairs = [(text, language) for text in texts for language in (languages or VOICE_LANGUAGES)]
+        jobs = [
+            self._submit(self.store.digest(self.engine, text, language), text, language, PRIORITY["BACKGROUND"])
+            for text, language in pairs
+        ]
+        for job in filter(None, jobs):
+            try:
+                job.wait()
+            except Exception as e:
+                print(f"⚠️ Voice warm-up failed for a clip: {e}")
+        print(f"✅ Voice alerts warmed: {len(pairs)} clips ({self.engine.name})")
+        return len(pairs)
+
+    def audio_path(self, filename: str, timeout: float = 30.0) -> Optional[str]:
+        """Cached file for an /api/audio filename, waiting for an in-flight render."""
+        match = _AUDIO_FILENAME.match(filename)
+        if not match or match.group(2) != self.engine.extension:
+            return None
+        digest, extension = match.groups()
+        with self._lock:
+            pending = self._pending.get(digest)
+        if pending is not None:
+            try:
+                pending.wait(timeout=timeout)
+            except Exception:
+                return None
+        return self.store.path(digest, extension) if self.store.exists(digest, extension) else None
+
+    def _submit(self, digest: str, text: str, language_code: str, priority: int) -> Optional[Job]:
+        """The render job for a clip, or None if it is already on disk."""
+        with self._lock:
+            job = self._pending.get(digest)
+            if job is not None and job.status not in ("succeeded", "failed"):
+                return job
+            if self.store.exists(digest, self.engine.extension):
+                return None
+            job = self._pending[digest] = self.queue.submit(
+                "voice_alert", {"digest": digest, "text": text, "language": language_code}, priority
+            )
+            return job
+
+    def _render(self, payload: dict) -> str:
+        digest = payload["digest"]
+        logger.debug("rendering clip digest=%s language=%s chars=%d", digest[:12], payload["language"], len(payload["text"]))
+        audio = self.engine.synthesize(payload["text"], payload["language"])
+        try:
+            self.store.write(digest, self.engine.extension, audio)
+        except OSError as e:
+            print(f"⚠️ Could not cache voice clip {digest[:12]}: {e}")
+            raise RuntimeError("could not write the audio clip") from None
+        with self._lock:
+            self._pending.pop(digest, None)
+        # The job result is public (GET /api/jobs/{id}): the clip's URL, not its path on disk
+        return self._url(digest)
+
+    def _url(self, digest: str) -> str:
+        return f"/api/audio/{digest}.{self.engine.extension}"
+
+
+# ✅ Export singleton
+voice_agent = VoiceAgent()
+
+
+def generate_health_alert(recommendation: str, patient_id: str, risk: str = "MEDIUM") -> dict:
+    return voice_agent.alert(
+        recommendation,
+        language_code=VOICE_LANGUAGES[0] if VOICE_LANGUAGES else "sw",
+        priority=PRIORITY.get(risk, PRIORITY["MEDIUM"])
+    )
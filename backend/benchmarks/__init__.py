@@ -0,0 +1,2 @@
+# Benchmarks for Sauti Ya Mama
+# This file makes the benchmarks directory a Python package
@@ -0,0 +1,136 @@
+# benchmarks/bench_admission.py
+"""
+Triage latency during a chat retry storm, with and without admission
+control. The app is a minimal ASGI stand-in that, like FastAPI's sync
+endpoints, runs handlers on a fixed thread pool: chat holds a thread for
+as long as a slow provider call, triage does the real keyword triage. Also
+shows the per-patient token bucket on a burst from one client.
+
+Run from the backend directory:
+    python benchmarks/bench_admission.py [--storm 300] [--chat-ms 2000] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.triage_agent import triage_agent
+from services.admission import AdmissionController, AdmissionMiddleware, Overloaded, RateLimiter
+
+
+def make_app(pool: ThreadPoolExecutor, chat_s: float):
+    def triage():
+        triage_agent.analyze_symptoms("I have a headache and blurred vision", {})
+        time.sleep(0.005)  # patient store lookup, orchestration
+
+    async def app(scope, receive, send):
+        loop = asyncio.get_running_loop()
+        if scope["path"].startswith("/api/chat/message"):
+            await loop.run_in_executor(pool, time.sleep, chat_s)
+        else:
+            await loop.run_in_executor(pool, triage)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def call(app, path: str) -> int:
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app({"type": "http", "method": "POST", "path": path, "headers": []}, receive, send)
+    return status["code"]
+
+
+async def scenario(app, storm: int, triage_clients: int, seconds: float) -> dict:
+    deadline = time.monotonic() + seconds
+    triage_ms, rejected_ms = [], []
+    counts = {"chat_ok": 0, "chat_429": 0, "triage_ok": 0, "triage_429": 0}
+
+    async def chat_client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            if await call(app, "/api/chat/message") == 429:
+                counts["chat_429"] += 1
+                rejected_ms.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.05)  # a retry storm: clients hammer straight back
+            else:
+                counts["chat_ok"] += 1
+
+    async def triage_client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            status = await call(app, "/api/analyze-symptoms")
+            counts["triage_ok" if status == 200 else "triage_429"] += 1
+            triage_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(*[chat_client() for _ in range(storm)], *[triage_client() for _ in range(triage_clients)])
+    triage_ms.sort()
+    return dict(
+        counts,
+        triage_p50=statistics.median(triage_ms),
+        triage_p99=triage_ms[int(len(triage_ms) * 0.99) - 1],
+        reject_ms=statistics.median(rejected_ms) if rejected_ms else None
+    )
+
+
+def rate_limit_demo(rate_per_minute: float, burst: float, requests: int, over_seconds: float):
+    limiter = RateLimiter(rate=rate_per_minute / 60, burst=burst)
+    admitted = 0
+    retry_after = None
+    for i in range(requests):
+        try:
+            limiter.check("patient:p1")
+            admitted += 1
+        except Overloaded as e:
+            retry_after = retry_after or e.headers()["Retry-After"]
+        time.sleep(over_seconds / requests)
+    return admitted, retry_after
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--storm", type=int, default=300, help="concurrent chat clients")
+    parser.add_argument("--chat-ms", type=int, default=2000, help="time a chat holds a worker thread")
+    parser.add_argument("--threads", type=int, default=40, help="handler thread pool (Starlette's default)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.storm} chat clients (each call holds a thread {args.chat_ms} ms), 5 triage clients, "
+          f"{args.threads} threads, {args.seconds:.0f}s")
+    print(f"{'admission':<10} {'triage p50':>11} {'triage p99':>11} {'triage ok':>10} {'chat ok':>8} "
+          f"{'chat 429':>9} {'429 in ms':>10}")
+    for name in ("off", "on"):
+        pool = ThreadPoolExecutor(max_workers=args.threads)
+        app = make_app(pool, args.chat_ms / 1000)
+        if name == "on":
+            # Lane caps sized to the pool: chat never holds more threads than the pool minus triage's reserve
+            controller = AdmissionController(max_inflight=args.threads, triage_reserve=8,
+                                             lane_limits={"chat": args.threads - 8, "maps": 8})
+            app = AdmissionMiddleware(app, controller)
+        r = asyncio.run(scenario(app, args.storm, 5, args.seconds))
+        pool.shutdown(wait=True)
+        reject = f"{r['reject_ms']:.3f}" if r["reject_ms"] is not None else "-"
+        print(f"{name:<10} {r['triage_p50']:>9.1f}ms {r['triage_p99']:>9.1f}ms {r['triage_ok']:>10} "
+              f"{r['chat_ok']:>8} {r['chat_429']:>9} {reject:>10}")
+
+    admitted, retry_after = rate_limit_demo(20, 10, 100, 3.0)
+    print(f"\nOne patient, 100 chat requests in 3s at 20/min (burst 10): {admitted} admitted, "
+          f"then 429 with Retry-After: {retry_after}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_chat_overlap.py
+"""
+Chat reply + nearby hospital lookup: the old sequential pipeline (LLM call,
+then maps) vs. intent detection up front with the lookup overlapping the
+LLM call. The LLM is a local stub server; the maps lookup is a stub that
+sleeps like Google Places would.
+
+Run from the backend directory (needs httpx):
+    python benchmarks/bench_chat_overlap.py [--llm-ms 400] [--runs 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No database: chat turns would otherwise be written to the Supabase project in .env
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_SERVICE_KEY"] = ""
+
+from agents import chat_agent
+from benchmarks.stubs import StubServer
+from services.llm_client import LLMClient, LLMProvider
+
+MESSAGE = "I have bad headaches, is there a clinic near me?"
+LOCATION = (-1.2921, 36.8219)
+
+
+class RecordingStub(StubServer):
+    """Keeps the last prompt so we can see whether the hospitals reached it."""
+
+    def respond(self, path, body):
+        self.last_prompt = body["messages"][-1]["content"]
+        return super().respond(path, body)
+
+
+def stub_maps(latency: float):
+    def find_hospitals(latitude, longitude):
+        time.sleep(latency)
+        return [{"name": "Pumwani Maternity Hospital", "address": "Nairobi", "distance_km": 2.1}]
+    return find_hospitals
+
+
+async def sequential(session_id: str, find_hospitals):
+    reply = await chat_agent.chat_with_agent(session_id, MESSAGE)
+    hospitals = None
+    if chat_agent.wants_nearby_care(MESSAGE):
+        hospitals = await asyncio.to_thread(find_hospitals, *LOCATION)
+    return reply, hospitals
+
+
+async def overlapped(session_id: str, find_hospitals):
+    lookup = chat_agent.start_nearby_lookup(MESSAGE, *LOCATION, find_hospitals)
+    reply = await chat_agent.chat_with_agent(session_id, MESSAGE, nearby=lookup)
+    return reply, await chat_agent.collect_nearby(lookup)
+
+
+async def run(args):
+    stub = RecordingStub(latency=args.llm_ms / 1000).start()
+    chat_agent.llm_client = LLMClient([LLMProvider("stub", stub.url, "stub-key", "stub-model")], hedging=False)
+    session_id = chat_agent.initialize_chat("bench")["session_id"]
+
+    print(f"LLM stub latency {args.llm_ms} ms, context wait {chat_agent.NEARBY_CONTEXT_WAIT * 1000:.0f} ms")
+    print(f"{'maps ms':>8} {'pipeline':>11} {'median ms':>10} {'hospitals':>10} {'in prompt':>10}")
+    for maps_ms in args.maps_ms:
+        find_hospitals = stub_maps(maps_ms / 1000)
+        for name, pipeline in (("sequential", sequential), ("overlapped", overlapped)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                _, hospitals = await pipeline(session_id, find_hospitals)
+                timings.append((time.perf_counter() - start) * 1000)
+            injected = "Pumwani" in stub.last_prompt
+            print(f"{maps_ms:>8} {name:>11} {statistics.median(timings):>10.1f} "
+                  f"{len(hospitals or []):>10} {str(injected):>10}")
+
+    await chat_agent.llm_client.aclose()
+    stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=int, default=400)
+    parser.add_argument("--maps-ms", type=int, nargs="+", default=[5, 300, 600])
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_clinic_index.py
+"""
+k-nearest and radius queries on the local clinic index vs. a brute-force
+haversine scan, over synthetic clinics spread across Kenya.
+
+Run from the backend directory:
+    python benchmarks/bench_clinic_index.py [--clinics 100000] [--queries 2000]
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.clinic_index import Clinic, ClinicIndex
+from services.geo import haversine_km
+
+# Rough bounding box of Kenya
+LAT_RANGE = (-4.7, 5.0)
+LNG_RANGE = (33.9, 41.9)
+
+
+def random_point() -> tuple:
+    return random.uniform(*LAT_RANGE), random.uniform(*LNG_RANGE)
+
+
+def timed_us(fn, queries: list) -> float:
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clinics", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    clinics = [Clinic(f"Clinic {i}", f"Address {i}", *random_point()) for i in range(args.clinics)]
+    start = time.perf_counter()
+    index = ClinicIndex(clinics)
+    print(f"built index of {len(index)} clinics in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    queries = [random_point() for _ in range(args.queries)]
+    brute_queries = queries[:max(args.queries // 20, 10)]
+
+    def brute_knn(lat, lng):
+        return heapq.nsmallest(args.k, ((haversine_km(lat, lng, c.lat, c.lng), c.name) for c in clinics))
+
+    def brute_radius(lat, lng):
+        return sorted(d for d in (haversine_km(lat, lng, c.lat, c.lng) for c in clinics) if d <= args.radius_km)
+
+    # Exactness check against brute force
+    for lat, lng in brute_queries[:50]:
+        assert [round(d, 9) for d, _ in index.nearest(lat, lng, args.k)] == \
+            [round(d, 9) for d, _ in brute_knn(lat, lng)]
+        assert [round(d, 9) for d, _ in index.within(lat, lng, args.radius_km)] == \
+            [round(d, 9) for d in brute_radius(lat, lng)]
+
+    print(f"{'query':<18} {'index us':>10} {'brute us':>12}")
+    print(f"{f'k={args.k} nearest':<18} {timed_us(lambda a, b: index.nearest(a, b, args.k), queries):>10.1f} "
+          f"{timed_us(brute_knn, brute_queries):>12.1f}")
+    print(f"{f'radius {args.radius_km:g} km':<18} {timed_us(lambda a, b: index.within(a, b, args.radius_km), queries):>10.1f} "
+          f"{timed_us(brute_radius, brute_queries):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_clinic_tiles.py
+"""
+Precomputed clinic tiles over synthetic clinics spread across Kenya: build
+time and sizes, then the server's per-request cost of a nearby-clinics
+query (index lookup + JSON encoding) vs. serving a pre-compressed tile vs.
+answering a revalidation with 304, and what the client pays to search a
+downloaded tile itself.
+
+Run from the backend directory:
+    python benchmarks/bench_clinic_tiles.py [--clinics 100000] [--precision 4]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.clinic_index import Clinic, ClinicIndex
+from services.clinic_tiles import ClinicTiles, respond
+from services.geo import geohash_encode, haversine_km
+
+# Rough bounding box of Kenya
+LAT_RANGE = (-4.7, 5.0)
+LNG_RANGE = (33.9, 41.9)
+
+
+def random_point() -> tuple:
+    return random.uniform(*LAT_RANGE), random.uniform(*LNG_RANGE)
+
+
+def timed_us(fn, queries: list) -> float:
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clinics", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--precision", type=int, default=4)
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    clinics = [Clinic(f"Clinic {i}", f"{i} Hospital Road, Town {i % 500}", *random_point(),
+                      rating=round(random.uniform(2.5, 5), 1), user_ratings_total=random.randint(0, 400),
+                      phone=f"+2547{random.randint(10000000, 99999999)}", facility_type="hospital")
+               for i in range(args.clinics)]
+    index = ClinicIndex(clinics)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tiles = ClinicTiles(precision=args.precision, directory=directory)
+        start = time.perf_counter()
+        built = tiles.build(clinics, {"bench": args.clinics})
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        assert ClinicTiles(precision=args.precision, directory=directory).load({"bench": args.clinics})
+        load_s = time.perf_counter() - start
+
+    raw = [len(gzip.decompress(t.gzip)) for t in tiles._tiles.values()]
+    gz = [len(t.gzip) for t in tiles._tiles.values()]
+    counts = [t.count for t in tiles._tiles.values()]
+    print(f"{built['clinics']} clinics -> {built['tiles']} tiles at precision {args.precision}: "
+          f"built in {build_s:.2f}s, reloaded from disk in {load_s:.2f}s")
+    print(f"per tile: median {statistics.median(counts):.0f} clinics, {statistics.median(raw) / 1024:.1f} KB JSON, "
+          f"{statistics.median(gz) / 1024:.1f} KB gzip; whole directory {sum(gz) / 1024 / 1024:.1f} MB gzip "
+          f"(vs {sum(raw) / 1024 / 1024:.1f} MB JSON)")
+    br = [len(t.brotli) for t in tiles._tiles.values() if t.brotli is not None]
+    if br:
+        print(f"brotli: median {statistics.median(br) / 1024:.1f} KB per tile")
+
+    queries = [random_point() for _ in range(args.queries)]
+    etags = {gh: t.etag for gh, t in tiles._tiles.items()}
+
+    def nearby(lat, lng):
+        found = index.within(lat, lng, args.radius_km)
+        return json.dumps({"clinics": [c.to_hospital(d) for d, c in found]})
+
+    def tile_200(lat, lng):
+        return respond(tiles.tile(geohash_encode(lat, lng, args.precision)), "gzip, deflate, br", None)
+
+    def tile_304(lat, lng):
+        gh = geohash_encode(lat, lng, args.precision)
+        return respond(tiles.tile(gh), "gzip, deflate, br", etags.get(gh, '"none"'))
+
+    print(f"\nserver cost per request ({args.queries} random points, {args.radius_km:.0f} km radius)")
+    print(f"{'request':<32} {'us/req':>9} {'bytes':>9}")
+    sizes = {
+        "nearby query (index + JSON)": statistics.mean(len(nearby(lat, lng)) for lat, lng in queries[:200]),
+        "tile, 200 pre-compressed": statistics.mean(len(tile_200(lat, lng)[2]) for lat, lng in queries[:200]),
+        "tile, 304 revalidation": 0,
+    }
+    for name, fn in (("nearby query (index + JSON)", nearby), ("tile, 200 pre-compressed", tile_200),
+                     ("tile, 304 revalidation", tile_304)):
+        print(f"{name:<32} {timed_us(fn, queries):>9.1f} {sizes[name]:>9.0f}")
+
+    # The client: decompress and parse a tile once, then filter by distance locally for each query
+    lat, lng = queries[0]
+    body = tile_200(lat, lng)[2]
+    start = time.perf_counter()
+    tile = json.loads(gzip.decompress(body))
+    parse_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(100):
+        sorted((haversine_km(lat, lng, row[2], row[3]), row[0]) for row in tile["clinics"]
+               if haversine_km(lat, lng, row[2], row[3]) <= args.radius_km)
+    query_ms = (time.perf_counter() - start) / 100 * 1000
+    print(f"\nclient: parse a {len(body) / 1024:.1f} KB tile in {parse_ms:.2f} ms, "
+          f"then a local radius query over {len(tile['clinics'])} clinics in {query_ms:.2f} ms (no network)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_context_window.py
+"""
+LLM request payload size and latency from turn 1 to turn 200, sending the
+full session history (old behaviour) vs. the token-budgeted context window.
+
+Run from the backend directory:
+    python benchmarks/bench_context_window.py [--turns 200] [--e2e]
+
+--e2e also sends every payload through the LLM client to a local stub whose
+latency grows with request size (needs httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.context_window import ContextManager
+from services.session_store import MemorySessionStore, ROLES, pack_message
+
+SYSTEM_PROMPT = "You are a maternal health assistant. Provide empathetic, safe guidance."
+REPORT_TURNS = {1, 10, 25, 50, 100, 150, 200}
+
+
+def full_history(session: dict) -> list:
+    """The original per-turn rebuild over every message in the session."""
+    return [{"role": ROLES[role], "content": content} for role, _, content in session["messages"]]
+
+
+def sentence(words: int) -> str:
+    vocab = ["baby", "pain", "food", "sleep", "clinic", "week", "water", "tired", "walk", "doctor"]
+    return " ".join(random.choices(vocab, k=words))
+
+
+async def run(args):
+    store = MemorySessionStore()
+    manager = ContextManager(SYSTEM_PROMPT, budget=args.budget, pin_recent=args.pin_recent)
+    store.create("bench", "patient", [pack_message("system", SYSTEM_PROMPT)], {})
+    session = store.get("bench")
+
+    client = stub = None
+    if args.e2e:
+        from benchmarks.stubs import StubServer
+        from services.llm_client import LLMClient, LLMProvider
+        stub = StubServer(latency=0.05, latency_per_kb=0.01).start()
+        client = LLMClient([LLMProvider("stub", stub.url, "stub-key", "stub-model")], hedging=False)
+
+    print(f"{'turn':>5} {'full KB':>8} {'window KB':>10} {'full us':>8} {'window us':>10}"
+          + (f" {'full ms':>8} {'window ms':>10}" if args.e2e else ""))
+    for turn in range(1, args.turns + 1):
+        user_text = sentence(random.randint(10, 40))
+
+        start = time.perf_counter()
+        windowed = json.dumps(manager.add("bench", session, "user", user_text))
+        window_us = (time.perf_counter() - start) * 1e6
+        store.append("bench", session, pack_message("user", user_text))
+
+        start = time.perf_counter()
+        full = json.dumps(full_history(session))
+        full_us = (time.perf_counter() - start) * 1e6
+
+        line = f"{turn:>5} {len(full) / 1024:>8.1f} {len(windowed) / 1024:>10.1f} {full_us:>8.0f} {window_us:>10.0f}"
+        if client and turn in REPORT_TURNS:
+            timings = []
+            for payload in (full, windowed):
+                start = time.perf_counter()
+                await client.complete(json.loads(payload))
+                timings.append((time.perf_counter() - start) * 1000)
+            line += f" {timings[0]:>8.1f} {timings[1]:>10.1f}"
+        if turn in REPORT_TURNS:
+            print(line)
+
+        reply = sentence(random.randint(40, 120))
+        manager.add("bench", session, "assistant", reply)
+        store.append("bench", session, pack_message("assistant", reply))
+        # Let the background fold run, as it would between requests
+        await asyncio.sleep(0)
+
+    if client:
+        await client.aclose()
+        stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--pin-recent", type=int, default=6)
+    parser.add_argument("--e2e", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
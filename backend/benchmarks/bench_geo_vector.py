@@ -0,0 +1,89 @@
+# benchmarks/bench_geo_vector.py
+"""
+Scalar haversine + full sort (the original GoogleMapsService loop) vs. the
+NumPy batch path (one vectorized distance pass + argpartition top-k), for
+one query over many candidates and for a batch of query points.
+
+Run from the backend directory (needs numpy for the vectorized numbers):
+    python benchmarks/bench_geo_vector.py [--k 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from math import radians, cos, sin, asin, sqrt
+
+from services.geo import NUMPY_AVAILABLE, as_coords, nearest_k, nearest_k_batch
+
+
+def scalar_distance(lat1, lon1, lat2, lon2):
+    """GoogleMapsService._haversine_distance, copied as the baseline."""
+    R = 6371
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * asin(sqrt(a))
+    return round(R * c, 2)
+
+
+def scalar_rank(lat, lng, lats, lngs, k):
+    """The original per-place loop followed by a lambda sort."""
+    ranked = [{"i": i, "distance_km": scalar_distance(lat, lng, a, b)} for i, (a, b) in enumerate(zip(lats, lngs))]
+    ranked.sort(key=lambda h: h["distance_km"])
+    return ranked[:k]
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not NUMPY_AVAILABLE:
+        print("numpy not installed - the batch path falls back to plain Python")
+
+    print(f"{'candidates':>10} {'scalar ms':>10} {'batch ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        lats = [random.uniform(-4.7, 5.0) for _ in range(size)]
+        lngs = [random.uniform(33.9, 41.9) for _ in range(size)]
+        arr_lats, arr_lngs = as_coords(lats), as_coords(lngs)
+        scalar = best_of(lambda: scalar_rank(-1.29, 36.82, lats, lngs, args.k))
+        batch = best_of(lambda: nearest_k(-1.29, 36.82, arr_lats, arr_lngs, args.k))
+        print(f"{size:>10} {scalar * 1000:>10.2f} {batch * 1000:>9.2f} {scalar / batch:>7.1f}x")
+
+    size = 10000
+    lats = [random.uniform(-4.7, 5.0) for _ in range(size)]
+    lngs = [random.uniform(33.9, 41.9) for _ in range(size)]
+    q_lats = [random.uniform(-4.7, 5.0) for _ in range(args.queries)]
+    q_lngs = [random.uniform(33.9, 41.9) for _ in range(args.queries)]
+    arr_lats, arr_lngs = as_coords(lats), as_coords(lngs)
+
+    scalar = best_of(lambda: [scalar_rank(a, b, lats, lngs, args.k) for a, b in zip(q_lats, q_lngs)], repeat=1)
+    batch = best_of(lambda: nearest_k_batch(q_lats, q_lngs, arr_lats, arr_lngs, args.k), repeat=3)
+    print(f"\n{args.queries} query points x {size} clinics: scalar {scalar * 1000:.0f} ms, "
+          f"batch {batch * 1000:.1f} ms ({scalar / batch:.0f}x)")
+
+    # Sanity: both paths agree
+    expected = [round(h["distance_km"], 2) for h in scalar_rank(q_lats[0], q_lngs[0], lats, lngs, args.k)]
+    _, got = nearest_k(q_lats[0], q_lngs[0], arr_lats, arr_lngs, args.k)
+    assert expected == [round(d, 2) for d in got]
+
+
+if __name__ == "__main__":
+    main()
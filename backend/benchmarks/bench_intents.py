@@ -0,0 +1,149 @@
+# benchmarks/bench_intents.py
+"""
+Offline (rule-based) chat replies: the old chain of `any(... in message)`
+scans vs. the indexed intent classifier. Reports agreement on English
+messages, cost per message, how each scales with the number of intents,
+and end-to-end chat throughput with every LLM provider down.
+
+Run from the backend directory:
+    python benchmarks/bench_intents.py [--messages 20000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Outage: no provider keys, so the chat chain goes straight to the rule-based reply.
+# No database either: chat turns would otherwise be written to the Supabase project in .env
+os.environ["MISTRAL_API_KEY"] = ""
+os.environ["AI_ML_API_KEY"] = ""
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_SERVICE_KEY"] = ""
+
+from agents import chat_agent
+from agents.intent_classifier import IntentClassifier, intent_classifier
+from agents.normalizer import normalizer
+
+ENGLISH = [
+    "I'm bleeding and scared", "my water broke an hour ago", "I have severe pain in my belly",
+    "I have cramps at night", "my back is sore", "what food should I eat",
+    "which vitamins are safe", "can I exercise in the third trimester", "is yoga okay",
+    "I just found out I'm pregnant", "the baby is moving a lot", "where is the nearest hospital",
+    "can you find a clinic", "hello", "thank you", "what is a good diet for pregnancy"
+]
+SWAHILI = [
+    "natokwa na damu", "maji yamevunjika", "nina maumivu ya tumbo", "nile chakula gani",
+    "naweza kufanya mazoezi", "nina mimba ya miezi mitano", "hospitali iko wapi karibu nami", "habari"
+]
+
+
+def legacy_response(message: str) -> str:
+    """The rule-based responder before the intent classifier."""
+    message_lower = message.lower()
+    emergency_keywords = ['emergency', 'urgent', 'severe pain', 'bleeding', 'contractions', 'water broke']
+    if any(keyword in message_lower for keyword in emergency_keywords):
+        return "emergency"
+    if any(symptom in message_lower for symptom in ['pain', 'ache', 'cramp', 'discomfort']):
+        return "discomfort"
+    if any(nutrition in message_lower for nutrition in ['food', 'eat', 'diet', 'nutrition', 'vitamin']):
+        return "nutrition"
+    if any(exercise in message_lower for exercise in ['exercise', 'workout', 'fitness', 'activity']):
+        return "exercise"
+    if any(preg in message_lower for preg in ['pregnant', 'pregnancy', 'baby', 'fetus']):
+        return "pregnancy"
+    if any(location in message_lower for location in ['hospital', 'clinic', 'doctor', 'near me', 'nearby']):
+        return "find_care"
+    return "fallback"
+
+
+def legacy_scan(rules, message: str) -> str:
+    """First-match-wins over N intents, as the old responder would grow."""
+    message_lower = message.lower()
+    for name, keywords in rules:
+        if any(keyword in message_lower for keyword in keywords):
+            return name
+    return "fallback"
+
+
+def synthetic(n: int):
+    """n intents of five made-up keywords each, plus a fallback."""
+    intents = [
+        {"name": f"intent{i}", "keywords": {"en": [f"kw{i}x{j}" for j in range(5)]}, "responses": {"en": f"reply {i}"}}
+        for i in range(n)
+    ]
+    intents.append({"name": "fallback", "keywords": {}, "responses": {"en": "fallback"}})
+    rules = [(spec["name"], spec["keywords"]["en"]) for spec in intents[:-1]]
+    return IntentClassifier({"intents": intents}), rules
+
+
+def us_per_call(fn, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def unique(messages, count: int):
+    # Distinct texts, so the normalizer cache doesn't flatter the classifier
+    return [f"{messages[i % len(messages)]} {i}" for i in range(count)]
+
+
+async def outage_throughput(count: int, concurrency: int) -> float:
+    sessions = [chat_agent.initialize_chat(f"patient-{i}")["session_id"] for i in range(concurrency)]
+    messages = unique(ENGLISH + SWAHILI, count)
+
+    async def client(k: int):
+        for i in range(k, count, concurrency):
+            await chat_agent.chat_with_agent(sessions[k], messages[i])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(k) for k in range(concurrency)))
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print("Agreement with the old responder (English):")
+    for message in ENGLISH:
+        old = legacy_response(message)
+        new = intent_classifier.classify(message)[0].name
+        mark = "  " if old == new else "≠ "
+        print(f"  {mark}{message!r:<45} old={old:<11} new={new}")
+    print("Swahili (old responder: always fallback):")
+    for message in SWAHILI:
+        intent, language = intent_classifier.classify(message)
+        print(f"    {message!r:<45} new={intent.name:<11} reply={language}")
+
+    messages = unique(ENGLISH + SWAHILI, args.messages)
+    normalizer.normalize.cache_clear()
+    print(f"\nPer message ({len(messages)} distinct):")
+    print(f"  old any() chain:     {us_per_call(legacy_response, messages):>7.2f} us")
+    print(f"  intent classifier:   {us_per_call(intent_classifier.respond, messages):>7.2f} us (uncached)")
+    # In the chat endpoint wants_nearby_care() has already normalized the message
+    repeated = (ENGLISH + SWAHILI) * (len(messages) // len(ENGLISH + SWAHILI))
+    print(f"  intent classifier:   {us_per_call(intent_classifier.respond, repeated):>7.2f} us (normalization cached)")
+
+    print("\nScaling with the number of intents (us/message, uncached):")
+    print(f"  {'intents':>8} {'linear scan':>12} {'index':>8}")
+    for n in (6, 60, 600, 6000):
+        classifier, rules = synthetic(n)
+        sample = unique([f"please help kw{n - 1}x3", "nothing relevant here"], 2000)
+        normalizer.normalize.cache_clear()
+        scan = us_per_call(lambda m: legacy_scan(rules, m), sample)
+        indexed = us_per_call(classifier.respond, sample)
+        print(f"  {n:>8} {scan:>12.1f} {indexed:>8.1f}")
+
+    normalizer.normalize.cache_clear()
+    rate = asyncio.run(outage_throughput(args.messages // 4, args.concurrency))
+    print(f"\nOutage, chat_with_agent end to end ({args.concurrency} concurrent sessions): {rate:,.0f} replies/s")
+
+
+if __name__ == "__main__":
+    main()
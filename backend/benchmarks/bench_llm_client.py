@@ -0,0 +1,108 @@
+# benchmarks/bench_llm_client.py
+"""
+Exercise the pooled, hedged LLM client against local stub providers:
+connection reuse, hedged fallback when the primary is slow, the circuit
+breaker skipping a dead primary, and time to first token when streaming.
+
+Run from the backend directory:
+    python benchmarks/bench_llm_client.py [--requests 200] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubServer
+from services.llm_client import LLMClient, LLMProvider
+
+MESSAGES = [{"role": "user", "content": "What should I eat in my third trimester?"}]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * pct) - 1, 0)]
+
+
+async def drive(client: LLMClient, total: int, concurrency: int) -> list:
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            await client.complete(MESSAGES)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    await client.aclose()
+    return latencies
+
+
+def scenario(name: str, primary: StubServer, fallback: StubServer, args, **client_kwargs):
+    client = LLMClient(
+        [
+            LLMProvider("primary", primary.url, "stub-key", "stub-model", timeout=args.timeout),
+            LLMProvider("fallback", fallback.url, "stub-key", "stub-model", timeout=args.timeout),
+        ],
+        **client_kwargs
+    )
+    primary.requests = fallback.requests = primary.connections = fallback.connections = 0
+    start = time.perf_counter()
+    latencies = asyncio.run(drive(client, args.requests, args.concurrency))
+    wall = time.perf_counter() - start
+    print(
+        f"{name:<34} p50={percentile(latencies, 0.50) * 1000:7.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:7.1f}ms wall={wall:6.2f}s "
+        f"primary={primary.requests}/{primary.connections}conn "
+        f"fallback={fallback.requests}/{fallback.connections}conn"
+    )
+
+
+async def first_token_vs_full(client: LLMClient) -> tuple:
+    start = time.perf_counter()
+    first = None
+    async for _ in client.stream(MESSAGES):
+        if first is None:
+            first = time.perf_counter() - start
+    full = time.perf_counter() - start
+    await client.aclose()
+    return first, full
+
+
+def streaming(args):
+    reply = " ".join(["word"] * 40)
+    stub = StubServer(latency=0.2, token_delay=0.02, reply=reply).start()
+    try:
+        client = LLMClient([LLMProvider("primary", stub.url, "stub-key", "stub-model", timeout=args.timeout)])
+        first, full = asyncio.run(first_token_vs_full(client))
+        print(f"{'streaming, 40 tokens':<34} first token={first * 1000:7.1f}ms full reply={full * 1000:7.1f}ms")
+    finally:
+        stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    fast = StubServer(latency=0.05).start()
+    slow = StubServer(latency=1.5).start()
+    dead = StubServer(failure_rate=1.0).start()
+    try:
+        scenario("healthy primary", fast, fast, args)
+        scenario("slow primary, sequential fallback", slow, fast, args, hedging=False)
+        scenario("slow primary, hedged at 200ms", slow, fast, args, hedge_delay=0.2)
+        scenario("dead primary, circuit breaker", dead, fast, args)
+    finally:
+        for stub in (fast, slow, dead):
+            stub.stop()
+    streaming(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# benchmarks/bench_load.py
+"""
+Load test for the API. Boots `main.app` in-process (httpx ASGI transport)
+against local stubs for Mistral, AI/ML, Google Places/Geocoding and
+Supabase, then replays mixed traffic over /api/analyze-symptoms,
+/api/chat/message, /api/nearby-clinics and /api/geocode/{address}.
+
+Each scenario sets the stubs' injected latency and failure rate and runs
+`concurrency` closed-loop clients for `--duration` seconds. Reported per
+scenario: throughput, p50/p95/p99 latency (overall and per endpoint),
+status codes, provider calls and RSS. Results are written as JSON; pass a
+previous run with --compare to flag regressions (exit status 1).
+
+Run from the backend directory (needs the app's requirements):
+    python benchmarks/bench_load.py [--scenarios baseline llm_outage] [--duration 20]
+        [--out results.json] [--compare previous.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import GooglePlacesStub, PostgRESTStub, StubServer
+
+# Endpoint weights, client count and per-stub (latency s, failure rate)
+SCENARIOS = {
+    "baseline": {
+        "mix": {"triage": 40, "chat": 30, "nearby": 20, "geocode": 10},
+        "concurrency": 50,
+        "stubs": {"mistral": (0.3, 0.0), "ai_ml": (0.4, 0.0), "places": (0.15, 0.0), "supabase": (0.02, 0.0)}
+    },
+    "chat_heavy": {
+        "mix": {"triage": 10, "chat": 80, "nearby": 10},
+        "concurrency": 100,
+        "stubs": {"mistral": (0.3, 0.0), "ai_ml": (0.4, 0.0), "places": (0.15, 0.0), "supabase": (0.02, 0.0)}
+    },
+    "triage_burst": {
+        "mix": {"triage": 100},
+        "concurrency": 200,
+        "stubs": {"mistral": (0.3, 0.0), "ai_ml": (0.4, 0.0), "places": (0.15, 0.0), "supabase": (0.02, 0.0)}
+    },
+    "llm_degraded": {
+        "mix": {"triage": 40, "chat": 30, "nearby": 20, "geocode": 10},
+        "concurrency": 50,
+        "stubs": {"mistral": (0.8, 0.3), "ai_ml": (0.6, 0.1), "places": (0.15, 0.0), "supabase": (0.02, 0.0)}
+    },
+    "llm_outage": {
+        "mix": {"triage": 30, "chat": 60, "nearby": 10},
+        "concurrency": 100,
+        "stubs": {"mistral": (0.05, 1.0), "ai_ml": (0.05, 1.0), "places": (0.15, 0.0), "supabase": (0.02, 0.0)}
+    },
+    "maps_outage": {
+        "mix": {"chat": 20, "nearby": 60, "geocode": 20},
+        "concurrency": 50,
+        "stubs": {"mistral": (0.3, 0.0), "ai_ml": (0.4, 0.0), "places": (1.0, 1.0), "supabase": (0.02, 0.0)}
+    },
+    "database_outage": {
+        "mix": {"chat": 100},
+        "concurrency": 50,
+        "stubs": {"mistral": (0.3, 0.0), "ai_ml": (0.4, 0.0), "places": (0.15, 0.0), "supabase": (0.02, 1.0)}
+    }
+}
+
+CHAT_MESSAGES = [
+    "What should I eat during pregnancy?", "Is it safe to exercise while pregnant?",
+    "What are the danger signs in pregnancy?", "How often should I go to the clinic?",
+    "Nile chakula gani nikiwa mjamzito?", "Can I drink coffee while pregnant?",
+    "I have a headache and blurred vision", "nina homa kali", "When will I feel the baby move?",
+    "Is there a hospital near me?", "hospitali iko wapi karibu nami?"
+]
+TOWNS = [(-1.2921, 36.8219), (-0.0917, 34.7680), (-4.0435, 39.6682), (0.5143, 35.2698), (-0.3031, 36.0800)]
+ADDRESSES = ["Kenyatta National Hospital, Nairobi", "Moi Avenue, Mombasa", "Oginga Odinga Street, Kisumu",
+             "Uganda Road, Eldoret", "Kenyatta Avenue, Nakuru", "Pumwani, Nairobi"]
+
+
+def load_triage_texts():
+    with open(os.path.join(BACKEND_DIR, "benchmarks", "data", "triage_corpus.jsonl")) as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"count": len(ordered), "mean": round(statistics.mean(ordered), 2),
+            "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1], 2)}
+
+
+def start_stubs() -> dict:
+    stubs = {
+        "mistral": StubServer(reply="Eat a balanced diet with fruit, vegetables and protein.").start(),
+        "ai_ml": StubServer(reply="Stub Hospital A - 1 Stub Road\nStub Clinic B - 2 Stub Lane").start(),
+        "places": GooglePlacesStub().start(),
+        "supabase": PostgRESTStub().start()
+    }
+    os.environ.update(
+        MISTRAL_API_KEY="stub", MISTRAL_API_URL=stubs["mistral"].url,
+        AI_ML_API_KEY="stub", AI_ML_API_URL=stubs["ai_ml"].url,
+        GOOGLE_MAPS_API_KEY="AIzaStubKey", GOOGLE_MAPS_BASE_URL=stubs["places"].base_url,
+        SUPABASE_URL=stubs["supabase"].base_url, SUPABASE_SERVICE_KEY="stub",
+        SUPABASE_SPILL_PATH=os.path.join(tempfile.mkdtemp(prefix="bench-load-"), "spill.jsonl"),
+        VOICE_WARMUP="0", TTS_ENGINE="tone"
+    )
+    # Request logs go to stdout; keep a trickle so their cost is still paid
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0.01")
+    return stubs
+
+
+class Traffic:
+    """Seeded request generator for one scenario's endpoint mix."""
+
+    def __init__(self, mix: dict, seed: int):
+        self.rng = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.triage_texts = load_triage_texts()
+        self.sessions = deque(maxlen=1000)
+
+    def _point(self):
+        lat, lng = self.rng.choice(TOWNS)
+        return lat + self.rng.uniform(-0.05, 0.05), lng + self.rng.uniform(-0.05, 0.05)
+
+    def next(self):
+        """(endpoint label, method, path, json body)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        patient_id = f"patient_{self.rng.randrange(1000)}"
+        if kind == "triage":
+            return kind, "POST", "/api/analyze-symptoms", {
+                "patient_id": patient_id, "symptom_text": self.rng.choice(self.triage_texts)
+            }
+        if kind == "chat":
+            lat, lng = self._point()
+            body = {"patient_id": patient_id, "message": self.rng.choice(CHAT_MESSAGES), "latitude": lat, "longitude": lng}
+            # Half the chats continue an earlier conversation
+            if self.sessions and self.rng.random() < 0.5:
+                body["session_id"] = self.rng.choice(self.sessions)
+            return kind, "POST", "/api/chat/message", body
+        if kind == "nearby":
+            lat, lng = self._point()
+            return kind, "POST", "/api/nearby-clinics", {
+                "latitude": lat, "longitude": lng, "radius": self.rng.choice([2000, 5000, 10000])
+            }
+        address = self.rng.choice(ADDRESSES)
+        if self.rng.random() < 0.3:
+            address = address.upper()
+        return kind, "GET", f"/api/geocode/{quote(address)}", None
+
+
+def configure_stubs(stubs: dict, settings: dict, latency_scale: float):
+    for name, (latency, failure_rate) in settings.items():
+        stubs[name].latency = latency * latency_scale
+        stubs[name].failure_rate = failure_rate
+
+
+def reset_app_state(app_module):
+    """Fresh caches and closed circuit breakers, so scenarios don't inherit each other's state."""
+    from agents import chat_agent
+    for provider in chat_agent.llm_client.providers:
+        provider.breaker.failures = 0
+        provider.breaker.opened_at = None
+    chat_agent.reply_cache.invalidate()
+    if app_module.get_google_maps_service.loaded:
+        maps = app_module.get_google_maps_service()
+        maps.nearby_cache.invalidate()
+        maps.geocode_cache.invalidate()
+
+
+async def run_scenario(app_module, name: str, spec: dict, stubs: dict, args) -> dict:
+    import httpx
+
+    configure_stubs(stubs, spec["stubs"], args.latency_scale)
+    if not args.warm:
+        reset_app_state(app_module)
+    traffic = Traffic(spec["mix"], seed=args.seed)
+    concurrency = args.concurrency or spec["concurrency"]
+    latencies = {kind: [] for kind in spec["mix"]}
+    statuses = {}
+    calls_before = {stub_name: stub.requests for stub_name, stub in stubs.items()}
+    rss_start = rss_peak = rss_mb()
+    deadline = time.monotonic() + args.duration
+
+    async def client(http):
+        while time.monotonic() < deadline:
+            kind, method, path, body = traffic.next()
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, path, json=body)
+                status = str(response.status_code)
+                if kind == "chat" and response.status_code == 200:
+                    traffic.sessions.append(response.json()["session_id"])
+            except Exception as e:
+                status = type(e).__name__
+            latencies[kind].append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def sample_rss():
+        nonlocal rss_peak
+        while time.monotonic() < deadline:
+            rss_peak = max(rss_peak, rss_mb())
+            await asyncio.sleep(0.1)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as http:
+        started = time.perf_counter()
+        await asyncio.gather(sample_rss(), *(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(every),
+        "throughput_rps": round(len(every) / elapsed, 1),
+        "statuses": statuses,
+        "latency_ms": dict({"all": percentiles(every)}, **{kind: percentiles(s) for kind, s in latencies.items()}),
+        "provider_calls": {stub_name: stub.requests - calls_before[stub_name] for stub_name, stub in stubs.items()},
+        "rss_mb": {"start": round(rss_start, 1), "peak": round(max(rss_peak, rss_mb()), 1), "end": round(rss_mb(), 1)},
+        "stubs": spec["stubs"]
+    }
+
+
+def print_table(results):
+    print(f"{'scenario':<16} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'non-2xx':>8} {'rss MB':>8}")
+    for r in results:
+        all_ = r["latency_ms"]["all"]
+        errors = sum(n for status, n in r["statuses"].items() if not status.startswith("2"))
+        print(f"{r['scenario']:<16} {r['concurrency']:>5} {r['throughput_rps']:>8.1f} {all_.get('p50', 0):>8.1f} "
+              f"{all_.get('p95', 0):>8.1f} {all_.get('p99', 0):>8.1f} {errors:>8} {r['rss_mb']['peak']:>8.1f}")
+        for kind, stats in r["latency_ms"].items():
+            if kind != "all" and stats["count"]:
+                print(f"  {kind:<14} {'':>5} {stats['count'] / r['duration_s']:>8.1f} {stats['p50']:>8.1f} "
+                      f"{stats['p95']:>8.1f} {stats['p99']:>8.1f}")
+
+
+def compare(previous: dict, results, tolerance: float) -> list:
+    """Regressions against an earlier run: throughput down or p95/p99 up by more than `tolerance`."""
+    before = {r["scenario"]: r for r in previous["scenarios"]}
+    regressions = []
+    for r in results:
+        old = before.get(r["scenario"])
+        if old is None:
+            continue
+        if r["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{r['scenario']}: throughput {old['throughput_rps']} -> {r['throughput_rps']} req/s")
+        for q in ("p95", "p99"):
+            was, now = old["latency_ms"]["all"].get(q), r["latency_ms"]["all"].get(q)
+            if was and now and now > was * (1 + tolerance):
+                regressions.append(f"{r['scenario']}: {q} {was} -> {now} ms")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run(args, stubs):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        import main as app_module
+        results = []
+        for name in args.scenarios:
+            results.append(await run_scenario(app_module, name, SCENARIOS[name], stubs, args))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, help="override every scenario's client count")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every stub latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="keep caches and breakers between scenarios")
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="show the app's own output")
+    args = parser.parse_args()
+
+    stubs = start_stubs()
+    try:
+        results = asyncio.run(run(args, stubs))
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "verbose")},
+        "scenarios": results
+    }
+    print_table(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for line in regressions:
+            print(f"⚠️ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
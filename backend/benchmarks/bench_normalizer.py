@@ -0,0 +1,86 @@
+# benchmarks/bench_normalizer.py
+"""
+Triage accuracy on a labelled English/Swahili/Sheng corpus with and without
+the text normalizer, and the normalizer's cost per message.
+
+Run from the backend directory:
+    python benchmarks/bench_normalizer.py [--verbose]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.normalizer import normalize, normalizer
+from agents.triage_agent import triage_agent
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "triage_corpus.jsonl")
+
+
+def english_only(text: str) -> str:
+    """Triage with the keyword regex alone (the behaviour before normalization)."""
+    conditions = {
+        condition
+        for match in triage_agent._pattern.finditer(text.lower())
+        if match.lastgroup == "keyword"
+        for condition in triage_agent._keyword_conditions[" ".join(match.group("keyword").split())]
+    }
+    if not conditions:
+        return "no_urgent_issue_detected"
+    return max(conditions, key=triage_agent._rank.__getitem__)
+
+
+def triage_uncached(text: str):
+    normalizer.normalize.cache_clear()
+    return triage_agent.analyze_symptoms(text, {})
+
+
+def per_message_us(fn, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(CORPUS) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    totals, before, after = Counter(), Counter(), Counter()
+    for item in corpus:
+        language = item["language"]
+        totals[language] += 1
+        old = english_only(item["text"])
+        new = triage_agent.analyze_symptoms(item["text"], {})["condition"]
+        before[language] += old == item["condition"]
+        after[language] += new == item["condition"]
+        if args.verbose and new != item["condition"]:
+            print(f"  miss: {item['text']!r} -> {new} (expected {item['condition']})")
+
+    print(f"{'language':<8} {'n':>4} {'english-only':>13} {'normalized':>11}")
+    for language in sorted(totals):
+        n = totals[language]
+        print(f"{language:<8} {n:>4} {before[language] / n:>12.0%} {after[language] / n:>11.0%}")
+    n = sum(totals.values())
+    print(f"{'all':<8} {n:>4} {sum(before.values()) / n:>12.0%} {sum(after.values()) / n:>11.0%}")
+
+    texts = [item["text"] for item in corpus]
+    print(f"\nnormalize, uncached:   {per_message_us(normalizer._normalize, texts, args.repeat):>6.1f} us/message")
+    print(f"normalize, cached:     {per_message_us(normalize, texts, args.repeat):>6.1f} us/message")
+    print(f"triage, english-only:  {per_message_us(english_only, texts, args.repeat):>6.1f} us/message")
+    print(f"triage, normalized:    {per_message_us(lambda t: triage_agent.analyze_symptoms(t, {}), texts, args.repeat):>6.1f} us/message")
+    print(f"triage, uncached:      {per_message_us(triage_uncached, texts, args.repeat):>6.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_patient_store.py
+"""
+Load time, lookup latency and RSS of the patient store at 10k/100k/1M records,
+for both the JSON object layout and the memory-mapped line-delimited layout.
+Each case runs in a fresh subprocess so RSS numbers don't bleed together.
+
+Run from the backend directory:
+    python benchmarks/bench_patient_store.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def record(i: int) -> dict:
+    return {
+        "patient_id": f"patient_{i}",
+        "name": f"Patient {i}",
+        "gestational_age_weeks": 8 + i % 32,
+        "known_conditions": ["mild_anemia"] if i % 7 == 0 else [],
+        "language": "sw" if i % 3 else "en",
+        "phone_number": f"+2547{i:08d}"
+    }
+
+
+def write_dataset(directory: str, size: int, fmt: str) -> str:
+    path = os.path.join(directory, f"patients_{size}.{fmt}")
+    if os.path.exists(path):
+        return path
+    with open(path, "w") as f:
+        if fmt == "json":
+            json.dump({f"patient_{i}": record(i) for i in range(size)}, f)
+        else:
+            for i in range(size):
+                f.write(json.dumps(record(i)) + "\n")
+    return path
+
+
+def run_case(path: str, size: int, lookups: int) -> dict:
+    from services.patient_store import PatientStore
+
+    baseline = rss_mb()
+    store = PatientStore(path, check_interval=3600)
+    start = time.perf_counter()
+    len(store)
+    load_s = time.perf_counter() - start
+
+    ids = [f"patient_{random.randrange(size)}" for _ in range(lookups)]
+    start = time.perf_counter()
+    for patient_id in ids:
+        store.get(patient_id)
+    lookup_us = (time.perf_counter() - start) / lookups * 1e6
+
+    return {"load_s": load_s, "lookup_us": lookup_us, "rss_mb": rss_mb() - baseline}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "sauti_bench"))
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        path, size = args.case.rsplit(":", 1)
+        print(json.dumps(run_case(path, int(size), args.lookups)))
+        return
+
+    os.makedirs(args.dir, exist_ok=True)
+    print(f"{'records':>9} {'format':>6} {'load s':>8} {'lookup us':>10} {'rss MB':>8}")
+    for size in args.sizes:
+        for fmt in ("json", "jsonl"):
+            path = write_dataset(args.dir, size, fmt)
+            out = subprocess.run(
+                [sys.executable, __file__, "--case", f"{path}:{size}", "--lookups", str(args.lookups)],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{size:>9} {fmt:>6} {r['load_s']:>8.3f} {r['lookup_us']:>10.2f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_reply_cache.py
+"""
+First-turn chat traffic against a stub LLM with the reply cache off,
+exact-match only, and with near-duplicate matching. Reports hit rate,
+provider calls, latency and provider time saved, and how many
+triage-flagged messages bypassed the cache (all of them should).
+
+Run from the backend directory (needs httpx):
+    python benchmarks/bench_reply_cache.py [--chats 600] [--llm-ms 300]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No database: chat turns would otherwise be written to the Supabase project in .env
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_SERVICE_KEY"] = ""
+
+from agents import chat_agent
+from agents.reply_cache import ReplyCache
+from benchmarks.stubs import StubServer
+from services.llm_client import LLMClient, LLMProvider
+
+# Common first-turn questions, each with the ways people actually type it
+COMMON = [
+    ["What should I eat during pregnancy?", "what should i eat during pregnancy", "What should I eat in pregnancy?",
+     "what shud i eat during pregnancy", "What should I eat during my pregnancy?"],
+    ["Is it safe to exercise while pregnant?", "is it safe to exercise while pregnant", "Is exercise safe while pregnant?",
+     "is it safe to exercise when pregnant?"],
+    ["What are the danger signs in pregnancy?", "what are danger signs in pregnancy", "What are the danger signs of pregnancy?"],
+    ["How often should I go to the clinic?", "how often should i go to clinic", "How often should I visit the clinic?"],
+    ["Can I drink coffee while pregnant?", "can i drink coffee while pregnant?", "Can I drink coffee during pregnancy?"],
+    ["Nile chakula gani nikiwa mjamzito?", "nile chakula gani nikiwa mjamzito", "Nile vyakula gani nikiwa mjamzito?"],
+    ["Ni mazoezi gani salama kwa mama mjamzito?", "ni mazoezi gani salama kwa mjamzito"],
+    ["When will I feel the baby move?", "when will i feel the baby move", "When will I feel my baby move?"],
+    ["How much weight should I gain?", "how much weight should i gain during pregnancy"],
+    ["Is it normal to feel tired all the time?", "is it normal to feel tired all the time"],
+]
+# Flagged by the triage rules: must always reach the provider
+RISKY = [
+    "I have a headache and blurred vision", "I am bleeding a little", "nina homa kali", "my feet are swollen",
+    "I feel hot and have chills", "kuna damu kidogo",
+]
+
+
+def workload(chats: int, risky_share: float, seed: int = 7):
+    rng = random.Random(seed)
+    # Zipf-like popularity across the common questions
+    weights = [1 / (rank + 1) for rank in range(len(COMMON))]
+    messages = []
+    for _ in range(chats):
+        if rng.random() < risky_share:
+            messages.append((rng.choice(RISKY), True))
+        else:
+            variants = rng.choices(COMMON, weights)[0]
+            messages.append((rng.choice(variants), False))
+    return messages
+
+
+async def run_mode(name: str, cache: ReplyCache, messages, stub: StubServer, concurrency: int):
+    chat_agent.reply_cache = cache
+    before = stub.requests
+    latencies = []
+    queue = list(messages)
+
+    async def client():
+        while queue:
+            message, _ = queue.pop()
+            session_id = chat_agent.initialize_chat("bench")["session_id"]
+            start = time.perf_counter()
+            await chat_agent.chat_with_agent(session_id, message)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = cache.metrics()
+    latencies.sort()
+    print(f"{name:<12} {stats['hit_ratio'] if stats['hit_ratio'] is not None else 0:>8.1%} "
+          f"{stub.requests - before:>10} {statistics.mean(latencies):>9.1f} "
+          f"{latencies[int(len(latencies) * 0.5)]:>8.1f} {stats['saved_seconds']:>10.1f} "
+          f"{stats['bypassed']:>9} {len(messages) / elapsed:>8.0f}")
+
+
+async def run(args):
+    stub = StubServer(latency=args.llm_ms / 1000, reply="Eat a balanced diet with fruit, vegetables and protein.").start()
+    chat_agent.llm_client = LLMClient([LLMProvider("stub", stub.url, "stub-key", "stub-model")], hedging=False)
+    messages = workload(args.chats, args.risky)
+    flagged = sum(risky for _, risky in messages)
+
+    # Every flagged message must bypass the cache (bypassed == flagged) and so reach the provider
+    print(f"{args.chats} first-turn chats, {flagged} triage-flagged, LLM stub {args.llm_ms} ms, "
+          f"{args.concurrency} concurrent")
+    print(f"{'cache':<12} {'hit rate':>8} {'llm calls':>10} {'mean ms':>9} {'p50 ms':>8} "
+          f"{'saved s':>10} {'bypassed':>9} {'chats/s':>8}")
+    await run_mode("off", ReplyCache(max_entries=0), messages, stub, args.concurrency)
+    await run_mode("exact", ReplyCache(similarity=0), messages, stub, args.concurrency)
+    await run_mode("similar", ReplyCache(similarity=args.similarity), messages, stub, args.concurrency)
+
+    await chat_agent.llm_client.aclose()
+    stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=600)
+    parser.add_argument("--llm-ms", type=int, default=300)
+    parser.add_argument("--risky", type=float, default=0.15)
+    parser.add_argument("--similarity", type=float, default=0.85)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_request_logging.py
+"""
+Throughput of a small FastAPI app with the old print-based logging
+middleware vs. the structured, queue-backed RequestLoggingMiddleware.
+Requests are generated in-process over an ASGI transport (needs fastapi
+and httpx). Log output goes to stdout and results to stderr, so run e.g.:
+
+    python benchmarks/bench_request_logging.py > /tmp/requests.log
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+from pydantic import BaseModel
+
+from services.request_logging import RequestLoggingMiddleware, setup_logging, shutdown_logging
+
+
+class SymptomRequest(BaseModel):
+    patient_id: str
+    symptom_text: str
+
+
+def build_app(mode: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/analyze-symptoms")
+    def analyze(request: SymptomRequest):
+        return {"patient_id": request.patient_id, "risk": "LOW"}
+
+    if mode == "print":
+        # The original middleware, copied as the baseline
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            print(f"➡️ Incoming request: {request.method} {request.url}")
+            body = await request.body()
+            if body:
+                print(f"📦 Body: {body.decode('utf-8')}")
+            response = await call_next(request)
+            print(f"⬅️ Response status: {response.status_code}")
+            return response
+    elif mode.startswith("structured"):
+        rate = 0.1 if mode.endswith("sampled") else 1.0
+        app.add_middleware(RequestLoggingMiddleware, default_rate=rate, log_body=False)
+    return app
+
+
+async def drive(app: FastAPI, total: int, concurrency: int) -> float:
+    payload = {"patient_id": "demo_user", "symptom_text": "I have had a mild headache since morning " * 4}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                resp = await client.post("/api/analyze-symptoms", json=payload)
+                assert resp.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    setup_logging()
+    for mode in ("none", "print", "structured", "structured-sampled"):
+        elapsed = asyncio.run(drive(build_app(mode), args.requests, args.concurrency))
+        print(f"{mode:<20} {args.requests / elapsed:>8.0f} req/s", file=sys.stderr)
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_serialization.py
+"""
+Per-request serialization CPU for the hot endpoints, before and after the
+encoded fast path. Requests come from the load harness's traffic generator
+(benchmarks/bench_load.py) and are answered by the real code paths with its
+stub providers; each response is then serialized both ways:
+
+- before: FastAPI's `jsonable_encoder` + Starlette's JSONResponse rendering
+  (json.dumps), as every endpoint used to do
+- after: `services.serialization` (orjson if installed) with pre-encoded
+  triage rule fragments and hospital bytes cached with the nearby cache entry
+
+Nearby clinics are timed as ranking + encoding of an already cached list,
+since the cached fragments also replace the per-request hospital dict copies.
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py [--requests 2000] [--clinics 20000]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_load import Traffic, start_stubs
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+# Rough bounding box of Kenya
+LAT_RANGE = (-4.7, 5.0)
+LNG_RANGE = (33.9, 41.9)
+
+
+def starlette_render(content) -> bytes:
+    """What JSONResponse.render does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def before(content) -> bytes:
+    return starlette_render(jsonable_encoder(content) if jsonable_encoder else content)
+
+
+def write_clinics(path: str, count: int, seed: int):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({
+                "name": f"Clinic {i}", "address": f"{i} Hospital Road", "latitude": rng.uniform(*LAT_RANGE),
+                "longitude": rng.uniform(*LNG_RANGE), "rating": round(rng.uniform(2.5, 5), 1),
+                "user_ratings_total": rng.randint(0, 400), "phone": f"+2547{rng.randint(10000000, 99999999)}"
+            }) + "\n")
+
+
+def timed_us(fn, items: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - start) / (repeat * len(items)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--clinics", type=int, default=20000, help="synthetic clinics in the local index")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stubs = start_stubs()
+    clinics_path = os.path.join(tempfile.mkdtemp(prefix="bench-serialization-"), "clinics.jsonl")
+    write_clinics(clinics_path, args.clinics, args.seed)
+    os.environ["CLINIC_DATA_PATH"] = clinics_path
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from agents.orchestrator_agent import Orchestrator
+        from services.google_maps import GoogleMapsService
+        from services.serialization import dumps, encode_fields, orjson
+
+        orchestrator = Orchestrator()
+        maps = GoogleMapsService()
+        triage_traffic = Traffic({"triage": 1}, seed=args.seed)
+        nearby_traffic = Traffic({"nearby": 1}, seed=args.seed)
+        triage = [orchestrator.handle_user_input(body["patient_id"], body["symptom_text"])
+                  for _, _, _, body in (triage_traffic.next() for _ in range(args.requests))]
+        nearby = [(body["latitude"], body["longitude"], body["radius"])
+                  for _, _, _, body in (nearby_traffic.next() for _ in range(args.requests))]
+        for lat, lng, radius in nearby:
+            maps.encode_nearby_hospitals(lat, lng, radius)  # fill the cache and its encoded fragments
+
+    # Both paths must produce the same JSON
+    for result in triage[:50]:
+        assert json.loads(orchestrator.encode(result)) == json.loads(before(result))
+    for lat, lng, radius in nearby[:50]:
+        assert json.loads(maps.encode_nearby_hospitals(lat, lng, radius)) == \
+            json.loads(before(maps.find_nearby_hospitals(lat, lng, radius)))
+
+    root = {"message": "Sauti Ya Mama API is running!"}
+    ROOT_BODY = dumps(root)  # encoded once at import in main.py
+    rows = [
+        ("GET /", [root], before, lambda r: ROOT_BODY),
+        ("POST /api/analyze-symptoms", triage, before, orchestrator.encode),
+        ("POST /api/nearby-clinics", nearby,
+         lambda q: before({"clinics": maps.find_nearby_hospitals(*q)}),
+         lambda q: encode_fields({"clinics": maps.encode_nearby_hospitals(*q)})),
+    ]
+    print(f"{args.requests} requests per endpoint from the load harness traffic, {args.clinics} local clinics; "
+          f"encoder: {'orjson' if orjson else 'json (orjson not installed)'}"
+          + ("" if jsonable_encoder else "; fastapi not installed, so 'before' omits jsonable_encoder"))
+    print(f"{'endpoint':<28} {'bytes':>7} {'before us':>10} {'after us':>9} {'speedup':>8}")
+    for name, items, old, new in rows:
+        old_us = timed_us(old, items, args.repeat)
+        new_us = timed_us(new, items, args.repeat)
+        size = sum(len(new(item)) for item in items) / len(items)
+        print(f"{name:<28} {size:>7.0f} {old_us:>10.1f} {new_us:>9.1f} {old_us / new_us:>7.1f}x")
+
+    for stub in stubs.values():
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost of the API: time to import `main` and time to the first
+response, each measured in a fresh interpreter (like a new Render
+instance). The heaviest imports are listed from `python -X importtime`.
+Run it on two checkouts to compare them.
+
+Run from the backend directory (needs the app's requirements):
+    python benchmarks/bench_startup.py [--runs 5] [--no-keys]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+import httpx, asyncio
+
+async def first_requests():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        t0 = time.perf_counter()
+        await client.get("/")
+        t1 = time.perf_counter()
+        await client.post("/api/nearby-clinics", json={"latitude": -1.29, "longitude": 36.82, "radius": 1000})
+        t2 = time.perf_counter()
+    return t1 - t0, t2 - t1
+
+root_s, nearby_s = asyncio.run(first_requests())
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_root_ms": root_s * 1000,
+                  "first_nearby_ms": nearby_s * 1000}))
+"""
+
+
+def run_probe(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    # The access log thread writes to stdout too, so a log line can share the probe's line
+    return json.JSONDecoder().raw_decode(out, out.rindex('{"import_ms"'))[0]
+
+
+def heaviest_imports(env: dict, top: int) -> list:
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                         env=env, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):  # top-level imports only (nested ones are indented)
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-keys", action="store_true", help="start with no provider keys configured")
+    args = parser.parse_args()
+
+    env = dict(os.environ, VOICE_WARMUP="0")
+    if args.no_keys:
+        for key in ("GOOGLE_MAPS_API_KEY", "MISTRAL_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_KEY"):
+            env.pop(key, None)
+
+    results = [run_probe(env) for _ in range(args.runs)]
+    for key in ("import_ms", "first_root_ms", "first_nearby_ms"):
+        values = [r[key] for r in results]
+        print(f"{key:<16} median {statistics.median(values):>8.1f}   min {min(values):>8.1f}")
+
+    print("\nheaviest top-level imports (cumulative us):")
+    for cumulative, name in heaviest_imports(env, args.top):
+        print(f"{cumulative:>10}  {name}")
+
+
+if __name__ == "__main__":
+    main()
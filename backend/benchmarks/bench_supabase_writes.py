@@ -0,0 +1,94 @@
+# benchmarks/bench_supabase_writes.py
+"""
+Chat message persistence against a local PostgREST stand-in: one
+synchronous insert per message (old behaviour) vs. the write-behind
+buffer's batched inserts. Also runs an outage (rows spill to disk and are
+replayed) and compares history reads with and without the session cache.
+
+Run from the backend directory:
+    python benchmarks/bench_supabase_writes.py [--turns 200] [--db-ms 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.stubs import PostgRESTStub
+from services.settings import Settings
+from services.supabase_client import SupabaseService
+
+
+def timed(fn, count: int) -> list:
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list, requests_made: int):
+    print(f"{name:<34} median {statistics.median(timings):>7.3f} ms   total {sum(timings):>8.1f} ms"
+          f"   HTTP requests {requests_made:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--db-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = PostgRESTStub(latency=args.db_ms / 1000).start()
+    headers = {"apikey": "stub", "Authorization": "Bearer stub", "Prefer": "return=minimal"}
+    endpoint = f"{stub.base_url}/rest/v1/chat_messages"
+    http = requests.Session()
+
+    def row(i):
+        return {"session_id": f"s{i % 10}", "role": "user" if i % 2 == 0 else "assistant",
+                "content": f"message {i}", "patient_id": "p1"}
+
+    # 1) Old: a blocking insert per message, two per chat turn
+    timings = timed(lambda i: http.post(endpoint, headers=headers, json=row(i), timeout=10), args.turns * 2)
+    report("sync insert per message (old)", timings, stub.requests)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(SUPABASE_URL=stub.base_url, SUPABASE_SERVICE_KEY="stub",
+                          SUPABASE_SPILL_PATH=os.path.join(tmp, "spill.jsonl"))
+        service = SupabaseService(Settings())
+
+        # 2) Write-behind: the request path only appends to the buffer
+        stub.requests = 0
+        timings = timed(lambda i: service.save_chat_message(**row(i)), args.turns * 2)
+        service.writer.flush()
+        report("write-behind (request path)", timings, stub.requests)
+
+        # 3) Outage: rows spill to disk, then replay once the database is back
+        stub.down = True
+        for i in range(20):
+            service.save_chat_message(**dict(row(i), session_id="outage"))
+        service.writer.flush()
+        spilled = service.writer.stats["spilled"]
+        stub.down = False
+        service.writer.flush()
+        stored = [r for r in stub.tables["chat_messages"] if r["session_id"] == "outage"]
+        print(f"outage: spilled {spilled} rows, replayed {service.writer.stats['replayed']}, "
+              f"stored {len(stored)}, in order: {[r['content'] for r in stored] == [row(i)['content'] for i in range(20)]}")
+
+        # 4) History: the first read goes to the database, later ones come from the cache
+        stub.requests = 0
+        first = timed(lambda i: service.get_chat_history("s1"), 1)
+        later = timed(lambda i: service.get_chat_history("s1"), 50)
+        print(f"history read: first {first[0]:.2f} ms, cached median {statistics.median(later):.4f} ms, "
+              f"HTTP requests {stub.requests}, rows {len(service.get_chat_history('s1'))}")
+        service.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
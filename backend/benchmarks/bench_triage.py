@@ -0,0 +1,130 @@
+# benchmarks/bench_triage.py
+"""
+Compare the compiled triage matcher with the original per-rule substring loop:
+speed, and recall on inflected keywords ("headaches", "vomited") relative to
+the substring loop, which matched them by accident.
+
+Run from the backend directory:
+    python benchmarks/bench_triage.py [--texts 10000] [--conditions 300]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.triage_agent import DEFAULT_RULES, INFLECTIONS, TriageAgent
+
+FILLER = [
+    "i", "have", "been", "feeling", "tired", "since", "morning", "and", "my",
+    "back", "is", "sore", "the", "baby", "moves", "a", "lot", "today", "week",
+    "slept", "badly", "after", "walking", "to", "market", "water", "food",
+]
+
+
+def legacy_analyze(rules: dict, text_input: str, patient_history: dict) -> dict:
+    """The original nested `keyword in text` loop, kept here as the baseline."""
+    text_input = text_input.lower()
+    for condition, rule in rules.items():
+        if condition == "normal":
+            continue
+        for keyword in rule["keywords"]:
+            if keyword in text_input:
+                return {
+                    "condition": condition,
+                    "risk": rule["risk"],
+                    "recommendation": rule["recommendation"],
+                    "patient_id": patient_history.get("patient_id")
+                }
+    return {
+        "condition": "no_urgent_issue_detected",
+        "risk": rules["normal"]["risk"],
+        "recommendation": rules["normal"]["recommendation"],
+        "patient_id": patient_history.get("patient_id")
+    }
+
+
+def build_rules(extra_conditions: int) -> dict:
+    """Pad the real rules with synthetic conditions to mimic a full protocol."""
+    rules = dict(DEFAULT_RULES)
+    for i in range(extra_conditions):
+        rules[f"synthetic_{i}"] = {
+            "keywords": [f"symptom{i}a", f"symptom{i}b", f"sign {i} c"],
+            "risk": random.choice(["HIGH", "MEDIUM", "LOW"]),
+            "recommendation": f"Synthetic recommendation {i}."
+        }
+    # "normal" must stay last for the legacy loop to behave as before
+    rules["normal"] = rules.pop("normal")
+    return rules
+
+
+def build_texts(rules: dict, count: int) -> list:
+    keywords = [kw for rule in rules.values() for kw in rule.get("keywords", [])]
+    texts = []
+    for _ in range(count):
+        words = random.choices(FILLER, k=random.randint(8, 30))
+        if random.random() < 0.4:
+            words.insert(random.randrange(len(words)), random.choice(keywords))
+        texts.append(" ".join(words))
+    return texts
+
+
+def build_inflected_texts(rules: dict) -> list:
+    """Every rule keyword with every inflection, inside filler words."""
+    keywords = [kw for rule in rules.values() for kw in rule.get("keywords", [])]
+    return [
+        " ".join(random.choices(FILLER, k=5) + [keyword + suffix] + random.choices(FILLER, k=5))
+        for keyword in keywords for suffix in INFLECTIONS
+    ]
+
+
+def report_recall(rules: dict, agent: TriageAgent, texts: list, label: str):
+    """How many reports each matcher flags, and the ones only the substring loop flags."""
+    history = {"patient_id": "bench"}
+    legacy = [legacy_analyze(rules, t, history)["condition"] != "no_urgent_issue_detected" for t in texts]
+    compiled = [agent.analyze_symptoms(t, history)["condition"] != "no_urgent_issue_detected" for t in texts]
+    missed = [t for t, old, new in zip(texts, legacy, compiled) if old and not new]
+    recall = (sum(legacy) - len(missed)) / sum(legacy) if any(legacy) else 1.0
+    print(f"{label:<28} legacy flags {sum(legacy):>5}, compiled {sum(compiled):>5}, "
+          f"recall vs legacy {recall:.1%}")
+    for text in missed[:3]:
+        print(f"    missed: {text}")
+
+
+def timed(fn, texts: list) -> float:
+    history = {"patient_id": "bench"}
+    start = time.perf_counter()
+    for text in texts:
+        fn(text, history)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=10000)
+    parser.add_argument("--conditions", type=int, nargs="*", default=[0, 100, 300])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"{'conditions':>10} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for extra in args.conditions:
+        rules = build_rules(extra)
+        texts = build_texts(rules, args.texts)
+        agent = TriageAgent(rules)
+
+        legacy = timed(lambda t, h: legacy_analyze(rules, t, h), texts)
+        compiled = timed(agent.analyze_symptoms, texts)
+        print(f"{len(rules) - 1:>10} {legacy * 1000:>10.1f} {compiled * 1000:>12.1f} {legacy / compiled:>7.1f}x")
+
+    print()
+    rules = build_rules(max(args.conditions))
+    agent = TriageAgent(rules)
+    report_recall(rules, agent, build_texts(rules, args.texts), "random reports")
+    report_recall(rules, agent, build_inflected_texts(rules), "inflected keywords")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_voice_alerts.py
+"""
+Triage response time and size with a voice alert: synthesizing per request
+and inlining base64 audio (old behaviour) vs. the content-addressed audio
+cache returning a URL while the job queue renders in the background. The engine is the offline tone engine plus a sleep
+standing in for a hosted TTS round trip.
+
+Run from the backend directory:
+    python benchmarks/bench_voice_alerts.py [--tts-ms 800] [--requests 20]
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.triage_agent import triage_agent
+from agents.voice_agent import VoiceAgent
+from services.job_queue import JobQueue
+from services.tts import AudioStore, ToneEngine
+
+REPORTS = ["I have a bad headache and blurred vision", "I have a fever and chills", "there is some spotting"]
+
+
+class SlowToneEngine(ToneEngine):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def synthesize(self, text, language):
+        time.sleep(self.delay)
+        return super().synthesize(text, language)
+
+
+def respond_inline(engine, text: str) -> str:
+    diagnosis = triage_agent.analyze_symptoms(text, {})
+    audio = engine.synthesize(diagnosis["recommendation"], "sw")
+    return json.dumps({"diagnosis": diagnosis, "audio_alert": base64.b64encode(audio).decode("utf-8")})
+
+
+def respond_cached(agent, text: str) -> str:
+    diagnosis = triage_agent.analyze_symptoms(text, {})
+    return json.dumps({"diagnosis": diagnosis, "audio_alert": agent.alert(diagnosis["recommendation"], "sw")})
+
+
+def measure(name: str, respond, count: int):
+    timings, sizes = [], []
+    for i in range(count):
+        start = time.perf_counter()
+        body = respond(REPORTS[i % len(REPORTS)])
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(body))
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else timings[0]
+    print(f"{name:<28} median {statistics.median(timings):>8.2f} ms   p99 {p99:>8.2f} ms"
+          f"   body {statistics.mean(sizes) / 1024:>7.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tts-ms", type=int, default=800)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = SlowToneEngine(args.tts_ms / 1000)
+    measure("inline base64 (old)", lambda text: respond_inline(engine, text), args.requests)
+
+    with tempfile.TemporaryDirectory() as root:
+        agent = VoiceAgent(engine, AudioStore(root), JobQueue())
+        measure("audio URL, cold cache", lambda text: respond_cached(agent, text), args.requests)
+
+        agent = VoiceAgent(engine, AudioStore(root + "/warm"), JobQueue())
+        start = time.perf_counter()
+        agent.warm_up([rule["recommendation"] for rule in triage_agent.rules.values()], ["sw", "en"])
+        print(f"warm-up: {(time.perf_counter() - start):.2f} s")
+        measure("audio URL, after warm-up", lambda text: respond_cached(agent, text), args.requests)
+
+
+if __name__ == "__main__":
+    main()
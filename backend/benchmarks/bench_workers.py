@@ -0,0 +1,231 @@
+# benchmarks/bench_workers.py
+"""
+Triage throughput of `serve.py` with 1..N worker processes, over real HTTP
+(keep-alive) from a multi-process load generator. Reports requests/s,
+latency, speedup and scaling efficiency per worker count, and the server's
+memory as RSS vs. PSS: PSS splits pages shared copy-on-write with the
+preloading parent, so it shows what each extra worker really costs.
+
+--drain then starts two workers against a slow stub LLM, sends SIGTERM
+while chats are in flight and checks that every one still completes.
+
+The load generator needs CPU too: by default the worker counts go up to
+half the available CPUs and the clients get the rest. Give it more with a
+second machine (--host) for the top of the range.
+
+Run from the backend directory (needs the app's requirements):
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--seconds 10] [--drain]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.bench_load import load_triage_texts, start_stubs
+from serve import available_cpus
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, extra_env: dict = None) -> subprocess.Popen:
+    state = tempfile.mkdtemp(prefix="bench-workers-")
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), HOST="127.0.0.1",
+               VOICE_WARMUP="0", TTS_ENGINE="tone", LOG_SAMPLE_RATE="0",
+               SESSION_DB_PATH=os.path.join(state, "sessions.db"),
+               RATE_LIMIT_DB_PATH=os.path.join(state, "rate_limits.db"),
+               JOB_MAX_PENDING="100000", **(extra_env or {}))
+    server = subprocess.Popen([sys.executable, "serve.py"], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                time.sleep(1)  # let the remaining workers finish starting
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def stop_server(server: subprocess.Popen) -> float:
+    start = time.perf_counter()
+    server.send_signal(signal.SIGTERM)
+    server.wait(60)
+    return time.perf_counter() - start
+
+
+def memory_mb(root_pid: int) -> tuple:
+    """(RSS, PSS) in MB summed over the arbiter and its workers."""
+    pids = [root_pid]
+    try:
+        with open(f"/proc/{root_pid}/task/{root_pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    rss = pss = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+    return rss / 1024, pss / 1024
+
+
+def client_process(host: str, port: int, connections: int, seconds: float, results):
+    texts = load_triage_texts()
+    latencies, errors = [], [0]
+    deadline = time.monotonic() + seconds
+
+    def connection(offset: int):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        i = offset
+        while time.monotonic() < deadline:
+            body = json.dumps({"patient_id": f"patient_{i % 1000}", "symptom_text": texts[i % len(texts)]})
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/api/analyze-symptoms", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[0] += 1
+                    continue
+            except OSError:
+                errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=connection, args=(os.getpid() * 31 + n,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(host: str, port: int, procs: int, connections: int, seconds: float) -> dict:
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    clients = [ctx.Process(target=client_process, args=(host, port, connections, seconds, results))
+               for _ in range(procs)]
+    for client in clients:
+        client.start()
+    latencies, errors = [], 0
+    for _ in clients:
+        samples, failed = results.get()
+        latencies += samples
+        errors += failed
+    for client in clients:
+        client.join()
+    latencies.sort()
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies) if latencies else 0,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+        "errors": errors
+    }
+
+
+def drain_check(in_flight: int, llm_seconds: float):
+    """SIGTERM with chats waiting on a slow LLM: every one should still get its reply."""
+    stubs_latency = {"mistral": llm_seconds, "ai_ml": llm_seconds}
+    port = free_port()
+    server = start_server(2, port, {"ADMISSION_CHAT_MAX": str(in_flight), "LLM_MAX_CONCURRENCY": str(in_flight)})
+    for name, latency in stubs_latency.items():
+        STUBS[name].latency = latency
+    statuses = []
+
+    def chat(n: int):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=llm_seconds * 4 + 30)
+        body = json.dumps({"patient_id": f"drain_{n}", "message": "What should I eat during pregnancy?"})
+        try:
+            conn.request("POST", "/api/chat/message", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            statuses.append(response.status)
+        except OSError as e:
+            statuses.append(type(e).__name__)
+
+    threads = [threading.Thread(target=chat, args=(n,)) for n in range(in_flight)]
+    for thread in threads:
+        thread.start()
+    time.sleep(min(1.0, llm_seconds / 2))
+    exit_s = stop_server(server)
+    for thread in threads:
+        thread.join()
+    ok = statuses.count(200)
+    print(f"\ndrain: SIGTERM with {in_flight} chats in flight (LLM stub {llm_seconds:.1f}s): "
+          f"{ok}/{in_flight} completed with 200, server exited after {exit_s:.1f}s"
+          + ("" if ok == in_flight else f"; others: {[s for s in statuses if s != 200]}"))
+
+
+STUBS = {}
+
+
+def main():
+    cpus = available_cpus()
+    top = max(1, cpus // 2)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({n for n in (1, 2, 4, 8, 16, 32) if n < top} | {top}))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--client-procs", type=int, help="load generator processes (default: the CPUs left over)")
+    parser.add_argument("--connections", type=int, default=8, help="keep-alive connections per client process")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--drain", action="store_true")
+    args = parser.parse_args()
+
+    # Stub providers, so nothing reaches real services (triage doesn't call any)
+    STUBS.update(start_stubs())
+
+    print(f"{cpus} CPUs available; triage over HTTP keep-alive, {args.seconds:.0f}s per run")
+    print(f"{'workers':>7} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} "
+          f"{'speedup':>8} {'eff':>6} {'rss MB':>8} {'pss MB':>8}")
+    base = None
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(workers, port)
+        procs = args.client_procs or max(1, cpus - workers)
+        run_load(args.host, port, procs, args.connections, 2.0)  # warm up
+        r = run_load(args.host, port, procs, args.connections, args.seconds)
+        rss, pss = memory_mb(server.pid)
+        stop_server(server)
+        base = base or r["rps"] / workers
+        speedup = r["rps"] / base
+        print(f"{workers:>7} {procs * args.connections:>8} {r['rps']:>9.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+              f"{r['errors']:>7} {speedup:>7.2f}x {speedup / workers:>6.0%} {rss:>8.0f} {pss:>8.0f}")
+
+    if args.drain:
+        drain_check(in_flight=20, llm_seconds=3.0)
+    for stub in STUBS.values():
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# benchmarks/stubs.py
+"""
+Local stand-ins for the external providers, so benchmarks can drive the real
+client code over real sockets without network access or API keys.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class StubServer:
+    """
+    Threaded HTTP/1.1 (keep-alive) server answering every POST with a chat
+    completion after `latency` seconds, or a 503 with probability `failure_rate`.
+    Requests with `"stream": true` get the reply word by word as SSE chunks,
+    `token_delay` seconds apart. `latency_per_kb` adds delay proportional to
+    the request size, like a provider processing a longer prompt.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, reply: str = "stub reply",
+                 token_delay: float = 0.0, latency_per_kb: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.token_delay = token_delay
+        self.latency_per_kb = latency_per_kb
+        self.requests = 0
+        self.connections = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v1/chat/completions"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond_get(self, path: str):
+        """Return (status, payload) for a GET. Override for providers that serve reads."""
+        return 404, {"error": "not found"}
+
+    def respond(self, path: str, body: dict):
+        """Return (status, payload). Override for other provider shapes."""
+        if random.random() < self.failure_rate:
+            return 503, {"error": "stub failure"}
+        return 200, {"choices": [{"message": {"role": "assistant", "content": self.reply}}]}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def _send(self, status: int, payload):
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+            def _send_stream(self, status: int, payload):
+                if status != 200:
+                    return self._send(status, payload)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                content = payload["choices"][0]["message"]["content"]
+                for i, word in enumerate(content.split(" ")):
+                    token = word if i == 0 else " " + word
+                    chunk = {"choices": [{"delta": {"content": token}}]}
+                    self._chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+                    if stub.token_delay:
+                        time.sleep(stub.token_delay)
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests += 1
+                delay = stub.latency + stub.latency_per_kb * length / 1024
+                if delay:
+                    time.sleep(delay)
+                if isinstance(body, dict) and body.get("stream"):
+                    self._send_stream(*stub.respond(self.path, body))
+                else:
+                    self._send(*stub.respond(self.path, body))
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                self._send(*stub.respond_get(self.path))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class PostgRESTStub(StubServer):
+    """
+    Minimal Supabase/PostgREST stand-in: POST /rest/v1/<table> inserts one
+    row or a list of rows, GET /rest/v1/<table>?col=eq.value&order=col
+    filters them. Set `down = True` to answer 503 like an unreachable database.
+    Like Postgres `text`, a batch with a NUL character in any value is
+    refused as a whole with 400.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency=latency)
+        self.tables = {}
+        self.inserts = 0
+        self.down = False
+
+    def respond(self, path: str, body):
+        if self.down or random.random() < self.failure_rate:
+            return 503, {"message": "database unavailable"}
+        table = path.split("?")[0].rsplit("/", 1)[-1]
+        rows = body if isinstance(body, list) else [body]
+        if any("\x00" in value for row in rows for value in row.values() if isinstance(value, str)):
+            return 400, {"code": "22P05", "message": "unsupported Unicode escape sequence"}
+        self.tables.setdefault(table, []).extend(rows)
+        self.inserts += 1
+        return 201, None
+
+    def respond_get(self, path: str):
+        if self.down or random.random() < self.failure_rate:
+            return 503, {"message": "database unavailable"}
+        parts = urlsplit(path)
+        rows = self.tables.get(parts.path.rsplit("/", 1)[-1], [])
+        order = None
+        for key, value in parse_qsl(parts.query):
+            if key == "order":
+                order = value.split(".")[0]
+            elif key != "select" and value.startswith("eq."):
+                rows = [row for row in rows if str(row.get(key)) == value[3:]]
+        if order:
+            rows = sorted(rows, key=lambda row: row.get(order) or "")
+        return 200, rows
+
+
+class GooglePlacesStub(StubServer):
+    """
+    Google Maps web service stand-in for the `googlemaps` client (pass
+    `base_url`): Places nearby search returns `places` hospitals scattered
+    around the requested point, geocoding resolves any address to a point
+    near Nairobi. With probability `failure_rate` a call answers
+    UNKNOWN_ERROR, which the client raises without retrying.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, places: int = 8):
+        super().__init__(latency=latency, failure_rate=failure_rate)
+        self.places = places
+
+    def respond_get(self, path: str):
+        if random.random() < self.failure_rate:
+            return 200, {"status": "UNKNOWN_ERROR", "results": []}
+        parts = urlsplit(path)
+        query = dict(parse_qsl(parts.query))
+        if parts.path.endswith("/place/nearbysearch/json"):
+            lat, lng = (float(v) for v in query["location"].split(","))
+            spread = float(query.get("radius", 5000)) / 111000
+            results = [
+                {
+                    "name": f"Stub Hospital {i}",
+                    "vicinity": f"{i} Stub Road",
+                    "rating": 4.0,
+                    "user_ratings_total": 10 * i,
+                    "geometry": {"location": {"lat": lat + spread * random.uniform(-0.7, 0.7),
+                                              "lng": lng + spread * random.uniform(-0.7, 0.7)}}
+                }
+                for i in range(self.places)
+            ]
+            return 200, {"status": "OK", "results": results}
+        if parts.path.endswith("/geocode/json"):
+            return 200, {"status": "OK", "results": [{
+                "formatted_address": query.get("address", ""),
+                "geometry": {"location": {"lat": -1.29 + random.uniform(-0.1, 0.1),
+                                          "lng": 36.82 + random.uniform(-0.1, 0.1)}}
+            }]}
+        return 404, {"status": "NOT_FOUND"}
@@ -1,23 +1,57 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException, Request
+from services.settings import get_settings  # loads .env once, before anything reads the environment
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from agents.orchestrator_agent import Orchestrator
-from services.google_maps import google_maps_service
-from agents.chat_agent import initialize_chat, chat_with_agent
-from typing import Optional
-import os
-from dotenv import load_dotenv
+from services.google_maps import GoogleMapsService, get_google_maps_service
+from services.admission import AdmissionMiddleware, Overloaded, admission, chat_limiter
+from services.request_logging import RequestLoggingMiddleware, setup_logging, shutdown_logging
+from services.metrics import MetricsMiddleware, registry
+from services.job_queue import job_queue
+from services.serialization import dumps, encode_fields
+from services.supabase_client import SupabaseService, get_supabase_service
+from agents.chat_agent import (
+    initialize_chat, chat_with_agent, stream_chat_with_agent, start_nearby_lookup, collect_nearby,
+    llm_client, reply_cache, session_io, session_store
+)
+from typing import List, Optional
+import json
+import logging
+import threading
 from datetime import datetime
+import time
+
+settings = get_settings()
+logger = logging.getLogger("sauti.api")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON rendered by `services.serialization.dumps` (orjson when installed).
+    `bytes` content is already-encoded JSON and is sent as-is, so endpoints
+    that return one skip FastAPI's `jsonable_encoder` pass as well.
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return bytes(content)
+        return dumps(content)
 
-load_dotenv()
 
 app = FastAPI(
     title="Sauti Ya Mama API",
     description="Backend for Maternal Health Agent",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Innermost: requests shed for lack of capacity are still logged and counted,
+# and CORS (added next, so it wraps this) answers preflights and labels 429s
+app.add_middleware(AdmissionMiddleware)
+
 # ✅ Debug: Allow all CORS origins (to test)
 app.add_middleware(
     CORSMiddleware,
@@ -34,10 +68,14 @@ class SymptomRequest(BaseModel):
     patient_id: str
     symptom_text: str
 
+class BatchSymptomRequest(BaseModel):
+    items: List[SymptomRequest]
+
 class ClinicRequest(BaseModel):
     latitude: float
     longitude: float
     radius: int = 10000
+    limit: Optional[int] = Field(None, ge=1)  # nearest N only; all within radius if unset
 
 class ChatRequest(BaseModel):
     session_id: Optional[str] = None
@@ -47,26 +85,79 @@ class ChatRequest(BaseModel):
     longitude: Optional[float] = None
 
 
+# Nearest facilities a chat reply carries (the chat card lists them)
+CHAT_HOSPITAL_LIMIT = 10
+
+
 # -------------------------------
 # 📌 Root endpoint
 # -------------------------------
+ROOT_BODY = dumps({"message": "Sauti Ya Mama API is running!"})
+
+
 @app.get("/")
 def read_root():
-    return {"message": "Sauti Ya Mama API is running!"}
+    return FastJSONResponse(ROOT_BODY)
 
 
 # -------------------------------
 # 📌 Middleware for logging
 # -------------------------------
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(f"➡️ Incoming request: {request.method} {request.url}")
-    body = await request.body()
-    if body:
-        print(f"📦 Body: {body.decode('utf-8')}")
-    response = await call_next(request)
-    print(f"⬅️ Response status: {response.status_code}")
-    return response
+# Structured JSON access log written from a background thread; see services/request_logging.py
+setup_logging()
+app.add_middleware(RequestLoggingMiddleware)
+# Added last so it wraps the logger: its per-request trace is visible to the access log
+app.add_middleware(MetricsMiddleware)
+
+
+# -------------------------------
+# 📌 Metrics
+# -------------------------------
+def _collect_service_metrics():
+    # Services that haven't been used yet aren't built just to be scraped
+    caches = get_google_maps_service().cache_metrics() if get_google_maps_service.loaded else {}
+    sessions = session_store.metrics()
+    caches["sessions"] = sessions
+    caches["chat_replies"] = reply_cache.metrics()
+    jobs = job_queue.metrics()
+    lanes = admission.metrics()
+    return [
+        ("sauti_cache_hit_ratio", "gauge", "Share of lookups served from cache",
+         [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()]),
+        ("sauti_cache_entries", "gauge", "Entries held per cache",
+         [({"cache": name}, stats.get("entries", stats.get("sessions"))) for name, stats in caches.items()]),
+        ("sauti_session_bytes", "gauge", "Bytes held by the session store", [({}, sessions["bytes_held"])]),
+        ("sauti_provider_circuit_open", "gauge", "1 if the provider's circuit breaker is open",
+         [({"provider": name}, int(status["breaker"] == "open")) for name, status in llm_client.status().items()]),
+        ("sauti_reply_cache_saved_seconds_total", "counter", "Provider time saved by cached chat replies",
+         [({}, caches["chat_replies"]["saved_seconds"])]),
+        ("sauti_admission_inflight", "gauge", "Requests in progress per admission lane",
+         [({"lane": lane}, stats["inflight"]) for lane, stats in lanes.items()]),
+        ("sauti_admission_rejected_total", "counter", "Requests refused with 429, by lane or limiter",
+         [({"lane": lane}, stats["rejected"]) for lane, stats in lanes.items()]
+         + [({"lane": "chat_rate_limit"}, chat_limiter.rejected)]),
+        ("sauti_jobs_pending", "gauge", "Background jobs queued or waiting to retry", [({}, jobs["pending"])]),
+        ("sauti_jobs_total", "counter", "Background jobs by outcome",
+         [({"outcome": key}, jobs[key]) for key in ("submitted", "succeeded", "failed", "retried", "rejected")])
+    ]
+
+
+registry.register_collector(_collect_service_metrics)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc: Overloaded):
+    # Shed early: the client is told when to come back instead of waiting on a busy worker
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.reason, "retry_after": int(exc.headers()["Retry-After"])},
+        headers=exc.headers()
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 # -------------------------------
@@ -77,17 +168,85 @@ def analyze_symptoms(request: SymptomRequest):
     try:
         orchestrator = Orchestrator()
         result = orchestrator.handle_user_input(request.patient_id, request.symptom_text)
-
-        # Encode audio alert if present
-        if 'audio_alert' in result:
-            import base64
-            result['audio_alert'] = base64.b64encode(result['audio_alert']).decode('utf-8')
-
-        return result
+        return FastJSONResponse(orchestrator.encode(result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analyze-symptoms/batch")
+def analyze_symptoms_batch(request: BatchSymptomRequest):
+    """
+    Triage queued offline reports in one round trip. Results are streamed
+    back as NDJSON, one line per item in request order. Batches over
+    TRIAGE_BATCH_MAX items are refused with 413 before any triage work.
+    """
+    if len(request.items) > settings.triage_batch_max:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.items)} reports is over the limit of {settings.triage_batch_max}"
+        )
+    items = [(item.patient_id, item.symptom_text) for item in request.items]
+
+    def stream():
+        try:
+            orchestrator = Orchestrator()
+            for result in orchestrator.handle_batch(items):
+                yield orchestrator.encode(result) + b"\n"
+        except Exception as e:
+            yield dumps({"error": str(e)}) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# -------------------------------
+# 📌 Voice alerts
+# -------------------------------
+@app.get("/api/audio/{filename}")
+async def get_audio(filename: str):
+    """
+    Cached alert audio by content hash. FileResponse streams the file from
+    disk (with Range support) instead of inlining it in the JSON; the name
+    changes whenever the audio would, so clients may cache it forever.
+    """
+    from agents.voice_agent import voice_agent
+    path = await run_in_threadpool(voice_agent.audio_path, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(
+        path,
+        media_type=voice_agent.engine.content_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+# -------------------------------
+# 📌 Background jobs
+# -------------------------------
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Poll a background job (e.g. a voice alert's `job_id`)."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/jobs")
+def jobs_metrics():
+    return job_queue.metrics()
+
+
+@app.on_event("startup")
+def warm_voice_alerts():
+    """Pre-render every triage recommendation in each language, off the startup path."""
+    if not settings.voice_warmup:
+        return
+    from agents.triage_agent import triage_agent
+    from agents.voice_agent import voice_agent
+    recommendations = [rule["recommendation"] for rule in triage_agent.rules.values()]
+    threading.Thread(target=voice_agent.warm_up, args=(recommendations,), daemon=True).start()
+
+
 # -------------------------------
 # 📌 Patient history
 # -------------------------------
@@ -101,35 +260,81 @@ def get_patient(patient_id: str):
 # 📌 Nearby clinics
 # -------------------------------
 @app.post("/api/nearby-clinics")
-def get_nearby_clinics(request: ClinicRequest):
+def get_nearby_clinics(request: ClinicRequest, maps: GoogleMapsService = Depends(get_google_maps_service)):
     try:
-        hospitals = google_maps_service.find_nearby_hospitals(
-            request.latitude, request.longitude, request.radius
+        hospitals = maps.encode_nearby_hospitals(
+            request.latitude, request.longitude, request.radius, limit=request.limit
         )
-        return {"clinics": hospitals}
+        return FastJSONResponse(encode_fields({"clinics": hospitals}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching clinics: {str(e)}")
 
 
+# -------------------------------
+# 📌 Clinic directory tiles (offline-first)
+# -------------------------------
+def _tile_response(tile, request: Request) -> Response:
+    from services.clinic_tiles import respond
+    status, headers, body = respond(tile, request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+    return Response(content=body, status_code=status, headers=headers,
+                    media_type="application/json" if status == 200 else None)
+
+
+def _require_tiles(clinic_tiles):
+    if clinic_tiles.ready:
+        return
+    if clinic_tiles.unavailable:
+        raise HTTPException(status_code=404, detail=clinic_tiles.unavailable)
+    raise HTTPException(status_code=503, detail="Clinic tiles are being built", headers={"Retry-After": "30"})
+
+
+@app.get("/api/clinic-tiles")
+def clinic_tiles_manifest(request: Request):
+    """Tile index: precision, and each tile's ETag and clinic count."""
+    from services.clinic_tiles import clinic_tiles, refresh_clinic_tiles
+    _require_tiles(clinic_tiles)
+    refresh_clinic_tiles()  # a stat at most once a minute; rebuilds in the background
+    return _tile_response(clinic_tiles.manifest(), request)
+
+
+@app.get("/api/clinic-tiles/{geohash}")
+def get_clinic_tile(geohash: str, request: Request):
+    """The clinics in one geohash tile (longer geohashes are cut to the tile precision)."""
+    from services.clinic_tiles import clinic_tiles
+    _require_tiles(clinic_tiles)
+    tile = clinic_tiles.tile(geohash)
+    if tile is None:
+        raise HTTPException(status_code=400, detail=f"Invalid geohash (need {clinic_tiles.precision}+ base32 characters)")
+    return _tile_response(tile, request)
+
+
+@app.on_event("startup")
+def prepare_clinic_tiles():
+    """Reload tiles built from the current dataset, or rebuild them in the background."""
+    from services.clinic_tiles import ensure_clinic_tiles
+    threading.Thread(target=ensure_clinic_tiles, daemon=True).start()
+
+
 # -------------------------------
 # 📌 Geocoding
 # -------------------------------
 @app.get("/api/geocode/{address}")
-def geocode_address(address: str):
+def geocode_address(address: str, maps: GoogleMapsService = Depends(get_google_maps_service)):
     try:
-        geocode_result = google_maps_service.client.geocode(address)
-        if geocode_result:
-            location = geocode_result[0]['geometry']['location']
-            return {
-                "latitude": location['lat'],
-                "longitude": location['lng'],
-                "formatted_address": geocode_result[0]['formatted_address']
-            }
+        result = maps.geocode(address)
+        if result:
+            return result
         return {"error": "Address not found"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/maps/metrics")
+def maps_metrics(maps: GoogleMapsService = Depends(get_google_maps_service)):
+    from services.clinic_tiles import clinic_tiles
+    return dict(maps.cache_metrics(), clinic_tiles=clinic_tiles.metrics())
+
+
 # -------------------------------
 # 📌 Chat APIs
 # -------------------------------
@@ -142,25 +347,48 @@ def init_chat_session(request: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/chat/metrics")
+def chat_metrics(supabase_service: SupabaseService = Depends(get_supabase_service)):
+    return {
+        "sessions": session_store.metrics(),
+        "llm_providers": llm_client.status(),
+        "reply_cache": reply_cache.metrics(),
+        "admission": admission.metrics(),
+        "persistence": supabase_service.writer.metrics() if supabase_service.writer else None
+    }
+
+
+async def _admit_chat(request: ChatRequest):
+    """Per-patient/session rate limits, then provider capacity; raises Overloaded (429)."""
+    keys = (f"patient:{request.patient_id}", f"session:{request.session_id}" if request.session_id else None)
+    if chat_limiter.blocking:
+        await run_in_threadpool(chat_limiter.check, *keys)  # SQLite: may wait on another worker's lock
+    else:
+        chat_limiter.check(*keys)
+    llm_client.admit()
+
+
+async def _start_session(request: ChatRequest):
+    if not request.session_id:
+        session_info = await session_io(initialize_chat, request.patient_id)
+        request.session_id = session_info['session_id']
+
+
 @app.post("/api/chat/message")
-def handle_chat_message(request: ChatRequest):
+async def handle_chat_message(request: ChatRequest):
+    await _admit_chat(request)
     try:
         # Create session if not provided
-        if not request.session_id:
-            session_info = initialize_chat(request.patient_id)
-            request.session_id = session_info['session_id']
+        await _start_session(request)
 
-        # Call chat agent
-        ai_reply = chat_with_agent(request.session_id, request.message)
+        # ✅ Check if user asks for hospitals/clinics; the lookup runs alongside the LLM call
+        lookup = start_nearby_lookup(
+            request.message, request.latitude, request.longitude, _find_chat_hospitals
+        )
 
-        # ✅ Check if user asks for hospitals/clinics
-        keywords = ["hospital", "clinic", "doctor", "near me", "nearby"]
-        hospitals = None
-        if any(word in request.message.lower() for word in keywords):
-            if request.latitude and request.longitude:
-                hospitals = google_maps_service.find_nearby_hospitals(
-                    request.latitude, request.longitude, radius=5000
-                )
+        # Call chat agent
+        ai_reply = await chat_with_agent(request.session_id, request.message, nearby=lookup)
+        hospitals = await collect_nearby(lookup)
 
         return {
             "reply": ai_reply,
@@ -173,10 +401,71 @@ def handle_chat_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@app.post("/api/chat/message/stream")
+async def handle_chat_message_stream(request: ChatRequest):
+    """
+    Same as /api/chat/message, but the reply is sent as Server-Sent Events:
+    one `token` event per chunk, then a `done` event carrying session_id,
+    hospitals, timestamp and the time to first token (ttfb_ms).
+    """
+    started = time.perf_counter()
+    await _admit_chat(request)
+    await _start_session(request)
+
+    async def events():
+        ttfb_ms = None
+        lookup = start_nearby_lookup(
+            request.message, request.latitude, request.longitude, _find_chat_hospitals
+        )
+        try:
+            async for token in stream_chat_with_agent(request.session_id, request.message, nearby=lookup):
+                if ttfb_ms is None:
+                    ttfb_ms = round((time.perf_counter() - started) * 1000, 1)
+                yield _sse("token", {"token": token})
+
+            hospitals = await collect_nearby(lookup)
+
+            logger.debug("chat stream first token after %s ms", ttfb_ms)
+            yield _sse("done", {
+                "session_id": request.session_id,
+                "hospitals": hospitals,
+                "timestamp": datetime.now().isoformat(),
+                "ttfb_ms": ttfb_ms
+            })
+        except Exception as e:
+            print(f"Error in chat stream handler: {str(e)}")
+            yield _sse("error", {"detail": f"Chat error: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _find_chat_hospitals(latitude: float, longitude: float) -> list:
+    # Runs in a worker thread; most chats never need the maps service, so it is fetched here
+    return get_google_maps_service().find_nearby_hospitals(
+        latitude, longitude, radius=5000, limit=CHAT_HOSPITAL_LIMIT
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.aclose()
+    await run_in_threadpool(job_queue.shutdown)
+    if get_supabase_service.loaded:
+        await run_in_threadpool(get_supabase_service().close)
+    shutdown_logging()
+
+
 # -------------------------------
 # 📌 Run app
 # -------------------------------
 if __name__ == "__main__":
     import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=settings.port)
@@ -0,0 +1,246 @@
+# serve.py
+"""
+Multi-worker server. Imports the app and loads its read-only data (triage
+rules, patient index, clinic index and tiles) once, then forks
+WEB_CONCURRENCY uvicorn workers (default: one per CPU available to the
+container) that share the listening socket and that data, copy-on-write.
+With more than one worker, chat sessions and chat rate limits default to
+SQLite stores shared by every worker on the host.
+
+    python serve.py                     # PORT, HOST, WEB_CONCURRENCY, GRACEFUL_TIMEOUT
+
+SIGTERM / SIGINT: every worker stops accepting connections, finishes its
+in-flight requests (up to GRACEFUL_TIMEOUT seconds), flushes queued writes
+and exits. SIGHUP: rolling restart, one worker at a time; each replacement
+is serving before the worker it replaces starts draining. A worker that
+dies is replaced.
+"""
+import gc
+import math
+import os
+import select
+import signal
+import socket
+import threading
+import time
+
+import uvicorn
+
+from services.settings import get_settings  # loads .env first, so it wins over the defaults below
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by a container CPU quota (cgroup v2 or v1)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()[:2]
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def preload():
+    """Import the app and load shared read-only data before forking, then freeze it out of the GC."""
+    import main
+    from services.clinic_tiles import ensure_clinic_tiles
+    from services.patient_store import patient_store
+
+    patient_store.reload()
+    main.get_google_maps_service()  # builds the local clinic index
+    ensure_clinic_tiles(wait=True)
+    # Objects that exist now are never scanned by the collector, so workers don't
+    # dirty (and copy) the pages they share with the parent just by running GC
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+class Worker(uvicorn.Server):
+    """A uvicorn server that reports when it is serving and exits if the arbiter dies."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int, parent: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        self.parent = parent
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        try:
+            if self.started and not self.should_exit:
+                os.write(self.ready_fd, b"1")
+        except BrokenPipeError:
+            pass  # the arbiter isn't waiting for this one
+        os.close(self.ready_fd)
+        threading.Thread(target=self._watch_parent, daemon=True).start()
+
+    def _watch_parent(self):
+        while not self.should_exit:
+            if os.getppid() != self.parent:
+                self.should_exit = True  # drain and exit rather than linger as an orphan
+            time.sleep(1)
+
+
+class Arbiter:
+    """Forks, supervises and drains the uvicorn workers."""
+
+    def __init__(self, app, workers: int, host: str, port: int, graceful_timeout: float):
+        self.app = app
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.socket = socket.create_server((host, port), backlog=2048)
+        self.children = {}  # pid -> worker index
+        self.retiring = set()
+        self.signals = []
+        self.pid = os.getpid()
+
+    def run(self):
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda signum, frame: self.signals.append(signum))
+        host, port = self.socket.getsockname()[:2]
+        print(f"✅ Serving on http://{host}:{port} with {self.workers} workers (pid {self.pid})")
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while True:
+            if self.signals:
+                signum = self.signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.rolling_restart()
+                    continue
+                break
+            self.reap()
+            time.sleep(0.2)
+        self.stop(list(self.children))
+        print("Server stopped")
+
+    def spawn(self, index: int, wait: bool = False):
+        """Fork worker `index`; with `wait`, return its pid only once it is serving (None if it failed)."""
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._serve(index, ready_w)
+        os.close(ready_w)
+        self.children[pid] = index
+        if not wait:
+            os.close(ready_r)
+            return pid
+        readable, _, _ = select.select([ready_r], [], [], 60)
+        ready = bool(readable) and os.read(ready_r, 1) == b"1"
+        os.close(ready_r)
+        if not ready:
+            print(f"⚠️ Worker {index} (pid {pid}) failed to start")
+            self.stop([pid])
+            return None
+        return pid
+
+    def _serve(self, index: int, ready_fd: int):
+        # In the child: never returns
+        code = 1
+        try:
+            os.setpgid(0, 0)  # a terminal's Ctrl-C reaches the arbiter only, which drains us once
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            if index:
+                # One worker pre-renders the voice alerts; the audio cache is shared on disk
+                get_settings().voice_warmup = False
+
+            server = Worker(
+                uvicorn.Config(self.app, lifespan="on", timeout_graceful_shutdown=self.graceful_timeout),
+                ready_fd, self.pid
+            )
+            server.run(sockets=[self.socket])
+            code = 0 if server.started else 3
+        finally:
+            os._exit(code)
+
+    def reap(self):
+        """Collect exited workers; replace any that were not asked to stop."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index = self.children.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif index is not None:
+                print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}; restarting")
+                time.sleep(1)  # don't spin if it fails at startup
+                self.spawn(index)
+
+    def rolling_restart(self):
+        for old, index in list(self.children.items()):
+            if self.spawn(index, wait=True) is None:
+                print("⚠️ Rolling restart aborted; remaining workers keep serving")
+                return
+            self.stop([old])
+        print(f"✅ Restarted {self.workers} workers")
+
+    def stop(self, pids: list):
+        """SIGTERM (drain), then SIGKILL whatever hasn't exited after the graceful timeout."""
+        self.retiring.update(pids)
+        for pid in pids:
+            _signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.retiring.discard(pid)
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+        for pid in remaining:
+            print(f"⚠️ Worker pid {pid} did not drain in time; killing it")
+            _signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.retiring.discard(pid)
+            self.children.pop(pid, None)
+
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def main():
+    # Read before Settings is built, so the shared-store defaults below are seen by it
+    workers = int(os.getenv("WEB_CONCURRENCY", 0)) or available_cpus()
+    if workers > 1:
+        # Mutable state every worker must see
+        os.environ.setdefault("SESSION_STORE", "sqlite")
+        os.environ.setdefault("RATE_LIMIT_STORE", "sqlite")
+    settings = get_settings()
+    app = preload()
+    Arbiter(app, workers, settings.host, settings.port, settings.graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from services.settings import Settings, get_settings
+
+# Path prefix -> lane. Triage is the life-critical path and always has capacity reserved.
+LANES = (
+    ("/api/analyze-symptoms", "triage"),
+    ("/api/chat/message", "chat"),
+    ("/api/nearby-clinics", "maps"),
+    ("/api/geocode", "maps"),
+)
+
+
+class Overloaded(Exception):
+    """Refuse a request now rather than queue it; answered as 429 with Retry-After."""
+
+    def __init__(self, retry_after: float, reason: str = "overloaded"):
+        super().__init__(f"{reason}, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> float:
+        """Add the tokens earned since the last call; returns 0 if one can be spent, else seconds until one can."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token buckets per key (patient, session), `rate` requests per second
+    with bursts of `burst`. Only the `max_keys` most recently seen keys are
+    tracked; an evicted key starts again with a full bucket. Async callers
+    run `check` of a `blocking` limiter in a worker thread.
+    """
+    blocking = False
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def check(self, *keys: Optional[str]):
+        """
+        Spend a token from every key's bucket, or from none: if any bucket
+        is empty, raises Overloaded and the other buckets keep their tokens.
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = [(key, self._bucket(key)) for key in filter(None, keys)]
+            for key, bucket in buckets:
+                wait = bucket.refill(now)
+                if wait:
+                    self.rejected += 1
+                    raise Overloaded(wait, reason=f"rate limit exceeded for {key.split(':')[0]}")
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    The same token buckets kept in a local SQLite database (WAL), so every
+    worker process on the host draws from one bucket per key instead of
+    each granting its own burst. Buckets idle long enough to be full again
+    are swept periodically.
+    """
+    blocking = True
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+
+    def __init__(self, path: str, rate: float, burst: float, sweep_interval: float = 60.0):
+        super().__init__(rate, burst)
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._local = threading.local()
+        self._conn().execute(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, and never one inherited across fork()
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def check(self, *keys: Optional[str]):
+        now = time.time()  # wall clock: shared by every process
+        conn = self._conn()
+        wait, refused = 0.0, None
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            balances = []
+            for key in filter(None, keys):
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                # Same refill as TokenBucket.refill
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                if tokens < 1 and refused is None:
+                    wait, refused = (1 - tokens) / self.rate, key
+                balances.append((key, tokens))
+            # All or nothing: spend from every bucket only if every bucket has a token
+            conn.executemany("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                             [(key, tokens if refused else tokens - 1, now) for key, tokens in balances])
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.burst / self.rate,))
+        if refused:
+            self.rejected += 1
+            raise Overloaded(wait, reason=f"rate limit exceeded for {refused.split(':')[0]}")
+
+
+class AdmissionController:
+    """
+    Concurrency caps per lane. Non-triage lanes share `max_inflight -
+    triage_reserve` slots (each also capped on its own); triage may use
+    every slot, so a chat or maps surge can never starve it.
+    """
+
+    def __init__(self, max_inflight: int, triage_reserve: int, lane_limits: Dict[str, int]):
+        self.max_inflight = max_inflight
+        self.triage_reserve = triage_reserve
+        self.lane_limits = lane_limits
+        self.inflight = {"triage": 0}
+        self.inflight.update({lane: 0 for lane in lane_limits})
+        self.rejected = {lane: 0 for lane in self.inflight}
+        self._lock = threading.Lock()
+
+    def enter(self, lane: str):
+        with self._lock:
+            total = sum(self.inflight.values())
+            if lane == "triage":
+                admitted = total < self.max_inflight
+            else:
+                others = total - self.inflight["triage"]
+                admitted = (self.inflight[lane] < self.lane_limits[lane]
+                            and others < self.max_inflight - self.triage_reserve)
+            if not admitted:
+                self.rejected[lane] += 1
+                raise Overloaded(1.0, reason=f"{lane} capacity full")
+            self.inflight[lane] += 1
+
+    def leave(self, lane: str):
+        with self._lock:
+            self.inflight[lane] -= 1
+
+    def metrics(self) -> dict:
+        return {lane: {"inflight": self.inflight[lane], "rejected": self.rejected[lane],
+                       "limit": self.lane_limits.get(lane, self.max_inflight)} for lane in self.inflight}
+
+
+def lane_for(path: str) -> Optional[str]:
+    for prefix, lane in LANES:
+        if path.startswith(prefix):
+            return lane
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware that sheds load before any handler work: a request
+    whose lane is full gets 429 with Retry-After straight away instead of
+    waiting for a worker thread and timing out inside the handler.
+    """
+
+    def __init__(self, app, controller: "AdmissionController" = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        # OPTIONS (CORS preflights) does no handler work, so it takes no lane slot
+        lane = lane_for(scope["path"]) if scope["type"] == "http" and scope["method"] != "OPTIONS" else None
+        if lane is None:
+            return await self.app(scope, receive, send)
+        try:
+            self.controller.enter(lane)
+        except Overloaded as e:
+            return await send_overloaded(send, e)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.leave(lane)
+
+
+async def send_overloaded(send, error: Overloaded):
+    body = json.dumps({"detail": error.reason, "retry_after": max(1, math.ceil(error.retry_after))}).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    headers.extend((k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in error.headers().items())
+    await send({"type": "http.response.start", "status": 429, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _build(settings: Settings) -> Tuple[AdmissionController, RateLimiter]:
+    controller = AdmissionController(
+        max_inflight=settings.admission_max_inflight,
+        triage_reserve=settings.admission_triage_reserve,
+        lane_limits={"chat": settings.admission_chat_max, "maps": settings.admission_maps_max}
+    )
+    rate = settings.chat_rate_per_minute / 60
+    if settings.rate_limit_store == "sqlite":
+        path = settings.rate_limit_db_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "rate_limits.db"
+        )
+        limiter = SQLiteRateLimiter(path, rate=rate, burst=settings.chat_burst)
+    else:
+        limiter = RateLimiter(rate=rate, burst=settings.chat_burst)
+    return controller, limiter
+
+
+# ✅ Export singletons
+admission, chat_limiter = _build(get_settings())
@@ -0,0 +1,198 @@
+import csv
+import heapq
+import json
+import os
+from math import cos, floor, radians
+from typing import Dict, List, Optional, Tuple
+
+from services.geo import KM_PER_DEGREE, as_coords, haversine_km, nearest_k_batch
+from services.settings import get_settings
+
+DEFAULT_CLINICS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "clinic_locations.jsonl"
+)
+
+
+class Clinic:
+    """One row of the clinic_locations dataset."""
+    __slots__ = ("name", "address", "lat", "lng", "rating", "user_ratings_total", "phone", "facility_type")
+
+    def __init__(self, name, address, lat, lng, rating="N/A", user_ratings_total=0,
+                 phone=None, facility_type=None):
+        self.name = name
+        self.address = address
+        self.lat = float(lat)
+        self.lng = float(lng)
+        self.rating = rating if rating not in (None, "") else "N/A"
+        self.user_ratings_total = int(user_ratings_total or 0)
+        self.phone = phone
+        self.facility_type = facility_type
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "Clinic":
+        return cls(
+            name=row.get("name"),
+            address=row.get("address") or row.get("vicinity"),
+            lat=row["latitude"] if "latitude" in row else row["lat"],
+            lng=row["longitude"] if "longitude" in row else row["lng"],
+            rating=row.get("rating"),
+            user_ratings_total=row.get("user_ratings_total"),
+            phone=row.get("phone"),
+            facility_type=row.get("facility_type") or row.get("type")
+        )
+
+    def to_hospital(self, distance_km: float) -> dict:
+        """Same shape as the hospitals returned by GoogleMapsService."""
+        return {
+            "name": self.name,
+            "address": self.address,
+            "rating": self.rating,
+            "user_ratings_total": self.user_ratings_total,
+            "location": {"lat": self.lat, "lng": self.lng},
+            "distance_km": round(distance_km, 2)
+        }
+
+
+class ClinicIndex:
+    """
+    Uniform lat/lng grid over the clinic dataset. A query only visits the
+    cells that can hold an answer, and candidates are ranked by exact
+    haversine distance. Cells are `cell_deg` degrees on a side (0.05° is
+    about 5.5 km at the equator). Longitude wrap-around at ±180° is not
+    handled; the service area is nowhere near it.
+    """
+
+    def __init__(self, clinics: List[Clinic] = (), cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], List[Clinic]] = {}
+        self._count = 0
+        self._flat = None
+        for clinic in clinics:
+            self.add(clinic)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def add(self, clinic: Clinic):
+        self._cells.setdefault(self._cell(clinic.lat, clinic.lng), []).append(clinic)
+        self._count += 1
+        self._flat = None
+
+    def within(self, lat: float, lng: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[float, Clinic]]:
+        """All clinics within `radius_km`, nearest first, as (distance_km, clinic)."""
+        lat_cells = int(radius_km / (KM_PER_DEGREE * self.cell_deg)) + 1
+        lng_scale = max(cos(radians(min(abs(lat) + radius_km / KM_PER_DEGREE, 89.0))), 1e-6)
+        lng_cells = int(radius_km / (KM_PER_DEGREE * self.cell_deg * lng_scale)) + 1
+
+        row, col = self._cell(lat, lng)
+        found = []
+        for r in range(row - lat_cells, row + lat_cells + 1):
+            for c in range(col - lng_cells, col + lng_cells + 1):
+                for clinic in self._cells.get((r, c), ()):
+                    distance = haversine_km(lat, lng, clinic.lat, clinic.lng)
+                    if distance <= radius_km:
+                        found.append((distance, clinic))
+
+        if limit is not None:
+            return heapq.nsmallest(limit, found, key=lambda item: item[0])
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, lat: float, lng: float, k: int = 5,
+                max_radius_km: float = 200.0) -> List[Tuple[float, Clinic]]:
+        """
+        The k nearest clinics, nearest first. Rings of cells are searched
+        outward until the k-th best distance is closer than anything an
+        unsearched ring could hold.
+        """
+        row, col = self._cell(lat, lng)
+        best = []  # max-heap of (-distance, tiebreak, clinic)
+        ring = 0
+        max_ring = int(max_radius_km / (KM_PER_DEGREE * self.cell_deg)) + 1
+        while ring <= max_ring:
+            for r, c in _ring_cells(row, col, ring):
+                for clinic in self._cells.get((r, c), ()):
+                    distance = haversine_km(lat, lng, clinic.lat, clinic.lng)
+                    if distance > max_radius_km:
+                        continue
+                    item = (-distance, id(clinic), clinic)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, item)
+
+            # Anything outside rings 0..ring is at least `ring` cells away from the query point
+            lng_scale = cos(radians(min(abs(lat) + (ring + 1) * self.cell_deg, 89.0)))
+            bound_km = ring * self.cell_deg * KM_PER_DEGREE * lng_scale
+            if len(best) == k and -best[0][0] <= bound_km:
+                break
+            ring += 1
+
+        return sorted(((-d, clinic) for d, _, clinic in best), key=lambda item: item[0])
+
+    def nearest_many(self, points: List[Tuple[float, float]], k: int = 5) -> List[List[Tuple[float, Clinic]]]:
+        """
+        k nearest clinics for each (lat, lng) in `points`, e.g. every patient
+        in a district report. Computed as one vectorized distance matrix
+        (chunked) over all clinics rather than one grid search per point.
+        """
+        if not points or not self._count:
+            return [[] for _ in points]
+        if self._flat is None:
+            clinics = [clinic for cell in self._cells.values() for clinic in cell]
+            self._flat = (clinics, as_coords([c.lat for c in clinics]), as_coords([c.lng for c in clinics]))
+        clinics, lats, lngs = self._flat
+
+        indices, distances = nearest_k_batch(
+            [lat for lat, _ in points], [lng for _, lng in points], lats, lngs, k
+        )
+        return [
+            [(float(d), clinics[i]) for i, d in zip(row_indices, row_distances)]
+            for row_indices, row_distances in zip(indices, distances)
+        ]
+
+
+def _ring_cells(row: int, col: int, ring: int):
+    if ring == 0:
+        yield row, col
+        return
+    for c in range(col - ring, col + ring + 1):
+        yield row - ring, c
+        yield row + ring, c
+    for r in range(row - ring + 1, row + ring):
+        yield r, col - ring
+        yield r, col + ring
+
+
+def load_clinics(path: str) -> List[Clinic]:
+    """Read a clinic_locations export (.json list, .jsonl or .csv)."""
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            return [Clinic.from_dict(row) for row in csv.DictReader(f)]
+    with open(path) as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            return [Clinic.from_dict(json.loads(line)) for line in f if line.strip()]
+        return [Clinic.from_dict(row) for row in json.load(f)]
+
+
+def clinic_data_path() -> str:
+    """CLINIC_DATA_PATH, or the bundled export under data/."""
+    return get_settings().clinic_data_path or DEFAULT_CLINICS_PATH
+
+
+def build_clinic_index(path: str = None) -> ClinicIndex:
+    path = path or clinic_data_path()
+    try:
+        index = ClinicIndex(load_clinics(path))
+        print(f"✅ Clinic index loaded: {len(index)} clinics from {path}")
+        return index
+    except FileNotFoundError:
+        print("Clinic dataset not found - nearby search will use Google Maps only")
+        return ClinicIndex()
+    except Exception as e:
+        print(f"⚠️ Failed to load clinic dataset: {e}")
+        return ClinicIndex()
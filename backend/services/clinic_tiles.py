@@ -0,0 +1,314 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.clinic_index import Clinic, clinic_data_path, load_clinics
+from services.geo import _GEOHASH_BASE32, geohash_bounds, geohash_encode
+from services.job_queue import PRIORITY, job_queue
+from services.settings import get_settings
+
+# Optional: brotli is ~15% smaller than gzip on tiles; gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_TILES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tiles"
+)
+
+# Column order of each clinic row in a tile
+FIELDS = ["name", "address", "lat", "lng", "rating", "user_ratings_total", "phone", "facility_type"]
+
+# Clients keep a tile for a day, then revalidate (a 304 while the dataset is unchanged);
+# offline they may keep using it for a week
+CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800, stale-if-error=604800"
+
+# How often (seconds) a manifest request may stat the dataset to see whether it changed
+DATASET_CHECK_INTERVAL = 60.0
+
+
+def encode_tile(geohash: str, clinics: List[Clinic]) -> bytes:
+    """Compact JSON: column names once, then one row per clinic, sorted so rebuilds are byte-identical."""
+    rows = sorted(
+        [c.name, c.address, round(c.lat, 5), round(c.lng, 5), c.rating, c.user_ratings_total,
+         c.phone, c.facility_type]
+        for c in clinics
+    )
+    return json.dumps(
+        {"v": 1, "geohash": geohash, "bounds": geohash_bounds(geohash), "fields": FIELDS, "clinics": rows},
+        separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+class Tile:
+    __slots__ = ("geohash", "etag", "count", "gzip", "brotli")
+
+    def __init__(self, geohash: str, etag: str, count: int, gzip_body: bytes, brotli_body: Optional[bytes]):
+        self.geohash = geohash
+        self.etag = etag
+        self.count = count
+        self.gzip = gzip_body
+        self.brotli = brotli_body
+
+    @staticmethod
+    def etag_for(raw: bytes) -> str:
+        return '"%s"' % hashlib.sha256(raw).hexdigest()[:20]
+
+    @classmethod
+    def from_raw(cls, geohash: str, raw: bytes, count: int) -> "Tile":
+        return cls(
+            geohash,
+            cls.etag_for(raw),
+            count,
+            gzip.compress(raw, compresslevel=9, mtime=0),
+            brotli.compress(raw, quality=11) if brotli else None
+        )
+
+    @classmethod
+    def empty(cls, geohash: str) -> "Tile":
+        """
+        A region without clinics. Any valid geohash can be asked for, so these
+        are made per request and never cached: fast gzip, no brotli, and an
+        ETag from the geohash alone (the only thing that varies).
+        """
+        raw = encode_tile(geohash, [])
+        return cls(geohash, '"v1-empty-%s"' % geohash, 0, gzip.compress(raw, compresslevel=1, mtime=0), None)
+
+
+class ClinicTiles:
+    """
+    The clinic dataset cut into tiles by geohash prefix (`precision` 4 is
+    about 39 x 20 km), each stored pre-compressed (gzip, plus brotli when
+    installed) with a content-hash ETag. Clients download the tiles around
+    them once and search them locally; afterwards a revalidation is a 304
+    with no body, and nothing is looked up on the server.
+
+    Tiles are built by a background job and written to `directory`, so a
+    restart reloads them instead of rebuilding while the dataset is
+    unchanged. `refresh_clinic_tiles` queues a rebuild when the dataset
+    file changes.
+    """
+
+    def __init__(self, precision: int = 4, directory: str = None):
+        self.precision = precision
+        self.directory = directory or DEFAULT_TILES_DIR
+        self._tiles: Dict[str, Tile] = {}
+        self._manifest: Optional[Tile] = None
+        # Dataset the tiles were built from (`dataset_source`), and its file's (size, mtime) when last checked
+        self.source: Optional[dict] = None
+        self.stamp: Optional[tuple] = None
+        self.next_check = 0.0
+        # Set when there is no dataset to build from, so clients get 404 rather than "try again"
+        self.unavailable: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._manifest is not None
+
+    def build(self, clinics: List[Clinic], source: dict = None) -> dict:
+        """Cut, encode and compress every tile, then swap them in and write them to disk."""
+        groups: Dict[str, List[Clinic]] = {}
+        for clinic in clinics:
+            groups.setdefault(geohash_encode(clinic.lat, clinic.lng, self.precision), []).append(clinic)
+        tiles = {gh: Tile.from_raw(gh, encode_tile(gh, members), len(members)) for gh, members in groups.items()}
+        manifest = self._encode_manifest(tiles, source or {})
+        with self._lock:
+            self._tiles, self._manifest, self.source = tiles, manifest, source
+        self._write(tiles, manifest)
+        print(f"✅ Clinic tiles built: {len(tiles)} tiles, {len(clinics)} clinics")
+        return {"tiles": len(tiles), "clinics": len(clinics),
+                "gzip_bytes": sum(len(t.gzip) for t in tiles.values())}
+
+    def _encode_manifest(self, tiles: Dict[str, Tile], source: dict) -> Tile:
+        raw = json.dumps({
+            "v": 1,
+            "precision": self.precision,
+            "source": source,
+            "tiles": {gh: {"etag": t.etag, "count": t.count} for gh, t in sorted(tiles.items())}
+        }, separators=(",", ":")).encode("utf-8")
+        return Tile.from_raw("manifest", raw, len(tiles))
+
+    def _write(self, tiles: Dict[str, Tile], manifest: Tile):
+        directory = os.path.join(self.directory, str(self.precision))
+        os.makedirs(directory, exist_ok=True)
+        for tile in list(tiles.values()) + [manifest]:
+            self._write_file(os.path.join(directory, tile.geohash + ".json.gz"), tile.gzip)
+            if tile.brotli is not None:
+                self._write_file(os.path.join(directory, tile.geohash + ".json.br"), tile.brotli)
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def load(self, source: dict = None) -> bool:
+        """
+        Reload tiles written by an earlier build; False if missing, corrupt or
+        built from another dataset. The stored gzip/brotli bodies are served
+        as they are, so a restart pays one gunzip per tile, not a recompression.
+        """
+        directory = os.path.join(self.directory, str(self.precision))
+        try:
+            manifest, raw = self._read_tile(directory, "manifest", 0)
+            info = json.loads(raw)
+            if source is not None and info.get("source") != source:
+                return False
+            manifest.count = len(info["tiles"])
+            tiles = {}
+            for gh, entry in info["tiles"].items():
+                tiles[gh], _ = self._read_tile(directory, gh, entry["count"])
+                if tiles[gh].etag != entry["etag"]:
+                    return False
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        with self._lock:
+            self._tiles, self._manifest = tiles, manifest
+            self.source = info.get("source")
+        print(f"✅ Clinic tiles loaded: {len(tiles)} tiles from {directory}")
+        return True
+
+    @staticmethod
+    def _read_tile(directory: str, name: str, count: int) -> Tuple[Tile, bytes]:
+        """A stored tile and its JSON; the ETag is checked against the JSON, not trusted from the manifest."""
+        with open(os.path.join(directory, name + ".json.gz"), "rb") as f:
+            gzip_body = f.read()
+        raw = gzip.decompress(gzip_body)
+        try:
+            with open(os.path.join(directory, name + ".json.br"), "rb") as f:
+                brotli_body = f.read()
+        except FileNotFoundError:
+            # Written before brotli was installed
+            brotli_body = brotli.compress(raw, quality=11) if brotli else None
+        return Tile(name, Tile.etag_for(raw), count, gzip_body, brotli_body), raw
+
+    def tile(self, geohash: str) -> Optional[Tile]:
+        """The tile containing `geohash` (any length >= precision), an empty tile for a region
+        without clinics, or None for an invalid geohash."""
+        geohash = geohash.lower()[:self.precision]
+        if len(geohash) < self.precision or any(c not in _GEOHASH_BASE32 for c in geohash):
+            return None
+        found = self._tiles.get(geohash)
+        return found if found is not None else Tile.empty(geohash)
+
+    def manifest(self) -> Optional[Tile]:
+        return self._manifest
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "precision": self.precision,
+            "tiles": len(self._tiles),
+            "clinics": sum(t.count for t in self._tiles.values()),
+            "gzip_bytes": sum(len(t.gzip) for t in self._tiles.values()),
+            "brotli": brotli is not None
+        }
+
+
+def respond(tile: Tile, accept_encoding: str, if_none_match: Optional[str]) -> Tuple[int, dict, bytes]:
+    """
+    (status, headers, body) for a tile request: 304 when the client's ETag
+    matches, else the pre-compressed body in the best encoding it accepts.
+    """
+    headers = {"ETag": tile.etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if if_none_match and (if_none_match.strip() == "*" or tile.etag in [t.strip() for t in if_none_match.split(",")]):
+        return 304, headers, b""
+    accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").lower().split(",")}
+    if tile.brotli is not None and "br" in accepted:
+        headers["Content-Encoding"] = "br"
+        return 200, headers, tile.brotli
+    if "gzip" in accepted or "*" in accepted:
+        headers["Content-Encoding"] = "gzip"
+        return 200, headers, tile.gzip
+    return 200, headers, gzip.decompress(tile.gzip)
+
+
+def dataset_source(path: str) -> dict:
+    """
+    Identifies a dataset version by content (it is published in the manifest,
+    so no server paths), so tiles built from another version are rebuilt.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"name": os.path.basename(path), "size": os.path.getsize(path), "sha256": digest.hexdigest()[:20]}
+
+
+def _file_stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_clinic_tiles(payload: dict) -> dict:
+    """
+    Job handler: (re)build the tiles from the clinic dataset. With
+    `if_changed`, tiles for the same content (the file was only touched, or
+    another worker already rebuilt them on disk) are kept or reloaded instead.
+    """
+    path = payload.get("path") or clinic_data_path()
+    clinic_tiles.stamp = _file_stamp(path)
+    source = dataset_source(path)
+    if payload.get("if_changed") and (source == clinic_tiles.source or clinic_tiles.load(source)):
+        return {"tiles": len(clinic_tiles._tiles), "rebuilt": False}
+    return clinic_tiles.build(load_clinics(path), source)
+
+
+def ensure_clinic_tiles(wait: bool = False):
+    """
+    Startup: reuse tiles on disk if they match the dataset, else queue a
+    rebuild (or, with `wait`, build them now). Workers forked by serve.py
+    find them already loaded.
+    """
+    if clinic_tiles.ready:
+        return None
+    path = clinic_data_path()
+    if not os.path.exists(path):
+        print("Clinic dataset not found - clinic tiles not built")
+        clinic_tiles.unavailable = "Clinic directory not available"
+        return None
+    clinic_tiles.stamp = _file_stamp(path)
+    clinic_tiles.next_check = time.monotonic() + DATASET_CHECK_INTERVAL
+    if clinic_tiles.load(dataset_source(path)):
+        return None
+    if wait:
+        return build_clinic_tiles({"path": path})
+    return job_queue.submit("clinic_tiles", {"path": path}, PRIORITY["BACKGROUND"])
+
+
+def refresh_clinic_tiles():
+    """
+    Queue a rebuild if the dataset file changed since the tiles were built.
+    Called on manifest requests; stats the file at most every
+    DATASET_CHECK_INTERVAL seconds, and the current tiles keep being served
+    until the new ones are swapped in.
+    """
+    now = time.monotonic()
+    if not clinic_tiles.ready or now < clinic_tiles.next_check:
+        return None
+    clinic_tiles.next_check = now + DATASET_CHECK_INTERVAL
+    path = clinic_data_path()
+    try:
+        stamp = _file_stamp(path)
+    except OSError:
+        return None
+    if stamp == clinic_tiles.stamp:
+        return None
+    clinic_tiles.stamp = stamp  # queued once per change
+    print("Clinic dataset changed - rebuilding clinic tiles")
+    return job_queue.submit("clinic_tiles", {"path": path, "if_changed": True}, PRIORITY["BACKGROUND"])
+
+
+# ✅ Export singleton
+clinic_tiles = ClinicTiles(
+    precision=get_settings().clinic_tile_precision,
+    directory=get_settings().clinic_tiles_dir
+)
+job_queue.register("clinic_tiles", build_clinic_tiles)
@@ -0,0 +1,153 @@
+import heapq
+from importlib.util import find_spec
+from math import radians, cos, sin, asin, sqrt
+
+# Optional: vectorized distance/ranking for large candidate sets. Imported by the
+# batch functions on first use, so importing the app doesn't pay for NumPy (~95 ms)
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+
+# Below this many candidates plain Python beats NumPy's per-call overhead
+VECTORIZE_MIN = 32
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance (km) between two coordinates, unrounded."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def as_coords(values):
+    """Coordinates in the form the batch functions work on fastest."""
+    if not NUMPY_AVAILABLE:
+        return list(values)
+    import numpy as np
+    return np.asarray(values, dtype=np.float64)
+
+
+def haversine_km_many(lat: float, lon: float, lats, lons):
+    """Distances (km) from one point to arrays of candidate coordinates."""
+    if not NUMPY_AVAILABLE:
+        return [haversine_km(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+    import numpy as np
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def nearest_k(lat: float, lon: float, lats, lons, k: int, max_km: float = None):
+    """
+    Indices and distances of the k nearest candidates, nearest first.
+    argpartition selects the k in O(n); only those k are sorted.
+    """
+    if not NUMPY_AVAILABLE or len(lats) < VECTORIZE_MIN:
+        distances = (haversine_km(lat, lon, la, lo) for la, lo in zip(lats, lons))
+        ranked = heapq.nsmallest(
+            k, ((d, i) for i, d in enumerate(distances) if max_km is None or d <= max_km)
+        )
+        return [i for _, i in ranked], [d for d, _ in ranked]
+
+    import numpy as np
+    distances = haversine_km_many(lat, lon, lats, lons)
+    candidates = np.arange(len(distances))
+    if max_km is not None:
+        candidates = np.flatnonzero(distances <= max_km)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+    order = candidates[np.argsort(distances[candidates], kind="stable")]
+    return order.tolist(), distances[order].tolist()
+
+
+def nearest_k_batch(query_lats, query_lons, lats, lons, k: int, chunk_cells: int = 4_000_000):
+    """
+    k nearest candidates for every query point, as (Q, k) index and distance
+    arrays (or lists of lists without NumPy). Queries are processed in chunks
+    so the Q x N distance matrix never exceeds `chunk_cells` entries.
+    """
+    if not NUMPY_AVAILABLE:
+        results = [nearest_k(qa, qo, lats, lons, k) for qa, qo in zip(query_lats, query_lons)]
+        return [r[0] for r in results], [r[1] for r in results]
+
+    import numpy as np
+    query_lats = np.radians(np.asarray(query_lats, dtype=np.float64))[:, None]
+    query_lons = np.radians(np.asarray(query_lons, dtype=np.float64))[:, None]
+    lats = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+    lons = np.radians(np.asarray(lons, dtype=np.float64))[None, :]
+    cos_lats = np.cos(lats)
+    k = min(k, lats.shape[1])
+
+    step = max(chunk_cells // max(lats.shape[1], 1), 1)
+    all_indices, all_distances = [], []
+    for start in range(0, len(query_lats), step):
+        qlat = query_lats[start:start + step]
+        qlon = query_lons[start:start + step]
+        a = np.sin((lats - qlat) / 2) ** 2 + np.cos(qlat) * cos_lats * np.sin((lons - qlon) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        if k < distances.shape[1]:
+            part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+        part_distances = np.take_along_axis(distances, part, axis=1)
+        order = np.argsort(part_distances, axis=1, kind="stable")
+        all_indices.append(np.take_along_axis(part, order, axis=1))
+        all_distances.append(np.take_along_axis(part_distances, order, axis=1))
+    return np.vstack(all_indices), np.vstack(all_distances)
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """Standard geohash; precision 6 is a cell of roughly 1.2 km x 0.6 km."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> tuple:
+    """(min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def geohash_center(geohash: str) -> tuple:
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
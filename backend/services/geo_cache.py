@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from services.geo import geohash_encode
+
+# Upstream lookups are made with the smallest bucket covering the requested radius (meters)
+RADIUS_BUCKETS = (1000, 2000, 5000, 10000, 20000, 50000)
+
+
+def radius_bucket(radius: int) -> int:
+    for bucket in RADIUS_BUCKETS:
+        if radius <= bucket:
+            return bucket
+    return radius
+
+
+def nearby_key(latitude: float, longitude: float, radius: int, precision: int = 6) -> tuple:
+    return ("nearby", geohash_encode(latitude, longitude, precision), radius_bucket(radius))
+
+
+def normalize_address(address: str) -> str:
+    return " ".join(address.casefold().replace(",", " ").split())
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU with TTL, stale-while-revalidate and request coalescing.
+
+    - Fresh entries (younger than `ttl`) are returned directly.
+    - Stale entries (up to `ttl + stale_ttl`) are returned immediately while
+      one background refresh replaces them.
+    - Concurrent misses for the same key share a single upstream call: the
+      first caller fetches, the rest wait on its result.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 3600.0, stale_ttl: float = 6 * 3600.0,
+                 cacheable: Callable[[Any], bool] = lambda value: True, refresh_workers: int = 2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cacheable = cacheable
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                      "refreshes": 0, "evictions": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = Future()
+                        self.stats["refreshes"] += 1
+                        self._refresher.submit(self._fetch, key, fetch, self._inflight[key])
+                    return value
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+                owner = True
+
+        if owner:
+            self._fetch(key, fetch, future)
+        return future.result()
+
+    def _fetch(self, key: Hashable, fetch: Callable[[], Any], future: Future):
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            if self.cacheable(value):
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"] + self.stats["coalesced"]
+        served = lookups - self.stats["misses"]
+        return dict(self.stats, entries=len(self), hit_ratio=round(served / lookups, 4) if lookups else None)
@@ -1,39 +1,54 @@
-import googlemaps
-import os
-from dotenv import load_dotenv
-from math import radians, cos, sin, asin, sqrt
 import requests
-
-load_dotenv()
+from services.clinic_index import build_clinic_index
+from services.geo import geohash_bounds, geohash_center, haversine_km, nearest_k
+from services.geo_cache import ResponseCache, nearby_key, normalize_address
+from services.metrics import PROVIDER_CALLS, stage
+from services.serialization import Encoded, EncodedList, encode_list
+from services.settings import Lazy, Settings, get_settings
 
 class GoogleMapsService:
-    def __init__(self):
-        self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-        self.ai_ml_key = os.getenv("AI_ML_API_KEY", "9d0da856e8cc438c95e659b35e76a378")
-
-        if not self.api_key and not self.ai_ml_key:
-            raise ValueError("❌ Missing GOOGLE_MAPS_API_KEY or AI/ML_API_KEY in .env file")
+    def __init__(self, settings: Settings = None):
+        settings = settings or get_settings()
+        self.api_key = settings.google_maps_api_key
+        self.ai_ml_key = settings.ai_ml_api_key
+        self.ai_ml_url = settings.ai_ml_api_url
 
         if self.api_key:
-            self.client = googlemaps.Client(key=self.api_key)
+            import googlemaps  # only needed (and only imported) with a key
+            if settings.google_maps_base_url:
+                self.client = googlemaps.Client(key=self.api_key, base_url=settings.google_maps_base_url)
+            else:
+                self.client = googlemaps.Client(key=self.api_key)
         else:
+            # Local clinic index (+ AI/ML fallback) only; geocoding is unavailable
+            print("⚠️ GOOGLE_MAPS_API_KEY not set - Google Places and geocoding disabled")
             self.client = None
 
-    def _haversine_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate great-circle distance (km) between two coordinates."""
-        R = 6371
-        dlat = radians(lat2 - lat1)
-        dlon = radians(lon2 - lon1)
-        a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-        c = 2 * asin(sqrt(a))
-        return round(R * c, 2)
+        # Local clinic dataset; Google is only consulted where it is sparse
+        self.clinic_index = build_clinic_index(settings.clinic_data_path)
+        self.min_local_results = settings.min_local_clinics
+
+        # Callers in the same village share cached upstream answers
+        self.nearby_cache = ResponseCache(
+            max_entries=settings.maps_cache_size,
+            ttl=settings.maps_cache_ttl,
+            stale_ttl=6 * settings.maps_cache_ttl,
+            cacheable=bool
+        )
+        self.geocode_cache = ResponseCache(
+            max_entries=settings.maps_cache_size,
+            ttl=settings.geocode_cache_ttl,
+            stale_ttl=7 * 24 * 3600
+        )
 
     def _fallback_ai_ml(self, latitude: float, longitude: float, radius: int = 5000):
         """
         Use AI/ML API as fallback to suggest nearby hospitals.
         """
+        if not self.ai_ml_key:
+            return []
         try:
-            url = "https://api.aimlapi.com/v1/chat/completions"
+            url = self.ai_ml_url
             headers = {"Authorization": f"Bearer {self.ai_ml_key}"}
             payload = {
                 "model": "gpt-4o-mini",
@@ -68,15 +83,89 @@ class GoogleMapsService:
                             "distance_km": 0.0,
                         }
                     )
+            PROVIDER_CALLS.inc("ai_ml_places", "success")
             return hospitals[:5] if hospitals else []
         except Exception as e:
+            PROVIDER_CALLS.inc("ai_ml_places", "failure")
             print(f"❌ AI/ML fallback failed: {e}")
             return []
 
-    def find_nearby_hospitals(self, latitude: float, longitude: float, radius: int = 5000):
+    def find_local_hospitals(self, latitude: float, longitude: float, radius: int = 5000):
+        """Clinics from the local index within `radius` meters, nearest first."""
+        return [
+            clinic.to_hospital(distance_km)
+            for distance_km, clinic in self.clinic_index.within(latitude, longitude, radius / 1000)
+        ]
+
+    def find_nearby_hospitals(self, latitude: float, longitude: float, radius: int = 5000,
+                              limit: int = None):
+        """
+        Nearby hospitals, cached per geohash cell and radius bucket. The
+        upstream lookup is centered on the cell and widened to cover every
+        point in it; cached lists are re-ranked by exact distance from the
+        caller, trimmed to the requested radius and to the nearest `limit`.
+        """
+        with stage("maps"):
+            hospitals = self._nearby_cached(latitude, longitude, radius)
+            return self.rank_by_distance(latitude, longitude, hospitals, max_km=radius / 1000, limit=limit)
+
+    def encode_nearby_hospitals(self, latitude: float, longitude: float, radius: int = 5000,
+                                limit: int = None) -> Encoded:
+        """
+        `find_nearby_hospitals` as a JSON array. Each cached hospital is
+        encoded once; only its distance from this caller is encoded per request.
         """
-        Try Google Maps first, fallback to AI/ML API if fails.
+        with stage("maps"):
+            hospitals = self._nearby_cached(latitude, longitude, radius)
+            return encode_list(
+                hospitals.encode_item(i, distance_km=round(d, 2))
+                for i, d in self._nearest(latitude, longitude, hospitals, max_km=radius / 1000, limit=limit)
+            )
+
+    def _nearby_cached(self, latitude: float, longitude: float, radius: int) -> EncodedList:
+        key = nearby_key(latitude, longitude, radius)
+        _, cell, bucket = key
+        center_lat, center_lng = geohash_center(cell)
+        min_lat, min_lng, _, _ = geohash_bounds(cell)
+        half_diagonal_m = haversine_km(center_lat, center_lng, min_lat, min_lng) * 1000
+        fetch_radius = min(int(bucket + half_diagonal_m) + 1, 50000)
+        return self.nearby_cache.get_or_fetch(key, lambda: EncodedList(
+            self._find_nearby_uncached(center_lat, center_lng, fetch_radius), volatile=("distance_km",)
+        ))
+
+    def rank_by_distance(self, latitude: float, longitude: float, hospitals: list,
+                         max_km: float = None, limit: int = None) -> list:
         """
+        Recompute distance_km from the given point and return the nearest
+        first (top `limit` only, if given). Large lists are ranked in one
+        vectorized pass with argpartition instead of a full sort.
+        """
+        return [dict(hospitals[i], distance_km=round(d, 2))
+                for i, d in self._nearest(latitude, longitude, hospitals, max_km, limit)]
+
+    def _nearest(self, latitude: float, longitude: float, hospitals: list,
+                 max_km: float = None, limit: int = None):
+        """(index, distance km) of the nearest hospitals, nearest first."""
+        if not hospitals or limit == 0:
+            return []
+        indices, distances = nearest_k(
+            latitude, longitude,
+            [h["location"]["lat"] for h in hospitals],
+            [h["location"]["lng"] for h in hospitals],
+            len(hospitals) if limit is None else limit,
+            max_km
+        )
+        return zip(indices, distances)
+
+    def _find_nearby_uncached(self, latitude: float, longitude: float, radius: int = 5000):
+        """
+        Use the local clinic index when it has enough coverage, otherwise try
+        Google Maps (merged with any local hits), fallback to AI/ML API if fails.
+        """
+        local = self.find_local_hospitals(latitude, longitude, radius)
+        if len(local) >= self.min_local_results:
+            return local
+
         if self.client:
             try:
                 results = self.client.places_nearby(
@@ -85,30 +174,59 @@ class GoogleMapsService:
                     type="hospital"
                 )
 
-                hospitals = []
-                for place in results.get("results", []):
-                    loc = place["geometry"]["location"]
-                    distance_km = self._haversine_distance(
-                        latitude, longitude, loc["lat"], loc["lng"]
-                    )
-
-                    hospitals.append({
+                hospitals = [
+                    {
                         "name": place.get("name"),
                         "address": place.get("vicinity"),
                         "rating": place.get("rating", "N/A"),
                         "user_ratings_total": place.get("user_ratings_total", 0),
-                        "location": loc,
-                        "distance_km": distance_km
-                    })
+                        "location": place["geometry"]["location"]
+                    }
+                    for place in results.get("results", [])
+                ]
 
-                hospitals.sort(key=lambda h: h["distance_km"])
-                return hospitals
+                PROVIDER_CALLS.inc("google_places", "success")
+                known = {h["name"] for h in hospitals}
+                hospitals.extend(h for h in local if h["name"] not in known)
+                return self.rank_by_distance(latitude, longitude, hospitals)
             except Exception as e:
+                PROVIDER_CALLS.inc("google_places", "failure")
                 print(f"⚠️ Google Maps API failed: {e}")
 
+        if local:
+            return local
+
         # fallback
         return self._fallback_ai_ml(latitude, longitude, radius)
 
+    def geocode(self, address: str):
+        """Geocode an address, cached by its normalized form. None if not found."""
+        if not self.client:
+            raise RuntimeError("Google Maps client not configured")
+        with stage("geocode"):
+            return self.geocode_cache.get_or_fetch(
+                ("geocode", normalize_address(address)), lambda: self._geocode_uncached(address)
+            )
+
+    def _geocode_uncached(self, address: str):
+        try:
+            geocode_result = self.client.geocode(address)
+            PROVIDER_CALLS.inc("google_geocode", "success")
+        except Exception:
+            PROVIDER_CALLS.inc("google_geocode", "failure")
+            raise
+        if geocode_result:
+            location = geocode_result[0]['geometry']['location']
+            return {
+                "latitude": location['lat'],
+                "longitude": location['lng'],
+                "formatted_address": geocode_result[0]['formatted_address']
+            }
+        return None
+
+    def cache_metrics(self) -> dict:
+        return {"nearby": self.nearby_cache.metrics(), "geocode": self.geocode_cache.metrics()}
+
 
-# ✅ Export singleton
-google_maps_service = GoogleMapsService()
+# ✅ Export provider: built on first use
+get_google_maps_service = Lazy(GoogleMapsService)
@@ -0,0 +1,228 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from services.settings import get_settings
+
+# Lower runs first; triage alerts use the diagnosis risk
+PRIORITY = {"HIGH": 0, "MEDIUM": 1, "LOW": 2, "BACKGROUND": 3}
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the backlog is at `max_pending`; retry later."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"job queue full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    __slots__ = ("id", "kind", "payload", "priority", "attempts", "status", "result", "error",
+                 "created_at", "finished_at", "_done")
+
+    def __init__(self, kind: str, payload: dict, priority: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.attempts = 0
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def wait(self, timeout: float = None) -> Any:
+        """Block until the job finishes; returns its result or raises its last error."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"job {self.id} still {self.status}")
+        if self.status == "failed":
+            raise RuntimeError(self.error)
+        return self.result
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobStore:
+    """
+    Where job records live between submit() and status polling. The
+    in-memory store keeps the most recent `max_jobs`; a durable store
+    (e.g. SQLite, like SQLiteSessionStore) only needs the same three methods.
+    """
+
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self._jobs.move_to_end(job.id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+
+class JobQueue:
+    """
+    In-process background jobs for slow side effects (voice alerts,
+    persistence). A fixed pool of worker threads takes the highest-priority
+    ready job; failures are retried with exponential backoff and jitter.
+    submit() raises QueueFull past `max_pending` instead of letting the
+    backlog (and memory) grow without bound.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 1000, max_attempts: int = 3,
+                 backoff: float = 0.5, store: JobStore = None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.store = store or JobStore()
+        self._handlers: Dict[str, Callable[[dict], Any]] = {}
+        self._ready = []    # (priority, seq, job)
+        self._delayed = []  # (run_at, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._running = 0
+        self._stopping = False
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0, "rejected": 0}
+
+    def register(self, kind: str, handler: Callable[[dict], Any]):
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, payload: dict, priority: int = PRIORITY["LOW"]) -> Job:
+        if kind not in self._handlers:
+            raise KeyError(f"no handler registered for job kind '{kind}'")
+        job = Job(kind, payload, priority)
+        with self._cond:
+            if self.pending() >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise QueueFull(retry_after=max(1.0, self.backoff * self.max_attempts))
+            self._start_workers()
+            heapq.heappush(self._ready, (priority, next(self._seq), job))
+            self.stats["submitted"] += 1
+            self._cond.notify()
+        self.store.save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def pending(self) -> int:
+        return len(self._ready) + len(self._delayed)
+
+    def _start_workers(self):
+        # Called with the condition held; threads start on first use so importing stays cheap.
+        # Threads don't survive fork(), so a forked worker starts its own.
+        if self._stopping or (self._threads and self._pid == os.getpid()):
+            return
+        self._threads, self._pid = [], os.getpid()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, seq, job = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (job.priority, seq, job))
+                if self._ready:
+                    self._running += 1
+                    return heapq.heappop(self._ready)[2]
+                if self._stopping:
+                    return None
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._cond.wait(timeout)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job.status = "running"
+            job.attempts += 1
+            try:
+                job.result = self._handlers[job.kind](job.payload)
+                job.status = "succeeded"
+            except Exception as e:
+                job.error = str(e)
+                if job.attempts < self.max_attempts and not self._stopping:
+                    delay = self.backoff * 2 ** (job.attempts - 1) * random.uniform(0.8, 1.2)
+                    job.status = "retrying"
+                    with self._cond:
+                        self.stats["retried"] += 1
+                        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), job))
+                        self._running -= 1
+                        self._cond.notify()
+                    continue
+                job.status = "failed"
+                print(f"⚠️ Job {job.kind} failed after {job.attempts} attempts: {e}")
+            with self._cond:
+                self._running -= 1
+                self.stats["succeeded" if job.status == "succeeded" else "failed"] += 1
+                self._cond.notify_all()
+            job.finished_at = time.time()
+            job._done.set()
+
+    def drain(self, timeout: float = None) -> bool:
+        """Wait until nothing is queued or running; True if drained in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.pending() or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 10.0):
+        """Finish queued work (retries are not rescheduled), then stop the workers."""
+        drained = self.drain(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        if not drained:
+            print(f"⚠️ Job queue stopped with {self.pending()} jobs pending")
+
+    def metrics(self) -> dict:
+        return dict(self.stats, pending=self.pending(), running=self._running, workers=self.workers)
+
+
+# ✅ Export singleton
+job_queue = JobQueue(
+    workers=get_settings().job_workers,
+    max_pending=get_settings().job_max_pending,
+    max_attempts=get_settings().job_max_attempts
+)
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import List, Optional
+
+import httpx
+
+from services.admission import Overloaded
+from services.metrics import LLM_FALLBACKS, PROVIDER_CALLS
+from services.settings import Settings, get_settings
+
+logger = logging.getLogger("sauti.llm")
+
+
+class CircuitBreaker:
+    """
+    Skip a provider after `failure_threshold` consecutive failures. Once
+    `reset_timeout` seconds have passed a single probe request is let
+    through; success closes the breaker, failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            # Re-arm so concurrent requests keep skipping while the probe runs
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LLMProvider:
+    """
+    One OpenAI-compatible chat completions endpoint. At most
+    `max_concurrency` calls are in flight at once; callers check
+    has_capacity() and skip a saturated provider instead of queueing.
+    """
+
+    def __init__(self, name: str, url: str, api_key: Optional[str], model: str,
+                 timeout: float = 12.0, temperature: float = 0.7, max_concurrency: int = 32):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.temperature = temperature
+        self.max_concurrency = max_concurrency
+        self.inflight = 0
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=200)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def has_capacity(self) -> bool:
+        return self.inflight < self.max_concurrency
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def complete(self, client: httpx.AsyncClient, messages: list) -> str:
+        """Return the completion text; raise on any failure so callers can fall back."""
+        start = time.monotonic()
+        try:
+            resp = await client.post(
+                self.url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={"model": self.model, "messages": messages, "temperature": self.temperature},
+                timeout=self.timeout
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            # defensive extraction
+            content = data.get("choices", [])[0].get("message", {}).get("content", None)
+            if content is None:
+                raise ValueError("empty completion")
+        except Exception:
+            self.breaker.record_failure()
+            PROVIDER_CALLS.inc(self.name, "failure")
+            raise
+        self.latencies.append(time.monotonic() - start)
+        self.breaker.record_success()
+        PROVIDER_CALLS.inc(self.name, "success")
+        return content
+
+    async def stream(self, client: httpx.AsyncClient, messages: list):
+        """Yield completion tokens from an SSE (`stream: true`) response."""
+        try:
+            async with client.stream(
+                "POST",
+                self.url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={"model": self.model, "messages": messages,
+                      "temperature": self.temperature, "stream": True},
+                timeout=self.timeout
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    token = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+                    if token:
+                        yield token
+        except Exception:
+            self.breaker.record_failure()
+            PROVIDER_CALLS.inc(self.name, "failure")
+            raise
+        self.breaker.record_success()
+        PROVIDER_CALLS.inc(self.name, "success")
+
+
+class LLMClient:
+    """
+    Async LLM provider chain on a pooled keep-alive HTTP client.
+
+    Providers are tried in order. A failing provider hands over to the next
+    one immediately. With hedging on, the next provider is also started if
+    the current one hasn't answered within the hedge delay, and the first
+    successful response wins. The hedge delay is the primary's observed p95
+    latency (clamped), or a fixed value when `hedge_delay` is given.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedging: bool = True,
+                 hedge_delay: Optional[float] = None, initial_hedge_delay: float = 3.0,
+                 min_hedge_delay: float = 0.5, max_hedge_delay: float = 8.0,
+                 max_connections: int = 100):
+        self.providers = providers
+        self.hedging = hedging
+        self.fixed_hedge_delay = hedge_delay
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.max_connections = max_connections
+        self._client = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections // 5,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        if self.fixed_hedge_delay is not None:
+            return self.fixed_hedge_delay
+        p95 = provider.p95()
+        if p95 is None:
+            return self.initial_hedge_delay
+        return min(max(p95, self.min_hedge_delay), self.max_hedge_delay)
+
+    def admit(self):
+        """
+        Raise Overloaded if every configured provider is at its concurrency
+        cap, so a request can be shed before any work is done for it rather
+        than piling more calls onto a saturated upstream.
+        """
+        enabled = [p for p in self.providers if p.enabled]
+        if enabled and not any(p.has_capacity() for p in enabled):
+            p95 = max((p.p95() or 1.0) for p in enabled)
+            raise Overloaded(p95, reason="LLM providers at capacity")
+
+    async def complete(self, messages: list) -> Optional[str]:
+        """
+        Return the first successful completion, or None if every provider
+        failed. Raises Overloaded when every provider is saturated.
+        """
+        self.admit()
+        # Breakers are only asked (allow() claims a half-open probe) right before a provider is called
+        candidates = [p for p in self.providers if p.enabled and p.breaker.state != "open"]
+        client = self._http()
+        owners = {}
+        pending = set()
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            while next_index < len(candidates):
+                provider = candidates[next_index]
+                next_index += 1
+                if not provider.has_capacity() or not provider.breaker.allow():
+                    continue
+                provider.inflight += 1
+                task = asyncio.ensure_future(provider.complete(client, messages))
+                task.add_done_callback(lambda _: _release(provider))
+                owners[task] = provider
+                pending.add(task)
+                return
+
+        launch()
+        try:
+            while pending:
+                more = next_index < len(candidates)
+                timeout = self.hedge_delay(candidates[0]) if self.hedging and more else None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        if owners[task] is not self.providers[0]:
+                            LLM_FALLBACKS.inc(owners[task].name)
+                        return task.result()
+                    logger.warning("%s call failed: %s", owners[task].name, task.exception())
+
+                # Either the hedge delay elapsed or a provider failed: bring in the next one
+                if more:
+                    launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, messages: list, outcome: Optional[dict] = None):
+        """
+        Yield tokens from the first provider that streams successfully. A
+        provider that fails before its first token hands over to the next; one
+        that fails mid-reply ends the stream, since answers can't be spliced.
+        Yields nothing if every provider failed or was saturated. If `outcome` is given,
+        outcome["complete"] is set once a provider finished its reply.
+        """
+        client = self._http()
+        for provider in self.providers:
+            if not provider.enabled or not provider.has_capacity() or not provider.breaker.allow():
+                continue
+            started = False
+            provider.inflight += 1
+            try:
+                async for token in provider.stream(client, messages):
+                    if not started and provider is not self.providers[0]:
+                        LLM_FALLBACKS.inc(provider.name)
+                    started = True
+                    yield token
+                if outcome is not None:
+                    outcome["complete"] = True
+                return
+            except Exception as e:
+                logger.warning("%s stream failed: %s", provider.name, e)
+                if started:
+                    return
+            finally:
+                provider.inflight -= 1
+
+    def status(self) -> dict:
+        return {
+            p.name: {"enabled": p.enabled, "breaker": p.breaker.state, "p95_s": p.p95(),
+                     "inflight": p.inflight, "max_concurrency": p.max_concurrency}
+            for p in self.providers
+        }
+
+
+def _release(provider: LLMProvider):
+    provider.inflight -= 1
+
+
+def build_llm_client(settings: Settings = None) -> LLMClient:
+    """Build the Mistral -> AI/ML chain; a provider without an API key is skipped."""
+    settings = settings or get_settings()
+    return LLMClient(
+        [
+            LLMProvider(
+                "mistral",
+                settings.mistral_api_url,
+                settings.mistral_api_key,
+                "mistral-medium",
+                max_concurrency=settings.llm_max_concurrency
+            ),
+            LLMProvider(
+                "ai_ml",
+                settings.ai_ml_api_url,
+                settings.ai_ml_api_key,
+                "gpt-4o-mini",
+                max_concurrency=settings.llm_max_concurrency
+            ),
+        ],
+        hedging=settings.llm_hedging,
+        hedge_delay=settings.llm_hedge_delay
+    )
@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from services.settings import get_settings
+
+DEFAULT_RECORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "patient_records.json"
+)
+
+# Finds the patient_id of every line in a line-delimited file in one C-level scan
+_JSONL_ID = re.compile(rb'^[^\n]*?"patient_id"\s*:\s*"((?:[^"\\]|\\.)*)"', re.MULTILINE)
+
+# The index is built over the file in blocks of whole lines
+_SCAN_BLOCK = 8 * 1024 * 1024
+_READ_BLOCK = 4096
+
+
+def _decode_id(raw: bytes) -> str:
+    # Only escaped ids need the JSON decoder
+    return json.loads(b'"' + raw + b'"') if b"\\" in raw else raw.decode("utf-8")
+
+
+class PatientRecord:
+    """Compact patient record; fields outside the known schema go in `extra`."""
+    __slots__ = ("patient_id", "name", "gestational_age_weeks", "known_conditions",
+                 "language", "phone_number", "extra")
+
+    def __init__(self, patient_id, name=None, gestational_age_weeks=None, known_conditions=(),
+                 language=None, phone_number=None, extra=None):
+        self.patient_id = patient_id
+        self.name = name
+        self.gestational_age_weeks = gestational_age_weeks
+        self.known_conditions = tuple(known_conditions or ())
+        self.language = language
+        self.phone_number = phone_number
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict, patient_id: str = None) -> "PatientRecord":
+        data = dict(data)
+        return cls(
+            patient_id=data.pop("patient_id", patient_id),
+            name=data.pop("name", None),
+            gestational_age_weeks=data.pop("gestational_age_weeks", None),
+            known_conditions=data.pop("known_conditions", ()),
+            language=data.pop("language", None),
+            phone_number=data.pop("phone_number", None),
+            extra=data or None
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "patient_id": self.patient_id,
+            "name": self.name,
+            "gestational_age_weeks": self.gestational_age_weeks,
+            "known_conditions": list(self.known_conditions),
+            "language": self.language,
+            "phone_number": self.phone_number
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+class PatientStore:
+    """
+    Patient records indexed by patient_id and loaded once per file version.
+
+    Two formats are supported:
+    - `.json`: a single object keyed by patient_id (the original layout),
+      parsed fully into PatientRecord objects.
+    - `.jsonl` / `.ndjson`: one record per line. Only a patient_id -> byte
+      offset index is built at load; records are read with os.pread on first
+      lookup and kept in a bounded LRU.
+
+    The file's mtime is checked at most every `check_interval` seconds and the
+    index is rebuilt when it changes, so edits show up without a restart.
+    Replace the file by writing a new one and renaming it over the old path:
+    lookups keep reading the old file until the index is rebuilt. A file
+    rewritten in place is detected on lookup (the line no longer holds that
+    patient) and triggers a rebuild.
+    """
+
+    def __init__(self, path: str = None, check_interval: float = 2.0, cache_size: int = 10000):
+        self.path = path or get_settings().patient_records_path or DEFAULT_RECORDS_PATH
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._records: Dict[str, PatientRecord] = {}
+        self._offsets: Dict[str, int] = {}
+        self._file = None
+        self._cache: "OrderedDict[str, PatientRecord]" = OrderedDict()
+        self.available = False
+
+    @property
+    def line_delimited(self) -> bool:
+        return self.path.endswith((".jsonl", ".ndjson"))
+
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return len(self._offsets) if self.line_delimited else len(self._records)
+
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        self._maybe_reload()
+        if not self.line_delimited:
+            return self._records.get(patient_id)
+
+        with self._lock:
+            cached = self._cache.get(patient_id)
+            if cached is not None:
+                self._cache.move_to_end(patient_id)
+                return cached
+
+        record = self._read(patient_id)
+        if record is None and patient_id in self._offsets and self._changed():
+            # The file was rewritten in place under the index; rebuild and look again
+            self.reload()
+            record = self._read(patient_id)
+        if record is None:
+            return None
+
+        with self._lock:
+            self._cache[patient_id] = record
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return record
+
+    def _read(self, patient_id: str) -> Optional[PatientRecord]:
+        f, offsets = self._file, self._offsets
+        offset = offsets.get(patient_id)
+        if offset is None:
+            return None
+        # pread: no shared file position, so threads and forked workers can use one descriptor
+        line = b""
+        while True:
+            block = os.pread(f.fileno(), _READ_BLOCK, offset + len(line))
+            end = block.find(b"\n")
+            line += block if end == -1 else block[:end]
+            if end != -1 or len(block) < _READ_BLOCK:
+                break
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or data.get("patient_id") != patient_id:
+            return None
+        return PatientRecord.from_dict(data)
+
+    def _changed(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime_ns != self._mtime
+        except FileNotFoundError:
+            return False
+
+    def reload(self):
+        """Force a rebuild of the index from disk."""
+        with self._lock:
+            self._next_check = 0.0
+            self._mtime = None
+        self._maybe_reload()
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self.available = False
+                return
+            if mtime == self._mtime:
+                return
+
+            try:
+                if self.line_delimited:
+                    self._load_jsonl()
+                else:
+                    self._load_json()
+                self._mtime = mtime
+                self.available = True
+                print(f"✅ Patient store loaded from {self.path}")
+            except Exception as e:
+                # Keep serving the previous index if the new file is mid-write or invalid
+                print(f"⚠️ Patient store reload failed: {e}")
+
+    def _load_json(self):
+        with open(self.path, "r") as f:
+            patients = json.load(f)
+        self._records = {
+            patient_id: PatientRecord.from_dict(data, patient_id)
+            for patient_id, data in patients.items()
+        }
+
+    def _load_jsonl(self):
+        f = open(self.path, "rb")
+        offsets = {}
+        try:
+            base, tail = 0, b""
+            while True:
+                block = f.read(_SCAN_BLOCK)
+                chunk = tail + block
+                cut = chunk.rfind(b"\n") + 1 if block else len(chunk)
+                for m in _JSONL_ID.finditer(chunk, 0, cut):
+                    offsets[_decode_id(m.group(1))] = base + m.start()
+                if not block:
+                    break
+                base, tail = base + cut, chunk[cut:]
+        except Exception:
+            f.close()
+            raise
+        # Swap in one step; readers holding the old file keep it open until done
+        self._file, self._offsets = f, offsets
+        self._cache = OrderedDict()
+
+
+# ✅ Export singleton
+patient_store = PatientStore()
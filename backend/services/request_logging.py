@@ -0,0 +1,155 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+from services.metrics import UNMATCHED_ROUTE, current_trace, route_label
+from services.settings import get_settings
+
+logger = logging.getLogger("sauti.requests")
+
+# LogRecord attributes that are not user-supplied fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def setup_logging(level: str = None):
+    """
+    Route the `sauti` loggers through a queue so request handlers never block
+    on stdout; a background listener thread formats and writes the records.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or get_settings().log_level).upper()
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    root = logging.getLogger("sauti")
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_listener_in_child():
+    # The listener thread doesn't survive fork(): a pre-forked worker (serve.py) starts its own
+    global _listener
+    if _listener is not None:
+        _listener = logging.handlers.QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def shutdown_logging():
+    """Flush queued records; call on application shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """`/api/chat/message=0.1,/api/analyze-symptoms=1` -> {route: rate}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, rate = item.rpartition("=")
+        rates[route] = float(rate)
+    return rates
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI access-log middleware. Records method, route template, status
+    and latency as structured fields once the response has been sent.
+
+    - Requests are sampled per route (`LOG_SAMPLE_RATES`, default rate
+      `LOG_SAMPLE_RATE`); 5xx responses are always logged.
+    - The request body is never read unless `LOG_REQUEST_BODY=1`, and even
+      then it is teed from the stream (up to `body_limit` bytes) rather
+      than buffered ahead of the handler.
+    """
+
+    def __init__(self, app, sample_rates: Dict[str, float] = None, default_rate: float = None,
+                 log_body: bool = None, body_limit: int = 2048):
+        settings = get_settings()
+        self.app = app
+        self.sample_rates = (
+            sample_rates if sample_rates is not None else parse_sample_rates(settings.log_sample_rates)
+        )
+        self.default_rate = default_rate if default_rate is not None else settings.log_sample_rate
+        self.log_body = log_body if log_body is not None else settings.log_request_body
+        self.body_limit = body_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        body = bytearray()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < self.body_limit:
+                body.extend(message.get("body", b"")[:self.body_limit - len(body)])
+            return message
+
+        try:
+            await self.app(scope, receive_wrapper if self.log_body else receive, send_wrapper)
+        finally:
+            route = route_label(scope)
+            rate = self.sample_rates.get(route, self.default_rate)
+            if status["code"] >= 500 or rate >= 1.0 or random.random() < rate:
+                fields = {
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status["code"],
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "sample_rate": rate
+                }
+                if route == UNMATCHED_ROUTE:
+                    fields["path"] = scope["path"][:200]  # logs only; never a metric label
+                trace = current_trace()
+                if trace is not None and trace.stages:
+                    fields["stages_ms"] = {k: round(v * 1000, 2) for k, v in trace.stages.items()}
+                if self.log_body and body:
+                    fields["body"] = body.decode("utf-8", errors="replace")
+                logger.info("request", extra=fields)
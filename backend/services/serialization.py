@@ -0,0 +1,63 @@
+import json
+
+# Optional: orjson encodes several times faster than the json module; output is the same compact JSON
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    # NumPy scalars (distances from vectorized ranking) and other number-likes
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Compact UTF-8 JSON, as Starlette's JSONResponse would render it."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+class Encoded(bytes):
+    """JSON that is already encoded; `encode_fields` splices it in as-is."""
+
+
+def encode_fields(fields: dict) -> "Encoded":
+    """Encode a dict whose values may be `Encoded` fragments, without re-encoding them."""
+    return Encoded(b"{" + b",".join(
+        dumps(key) + b":" + (value if isinstance(value, Encoded) else dumps(value))
+        for key, value in fields.items()
+    ) + b"}")
+
+
+def encode_list(items) -> "Encoded":
+    return Encoded(b"[" + b",".join(items) + b"]")
+
+
+class EncodedList(list):
+    """
+    A cached list of dicts that also keeps each item's JSON, encoded on
+    first use. Keys in `volatile` (such as a distance recomputed for every
+    caller) are left out and passed to `encode_item` per request.
+    """
+
+    def __init__(self, items=(), volatile=()):
+        super().__init__(items)
+        self.volatile = frozenset(volatile)
+        self._encoded = [None] * len(self)
+
+    def encode_item(self, index: int, **fields) -> Encoded:
+        body = self._encoded[index]
+        if body is None:
+            item = self[index]
+            # Inner "k":v,... of the object, so per-request fields can be appended
+            body = self._encoded[index] = dumps({k: v for k, v in item.items() if k not in self.volatile})[1:-1]
+        if fields:
+            extra = dumps(fields)[1:-1]
+            body = body + b"," + extra if body else extra
+        return Encoded(b"{" + body + b"}")
+
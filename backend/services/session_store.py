@@ -0,0 +1,339 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from services.settings import Settings, get_settings
+
+# Messages are stored as compact (role_id, epoch_seconds, content) tuples
+ROLES = ("system", "user", "assistant")
+ROLE_IDS = {role: i for i, role in enumerate(ROLES)}
+
+# Rough per-message cost on top of the content itself (tuple + float + str headers)
+_MESSAGE_OVERHEAD = 120
+
+
+def pack_message(role: str, content: str, ts: float = None) -> tuple:
+    return (ROLE_IDS[role], ts if ts is not None else time.time(), content)
+
+
+def unpack_message(message: tuple) -> dict:
+    """Expand a stored message into the original API shape."""
+    role_id, ts, content = message
+    return {
+        "role": ROLES[role_id],
+        "content": content,
+        "timestamp": datetime.fromtimestamp(ts).isoformat()
+    }
+
+
+def _message_bytes(message: tuple) -> int:
+    return _MESSAGE_OVERHEAD + len(message[2])
+
+
+class SessionStore(ABC):
+    """
+    Chat session storage. A session is a dict with `patient_id`,
+    `created_at`/`updated_at` (epoch seconds), `messages` (packed tuples)
+    and `context`. Async callers run the methods of a `blocking` store
+    (disk I/O, lock waits) in a worker thread.
+    """
+    blocking = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0, "bytes": 0}
+
+    @abstractmethod
+    def create(self, session_id: str, patient_id: str, messages: list, context: dict):
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, session: Dict[str, Any], message: tuple):
+        """Append a packed message to a session previously returned by get()."""
+
+    @abstractmethod
+    def update_context(self, session_id: str, context_updates: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def bytes_held(self) -> int:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "sessions": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": dict(self.evictions),
+            "bytes_held": self.bytes_held()
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU with an idle TTL and caps on session count and
+    (approximate) bytes held. Least recently used sessions go first.
+    """
+
+    def __init__(self, max_sessions: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 24 * 3600):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def bytes_held(self) -> int:
+        return self._bytes
+
+    def create(self, session_id: str, patient_id: str, messages: list, context: dict):
+        now = time.time()
+        session = {
+            "patient_id": patient_id,
+            "created_at": now,
+            "updated_at": now,
+            "messages": list(messages),
+            "context": context
+        }
+        size = sum(_message_bytes(m) for m in messages)
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sizes[session_id] = size
+            self._bytes += size
+            self._enforce_caps(session_id)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                self.misses += 1
+                return None
+            if time.time() - session["updated_at"] > self.ttl:
+                self._drop(session_id, "ttl")
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return session
+
+    def append(self, session_id: str, session: Dict[str, Any], message: tuple):
+        with self._lock:
+            session["messages"].append(message)
+            session["updated_at"] = message[1]
+            if session_id in self._sizes:
+                size = _message_bytes(message)
+                self._sizes[session_id] += size
+                self._bytes += size
+                self._enforce_caps(session_id)
+
+    def update_context(self, session_id: str, context_updates: Dict[str, Any]) -> bool:
+        session = self.get(session_id)
+        if session is None:
+            return False
+        session["context"].update(context_updates)
+        return True
+
+    def _drop(self, session_id: str, reason: str):
+        self._sessions.pop(session_id, None)
+        self._bytes -= self._sizes.pop(session_id, 0)
+        self.evictions[reason] += 1
+
+    def _enforce_caps(self, keep: str):
+        # Evict from the LRU end, never the session that is being written to
+        while len(self._sessions) > self.max_sessions:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, "lru")
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, "bytes")
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a local SQLite database in WAL mode, so every uvicorn worker
+    on the host sees the same sessions. Expired sessions (idle longer than
+    `ttl`) and the oldest sessions beyond `max_sessions` are swept
+    periodically.
+    """
+    blocking = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            patient_id TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            context TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+            role INTEGER NOT NULL,
+            ts REAL NOT NULL,
+            content TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_session ON messages(session_id, id);
+        CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+    """
+
+    def __init__(self, path: str, max_sessions: int = 100000, ttl: float = 24 * 3600,
+                 sweep_interval: float = 60.0):
+        super().__init__()
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; one opened before a worker was forked (serve.py) is not reused
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def bytes_held(self) -> int:
+        conn = self._conn()
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        return pages * conn.execute("PRAGMA page_size").fetchone()[0]
+
+    def create(self, session_id: str, patient_id: str, messages: list, context: dict):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT INTO sessions (session_id, patient_id, created_at, updated_at, context) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, patient_id, now, now, json.dumps(context))
+            )
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, ts, content) VALUES (?, ?, ?, ?)",
+                [(session_id,) + tuple(m) for m in messages]
+            )
+        self._maybe_sweep(now)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT patient_id, created_at, updated_at, context FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if time.time() - row[2] > self.ttl:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self.evictions["ttl"] += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        messages = conn.execute(
+            "SELECT role, ts, content FROM messages WHERE session_id = ? ORDER BY id",
+            (session_id,)
+        ).fetchall()
+        return {
+            "patient_id": row[0],
+            "created_at": row[1],
+            "updated_at": row[2],
+            "messages": messages,
+            "context": json.loads(row[3])
+        }
+
+    def append(self, session_id: str, session: Dict[str, Any], message: tuple):
+        session["messages"].append(message)
+        session["updated_at"] = message[1]
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT INTO messages (session_id, role, ts, content) VALUES (?, ?, ?, ?)",
+                (session_id,) + tuple(message)
+            )
+            conn.execute(
+                "UPDATE sessions SET updated_at = ? WHERE session_id = ?", (message[1], session_id)
+            )
+
+    def update_context(self, session_id: str, context_updates: Dict[str, Any]) -> bool:
+        # Read-modify-write under the write lock, so another worker's update in between isn't lost
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT updated_at, context FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl:
+                return False
+            context = json.loads(row[1])
+            context.update(context_updates)
+            conn.execute("UPDATE sessions SET context = ? WHERE session_id = ?", (json.dumps(context), session_id))
+        return True
+
+    def _maybe_sweep(self, now: float):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        conn = self._conn()
+        expired = conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,)
+        ).rowcount
+        overflow = conn.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            " SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        ).rowcount
+        self.evictions["ttl"] += max(expired, 0)
+        self.evictions["lru"] += max(overflow, 0)
+
+
+def build_session_store(settings: Settings = None) -> SessionStore:
+    """Pick the backend from SESSION_STORE (`memory` or `sqlite`)."""
+    settings = settings or get_settings()
+    if settings.session_store == "sqlite":
+        path = settings.session_db_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sessions.db"
+        )
+        return SQLiteSessionStore(path, max_sessions=settings.session_max_sessions, ttl=settings.session_ttl)
+    return MemorySessionStore(
+        max_sessions=settings.session_max_sessions,
+        max_bytes=settings.session_max_bytes,
+        ttl=settings.session_ttl
+    )
@@ -0,0 +1,147 @@
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+# Optional: local development reads a .env file; deployments set real env vars
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+T = TypeVar("T")
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class Settings:
+    """
+    Application configuration, read from the environment once. Importing
+    this module loads `.env` (a single time, for every module). No secret
+    has a default: a provider without its key is disabled and the app falls
+    back (intents for chat, the local clinic index for maps, offline TTS).
+    """
+
+    def __init__(self):
+        # Provider keys
+        self.mistral_api_key = os.getenv("MISTRAL_API_KEY")
+        self.ai_ml_api_key = os.getenv("AI_ML_API_KEY")
+        self.google_maps_api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
+        # Provider endpoints; overridden to point at local stubs in benchmarks
+        self.mistral_api_url = os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+        self.ai_ml_api_url = os.getenv("AI_ML_API_URL", "https://api.aimlapi.com/v1/chat/completions")
+        self.google_maps_base_url = os.getenv("GOOGLE_MAPS_BASE_URL")
+        self.supabase_url = os.getenv("SUPABASE_URL")
+        self.supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+        # LLM client
+        self.llm_max_concurrency = _env_int("LLM_MAX_CONCURRENCY", 32)
+        self.llm_hedging = os.getenv("LLM_HEDGING", "1") != "0"
+        hedge_delay_ms = os.getenv("LLM_HEDGE_DELAY_MS")
+        self.llm_hedge_delay = float(hedge_delay_ms) / 1000 if hedge_delay_ms else None
+
+        # Chat
+        self.session_store = os.getenv("SESSION_STORE", "memory").lower()
+        self.session_db_path = os.getenv("SESSION_DB_PATH")
+        self.session_ttl = _env_float("SESSION_TTL_SECONDS", 24 * 3600)
+        self.session_max_sessions = _env_int("SESSION_MAX_SESSIONS", 10000)
+        self.session_max_bytes = _env_int("SESSION_MAX_BYTES", 64 * 1024 * 1024)
+        self.context_token_budget = _env_int("CONTEXT_TOKEN_BUDGET", 3000)
+        self.context_pin_recent = _env_int("CONTEXT_PIN_RECENT", 6)
+        self.nearby_context_wait = _env_float("NEARBY_CONTEXT_WAIT_MS", 50) / 1000
+        self.intents_path = os.getenv("INTENTS_PATH")
+        self.reply_cache_size = _env_int("REPLY_CACHE_SIZE", 2000)
+        self.reply_cache_ttl = _env_float("REPLY_CACHE_TTL", 6 * 3600)
+        self.reply_cache_similarity = _env_float("REPLY_CACHE_SIMILARITY", 0.0)
+
+        # Data files (None: the default under data/)
+        self.patient_records_path = os.getenv("PATIENT_RECORDS_PATH")
+        self.clinic_data_path = os.getenv("CLINIC_DATA_PATH")
+
+        # Maps
+        self.min_local_clinics = _env_int("MIN_LOCAL_CLINICS", 3)
+        self.maps_cache_ttl = _env_float("MAPS_CACHE_TTL", 3600)
+        self.maps_cache_size = _env_int("MAPS_CACHE_SIZE", 5000)
+        self.geocode_cache_ttl = _env_float("GEOCODE_CACHE_TTL", 7 * 24 * 3600)
+        self.clinic_tile_precision = _env_int("CLINIC_TILE_PRECISION", 4)
+        self.clinic_tiles_dir = os.getenv("CLINIC_TILES_DIR")
+
+        # Voice alerts
+        self.tts_engine = os.getenv("TTS_ENGINE", "").lower()
+        self.elevenlabs_voice_id = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
+        self.audio_cache_dir = os.getenv("AUDIO_CACHE_DIR")
+        self.voice_languages = [l.strip() for l in os.getenv("VOICE_LANGUAGES", "sw,en").split(",") if l.strip()]
+        self.voice_warmup = os.getenv("VOICE_WARMUP", "1") == "1"
+
+        # Background work and persistence
+        self.job_workers = _env_int("JOB_WORKERS", 2)
+        self.job_max_pending = _env_int("JOB_MAX_PENDING", 1000)
+        self.job_max_attempts = _env_int("JOB_MAX_ATTEMPTS", 3)
+        self.supabase_batch_size = _env_int("SUPABASE_BATCH_SIZE", 50)
+        self.supabase_flush_interval = _env_float("SUPABASE_FLUSH_MS", 1000) / 1000
+        self.supabase_spill_path = os.getenv("SUPABASE_SPILL_PATH")
+        self.supabase_history_cache = _env_int("SUPABASE_HISTORY_CACHE", 1000)
+
+        # Admission control: concurrent requests per lane (triage keeps a reserve) and chat rate limits
+        self.admission_max_inflight = _env_int("ADMISSION_MAX_INFLIGHT", 64)
+        self.admission_triage_reserve = _env_int("ADMISSION_TRIAGE_RESERVE", 16)
+        self.admission_chat_max = _env_int("ADMISSION_CHAT_MAX", 32)
+        self.admission_maps_max = _env_int("ADMISSION_MAPS_MAX", 16)
+        self.triage_batch_max = _env_int("TRIAGE_BATCH_MAX", 500)
+        self.chat_rate_per_minute = _env_float("CHAT_RATE_PER_MINUTE", 20)
+        self.chat_burst = _env_float("CHAT_BURST", 10)
+
+        self.rate_limit_store = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+        self.rate_limit_db_path = os.getenv("RATE_LIMIT_DB_PATH")
+
+        # Request logs
+        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.log_sample_rate = _env_float("LOG_SAMPLE_RATE", 1.0)
+        self.log_sample_rates = os.getenv("LOG_SAMPLE_RATES", "")
+        self.log_request_body = os.getenv("LOG_REQUEST_BODY") == "1"
+
+        # Server (`serve.py` reads WEB_CONCURRENCY itself, before settings are built)
+        self.host = os.getenv("HOST", "0.0.0.0")
+        self.port = _env_int("PORT", 8000)
+        self.graceful_timeout = _env_float("GRACEFUL_TIMEOUT", 20)
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+class Lazy(Generic[T]):
+    """
+    A shared service built on first use instead of at import time. Call it
+    to get the instance; it also works as a FastAPI dependency
+    (`Depends(get_google_maps_service)`).
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> T:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
@@ -1,58 +1,363 @@
+import json
 import os
-from dotenv import load_dotenv
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
-load_dotenv()
+import requests
 
-# Try to import Supabase, but make it optional
+from services.settings import Lazy, Settings, get_settings
+
+# Optional: POSIX file locks keep worker processes sharing the spill file from replaying it twice
 try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
+    import fcntl
 except ImportError:
-    SUPABASE_AVAILABLE = False
-    print("Supabase not available - running without database features")
+    fcntl = None
+
+DEFAULT_SPILL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "chat_spill.jsonl"
+)
+
+# Client errors that are worth retrying (request timeout, rate limit); other 4xx refuse the rows themselves
+_RETRYABLE_STATUS = {408, 429}
+
+
+def _rejected(error: Exception) -> bool:
+    """True if PostgREST refused the rows themselves (4xx), so sending them again can't succeed."""
+    response = getattr(error, "response", None)
+    return (isinstance(error, requests.HTTPError) and response is not None
+            and 400 <= response.status_code < 500 and response.status_code not in _RETRYABLE_STATUS)
+
+
+class _Interrupted(Exception):
+    """A retryable failure after the first `done` rows of a chunk were written or set aside."""
+
+    def __init__(self, done: int, cause: Exception):
+        super().__init__(str(cause))
+        self.done = done
+
+
+class ChatMessageWriter:
+    """
+    Write-behind buffer for chat_messages. Rows are queued in memory and a
+    background thread sends them to PostgREST as one multi-row insert when
+    `batch_size` rows are waiting or `flush_interval` seconds have passed.
+
+    If the insert fails because the database is unreachable (network
+    error, 5xx) the batch is appended to a local JSONL spill file, which is
+    replayed ahead of the next successful flush, so messages survive a
+    database outage (and, once spilled, a restart). If PostgREST rejects the
+    batch (4xx) it is retried row by row and the rows it refuses are moved
+    to a dead-letter file (`*.rejected.jsonl`) instead, so one bad row
+    can't hold back every later message.
+    """
+
+    def __init__(self, url: str, key: str, batch_size: int = 50, flush_interval: float = 1.0,
+                 spill_path: str = None, timeout: float = 10.0):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/chat_messages"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=minimal"
+        }
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path or DEFAULT_SPILL_PATH
+        self.rejected_path = os.path.splitext(self.spill_path)[0] + ".rejected.jsonl"
+        self.timeout = timeout
+        self._http = requests.Session()
+        self._buffer: List[dict] = []
+        self._inflight: List[dict] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Spilled rows by session, read incrementally as the spill file grows
+        self._spill_index: Dict[str, List[dict]] = {}
+        self._spill_stamp = None  # (inode, bytes indexed)
+        self._index_lock = threading.Lock()
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "errors": 0,
+                      "rejected": 0}
+
+    def add(self, row: dict):
+        with self._cond:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+                self._thread.start()
+            self._buffer.append(row)
+            self.stats["queued"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        if self._closed:
+            self.flush()
+
+    def pending_for(self, session_id: str) -> List[dict]:
+        """Rows for a session that are not in the database yet (buffered, in flight or spilled)."""
+        with self._cond:
+            rows = [row for row in self._inflight + self._buffer if row["session_id"] == session_id]
+        return self._spilled_for(session_id) + rows
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """Send everything buffered now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+                self._inflight = batch
+            replayed = sent = 0
+            try:
+                if os.path.exists(self.spill_path):
+                    with self._spill_file_lock():
+                        # Another worker may have replayed it while we waited
+                        if os.path.exists(self.spill_path):
+                            replayed = self._replay_spill()
+                for start in range(0, len(batch), self.batch_size):
+                    chunk = batch[start:start + self.batch_size]
+                    try:
+                        self._send(chunk)
+                    except _Interrupted as e:
+                        sent += e.done  # rows of this chunk already written or dead-lettered
+                        raise
+                    sent += len(chunk)
+            except Exception as e:
+                # A failed replay counted spill rows, not these: the whole batch is spilled then
+                self.stats["errors"] += 1
+                print(f"⚠️ Chat message flush failed, spilling {len(batch) - sent} rows: {e}")
+                self._spill(batch[sent:])
+            finally:
+                with self._cond:
+                    self._inflight = []
+            return replayed + sent
+
+    def close(self, timeout: float = 10.0):
+        """Flush what is buffered and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def _insert(self, rows: List[dict]):
+        response = self._http.post(self.endpoint, headers=self.headers, json=rows, timeout=self.timeout)
+        response.raise_for_status()
+        self.stats["written"] += len(rows)
+        self.stats["batches"] += 1
+
+    def _send(self, chunk: List[dict]):
+        """Insert a chunk; rows PostgREST refuses go to the dead-letter file, the rest are written."""
+        try:
+            self._insert(chunk)
+            return
+        except requests.HTTPError as e:
+            if not _rejected(e):
+                raise
+            print(f"⚠️ Chat message batch rejected ({e}); retrying row by row")
+        for done, row in enumerate(chunk):
+            try:
+                self._insert([row])
+            except Exception as e:
+                if not _rejected(e):
+                    raise _Interrupted(done, e) from e
+                self._dead_letter(row, e)
+
+    def _dead_letter(self, row: dict, error: Exception):
+        os.makedirs(os.path.dirname(self.rejected_path), exist_ok=True)
+        response = error.response
+        entry = {"row": row, "status": response.status_code, "error": response.text[:500]}
+        # One short append per row, so workers writing at once don't interleave (and replay already holds the spill lock)
+        with open(self.rejected_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.stats["rejected"] += 1
+        print(f"⚠️ Chat message for session {row.get('session_id')} rejected with {response.status_code}; "
+              f"kept in {self.rejected_path}")
+
+    def _spill(self, rows: List[dict]):
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        with self._spill_file_lock(), open(self.spill_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.stats["spilled"] += len(rows)
+
+    @contextmanager
+    def _spill_file_lock(self):
+        """Excludes other processes (serve.py workers) from the spill file; threads use _flush_lock."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        with open(self.spill_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _spilled_for(self, session_id: str) -> List[dict]:
+        """
+        Spilled rows for a session from the in-memory index. The file is
+        only appended to until a replay replaces or removes it (any worker
+        may do either), so a stat tells whether to read just the new lines
+        or to start over.
+        """
+        try:
+            stat = os.stat(self.spill_path)
+        except FileNotFoundError:
+            with self._index_lock:
+                self._spill_index, self._spill_stamp = {}, None
+            return []
+        with self._index_lock:
+            inode, indexed = self._spill_stamp or (None, 0)
+            if inode != stat.st_ino or stat.st_size < indexed:
+                self._spill_index, indexed = {}, 0
+            if stat.st_size > indexed:
+                with open(self.spill_path, "rb") as f:
+                    f.seek(indexed)
+                    data = f.read(stat.st_size - indexed)
+                complete = data.rfind(b"\n") + 1  # a line still being written is read next time
+                for line in data[:complete].splitlines():
+                    if line.strip():
+                        row = json.loads(line)
+                        self._spill_index.setdefault(row["session_id"], []).append(row)
+                indexed += complete
+            self._spill_stamp = (stat.st_ino, indexed)
+            return list(self._spill_index.get(session_id, ()))
+
+    def _replay_spill(self) -> int:
+        # Called with _flush_lock held; the file is only removed once every row is in
+        with open(self.spill_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for start in range(0, len(rows), self.batch_size):
+            try:
+                self._send(rows[start:start + self.batch_size])
+            except _Interrupted as e:
+                self._rewrite_spill(rows[start + e.done:])
+                raise
+            self._rewrite_spill(rows[start + self.batch_size:])
+        os.remove(self.spill_path)
+        self.stats["replayed"] += len(rows)
+        print(f"✅ Replayed {len(rows)} spilled chat messages")
+        return len(rows)
+
+    def _rewrite_spill(self, rows: List[dict]):
+        tmp = self.spill_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        os.replace(tmp, self.spill_path)
+
+    def fetch(self, session_id: str) -> List[dict]:
+        response = self._http.get(
+            self.endpoint,
+            headers=self.headers,
+            params={"select": "*", "session_id": f"eq.{session_id}", "order": "created_at"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self) -> dict:
+        return dict(self.stats, buffered=len(self._buffer))
+
 
 class SupabaseService:
-    def __init__(self):
-        if not SUPABASE_AVAILABLE:
-            self.client = None
+    def __init__(self, settings: Settings = None):
+        settings = settings or get_settings()
+        self.url = settings.supabase_url
+        self.key = settings.supabase_service_key
+        self.client = None
+        self.writer: Optional[ChatMessageWriter] = None
+        # Recent chat history per session, kept current by save_chat_message
+        self._history: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._history_size = settings.supabase_history_cache
+        self._history_lock = threading.Lock()
+
+        if not self.url or not self.key:
+            print("SUPABASE_URL/SUPABASE_SERVICE_KEY not set - running without database features")
             return
-            
-        self.url = os.getenv('SUPABASE_URL')
-        self.key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.client: Client = create_client(self.url, self.key)
-    
+        # Chat messages go straight to PostgREST, so they don't need the SDK
+        self.writer = ChatMessageWriter(
+            self.url, self.key,
+            batch_size=settings.supabase_batch_size,
+            flush_interval=settings.supabase_flush_interval,
+            spill_path=settings.supabase_spill_path
+        )
+        # Optional: the SDK (slow to import) is only used for auth/profiles
+        try:
+            from supabase import create_client
+            self.client = create_client(self.url, self.key)
+        except ImportError:
+            print("Supabase SDK not available - user sign-up disabled")
+
     def save_chat_message(self, session_id: str, role: str, content: str, patient_id: str):
-        if not SUPABASE_AVAILABLE or not self.client:
+        """Queue a message for the next batched insert; returns the row, or None without a database."""
+        if self.writer is None:
             print("Supabase not available - chat message not saved")
             return None
-        try:
-            data = {
-                'session_id': session_id,
-                'role': role,
-                'content': content,
-                'patient_id': patient_id
-            }
-            result = self.client.table('chat_messages').insert(data).execute()
-            return result
-        except Exception as e:
-            print(f"Error saving chat message: {e}")
-            return None
-    
+        data = {
+            'session_id': session_id,
+            'role': role,
+            'content': content,
+            'patient_id': patient_id,
+            # Set here so rows keep conversation order however they are batched
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        with self._history_lock:
+            cached = self._history.get(session_id)
+            if cached is not None:
+                cached.append(data)
+        self.writer.add(data)
+        return data
+
     def get_chat_history(self, session_id: str):
-        if not SUPABASE_AVAILABLE or not self.client:
+        if self.writer is None:
             print("Supabase not available - returning empty chat history")
             return []
+        with self._history_lock:
+            cached = self._history.get(session_id)
+            if cached is not None:
+                self._history.move_to_end(session_id)
+                return list(cached)
         try:
-            result = self.client.table('chat_messages')\
-                .select('*')\
-                .eq('session_id', session_id)\
-                .order('created_at')\
-                .execute()
-            return result.data
+            stored = self.writer.fetch(session_id)
         except Exception as e:
             print(f"Error fetching chat history: {e}")
             return []
-    
+
+        seen = {(row.get('created_at'), row.get('role'), row.get('content')) for row in stored}
+        pending = [
+            row for row in self.writer.pending_for(session_id)
+            if (row['created_at'], row['role'], row['content']) not in seen
+        ]
+        history = sorted(stored + pending, key=lambda row: row.get('created_at') or "")
+        with self._history_lock:
+            self._history[session_id] = history
+            while len(self._history) > self._history_size:
+                self._history.popitem(last=False)
+        return list(history)
+
+    def close(self):
+        """Flush buffered chat messages; call on application shutdown."""
+        if self.writer is not None:
+            self.writer.close()
+
     def create_user(self, email: str, password: str, user_data: dict):
         try:
             auth_response = self.client.auth.sign_up({
@@ -70,4 +375,5 @@ class SupabaseService:
             print(f"Error creating user: {e}")
             return None
 
-supabase_service = SupabaseService()
\ No newline at end of file
+# ✅ Export provider: built on first use
+get_supabase_service = Lazy(SupabaseService)
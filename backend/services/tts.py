@@ -0,0 +1,171 @@
+import hashlib
+import io
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import requests
+
+from services.settings import Settings, get_settings
+
+DEFAULT_AUDIO_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "audio"
+)
+
+
+class TTSEngine(ABC):
+    """
+    Text-to-speech backend. `cache_key` must change whenever the same text
+    would sound different (voice, model, engine version), since rendered
+    audio is stored under a hash of it.
+    """
+    name = "base"
+    extension = "wav"
+    content_type = "audio/wav"
+
+    @property
+    def cache_key(self) -> str:
+        return self.name
+
+    @abstractmethod
+    def synthesize(self, text: str, language: str) -> bytes:
+        ...
+
+
+class ToneEngine(TTSEngine):
+    """
+    Offline stand-in that needs nothing installed: a short deterministic WAV
+    with one tone per word. Useful for local development, demos without a
+    TTS key and benchmarks; it does not speak.
+    """
+    name = "tone"
+
+    def __init__(self, sample_rate: int = 8000, word_seconds: float = 0.12):
+        self.sample_rate = sample_rate
+        self.word_seconds = word_seconds
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        frames = bytearray()
+        per_word = int(self.sample_rate * self.word_seconds)
+        for word in text.split():
+            pitch = 300 + int(hashlib.md5(word.encode()).hexdigest()[:2], 16) * 2
+            for i in range(per_word):
+                sample = int(8000 * math.sin(2 * math.pi * pitch * i / self.sample_rate))
+                frames += sample.to_bytes(2, "little", signed=True)
+            frames += bytes(per_word // 2)
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(bytes(frames))
+        return buffer.getvalue()
+
+
+class EspeakEngine(TTSEngine):
+    """Local offline speech via the espeak-ng (or espeak) binary; covers sw and en."""
+    name = "espeak"
+
+    def __init__(self, binary: str):
+        self.binary = binary
+
+    @classmethod
+    def find(cls) -> Optional["EspeakEngine"]:
+        binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        return cls(binary) if binary else None
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        return subprocess.run(
+            [self.binary, "-v", language, "--stdout", text],
+            check=True, capture_output=True, timeout=30
+        ).stdout
+
+
+class ElevenLabsEngine(TTSEngine):
+    name = "elevenlabs"
+    extension = "mp3"
+    content_type = "audio/mpeg"
+
+    def __init__(self, api_key: str, voice_id: str, model_id: str = "eleven_multilingual_v2"):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.voice_id}:{self.model_id}"
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        response = requests.post(
+            f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}",
+            headers={"xi-api-key": self.api_key, "Accept": "audio/mpeg"},
+            json={"text": text, "model_id": self.model_id},
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.content
+
+
+def build_tts_engine(name: str = None, settings: Settings = None) -> TTSEngine:
+    """
+    `TTS_ENGINE` = elevenlabs | espeak | tone. Default: ElevenLabs when
+    ELEVENLABS_API_KEY is set, else espeak if installed, else tones.
+    """
+    settings = settings or get_settings()
+    name = (name or settings.tts_engine).lower()
+    api_key = settings.elevenlabs_api_key
+    if name == "elevenlabs" or (not name and api_key):
+        if api_key:
+            return ElevenLabsEngine(api_key, settings.elevenlabs_voice_id)
+        print("⚠️ TTS_ENGINE=elevenlabs but ELEVENLABS_API_KEY is not set")
+    if name in ("", "espeak", "elevenlabs"):
+        engine = EspeakEngine.find()
+        if engine:
+            return engine
+        if name == "espeak":
+            print("⚠️ espeak not installed - using offline tone engine")
+    return ToneEngine()
+
+
+class AudioStore:
+    """
+    Content-addressed audio on disk: a clip lives at
+    <root>/<digest[:2]>/<digest>.<ext>, where digest hashes the engine's
+    cache key, the language and the text. Identical alerts are rendered once
+    and the file never changes, so it can be served with immutable caching.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or get_settings().audio_cache_dir or DEFAULT_AUDIO_DIR
+
+    @staticmethod
+    def digest(engine: TTSEngine, text: str, language: str) -> str:
+        key = "\x00".join((engine.cache_key, language, " ".join(text.split())))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{extension}")
+
+    def exists(self, digest: str, extension: str) -> bool:
+        return os.path.exists(self.path(digest, extension))
+
+    def write(self, digest: str, extension: str, audio: bytes) -> str:
+        """Atomic write (temp file + rename): readers never see a partial clip."""
+        path = self.path(digest, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return path
@@ -0,0 +1,51 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.admission import Overloaded, RateLimiter, SQLiteRateLimiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteRateLimiter(str(tmp_path / "rate_limits.db"), rate=0.001, burst=2)
+    return RateLimiter(rate=0.001, burst=2)
+
+
+def test_refused_check_spends_no_tokens(limiter):
+    limiter.check("session:a")
+    limiter.check("session:a")
+
+    for _ in range(3):
+        with pytest.raises(Overloaded, match="for session"):
+            limiter.check("patient:p", "session:a")
+
+    # The patient's bucket was never charged for the refused requests
+    limiter.check("patient:p", "session:b")
+    limiter.check("patient:p", "session:b")
+    with pytest.raises(Overloaded, match="for patient"):
+        limiter.check("patient:p", "session:c")
+    assert limiter.rejected == 4
+
+
+@pytest.fixture
+def full_lanes(monkeypatch):
+    def enter(lane):
+        raise Overloaded(3, reason=f"{lane} lane full")
+    monkeypatch.setattr(main.admission, "enter", enter)
+    return TestClient(main.app)
+
+
+def test_shed_requests_carry_cors_headers(full_lanes):
+    response = full_lanes.post("/api/analyze-symptoms", json={}, headers={"Origin": "https://app.example"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_preflights_take_no_lane_slot(full_lanes):
+    response = full_lanes.options("/api/chat/message", headers={
+        "Origin": "https://app.example", "Access-Control-Request-Method": "POST"
+    })
+    assert response.status_code == 200
+    assert "access-control-allow-origin" in response.headers
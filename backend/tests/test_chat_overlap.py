@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import main  # noqa: E402
+from agents import chat_agent  # noqa: E402
+from benchmarks.stubs import StubServer  # noqa: E402
+from services.llm_client import LLMClient, LLMProvider  # noqa: E402
+
+MESSAGE = "I have bad headaches, is there a clinic near me?"
+HOSPITALS = [{"name": "Pumwani Maternity Hospital", "address": "Nairobi", "distance_km": 2.1}]
+
+
+class NoDatabase:
+    writer = None
+
+
+@pytest.mark.parametrize("llm_s, maps_s", [(0.5, 0.5), (0.8, 0.4), (0.4, 0.8)])
+def test_chat_latency_is_max_of_llm_and_maps(monkeypatch, llm_s, maps_s):
+    """The endpoint starts the hospital lookup before the LLM call: it pays max(LLM, maps), not their sum."""
+    stub = StubServer(latency=llm_s).start()
+
+    def find_hospitals(latitude, longitude):
+        time.sleep(maps_s)
+        return HOSPITALS
+
+    monkeypatch.setattr(main, "_find_chat_hospitals", find_hospitals)
+    monkeypatch.setattr(chat_agent, "get_supabase_service", NoDatabase)
+
+    async def scenario():
+        client = LLMClient([LLMProvider("stub", stub.url, "stub-key", "stub-model")], hedging=False)
+        monkeypatch.setattr(chat_agent, "llm_client", client)
+        request = main.ChatRequest(patient_id="overlap", message=MESSAGE, latitude=-1.2921, longitude=36.8219)
+        await main.handle_chat_message(request)  # warm up: connection, session store, first-use imports
+        start = time.perf_counter()
+        response = await main.handle_chat_message(request)
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        return response, elapsed
+
+    try:
+        response, elapsed = asyncio.run(scenario())
+    finally:
+        stub.stop()
+
+    assert response["reply"] == "stub reply"
+    assert response["hospitals"] == HOSPITALS
+    # Closer to max(LLM, maps) than to their sum
+    assert max(llm_s, maps_s) <= elapsed < (max(llm_s, maps_s) + llm_s + maps_s) / 2
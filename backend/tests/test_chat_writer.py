@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.stubs import PostgRESTStub
+from services.supabase_client import ChatMessageWriter
+
+
+@pytest.fixture
+def stub():
+    stub = PostgRESTStub().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def writer(stub, tmp_path):
+    writer = ChatMessageWriter(stub.base_url, "stub", batch_size=10, flush_interval=60,
+                               spill_path=str(tmp_path / "chat_spill.jsonl"))
+    yield writer
+    writer.close(timeout=1)
+
+
+def row(i, content=None, session="s1"):
+    return {"session_id": session, "role": "user", "content": content or f"message {i}", "patient_id": "p1",
+            "created_at": f"2026-01-01T00:00:{i:02d}+00:00"}
+
+
+def written(stub):
+    return [r["content"] for r in stub.tables.get("chat_messages", [])]
+
+
+def rejected(writer):
+    if not os.path.exists(writer.rejected_path):
+        return []
+    with open(writer.rejected_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_written(stub, writer):
+    for i in range(5):
+        writer.add(row(i, "bad\x00row" if i == 2 else None))
+    writer.flush()
+
+    assert written(stub) == ["message 0", "message 1", "message 3", "message 4"]
+    (entry,) = rejected(writer)
+    assert entry["row"]["content"] == "bad\x00row" and entry["status"] == 400
+    assert not os.path.exists(writer.spill_path)
+    assert writer.stats["rejected"] == 1
+
+
+def test_rejected_row_in_spill_does_not_block_later_batches(stub, writer):
+    stub.down = True
+    for i in range(4):
+        writer.add(row(i, "bad\x00row" if i == 1 else None))
+    writer.flush()
+    assert os.path.exists(writer.spill_path) and written(stub) == []
+
+    stub.down = False
+    writer.add(row(10))
+    writer.flush()
+    assert written(stub) == ["message 0", "message 2", "message 3", "message 10"]
+    assert not os.path.exists(writer.spill_path)
+    assert [e["row"]["content"] for e in rejected(writer)] == ["bad\x00row"]
+
+    writer.add(row(11))
+    writer.flush()
+    assert written(stub)[-1] == "message 11"
+
+
+def test_spilled_rows_indexed_as_the_file_grows(stub, writer):
+    stub.down = True
+    writer.add(row(0))
+    writer.add(row(1, session="s2"))
+    writer.flush()
+    assert [r["content"] for r in writer.pending_for("s1")] == ["message 0"]
+
+    writer.add(row(2))
+    writer.flush()
+    assert [r["content"] for r in writer.pending_for("s1")] == ["message 0", "message 2"]
+    assert [r["content"] for r in writer.pending_for("s2")] == ["message 1"]
+
+    stub.down = False
+    writer.flush()
+    assert writer.pending_for("s1") == [] and writer.pending_for("s2") == []
+
+
+def test_interrupted_replay_spills_the_whole_new_batch(stub, writer, monkeypatch):
+    stub.down = True
+    writer.add(row(0, "bad\x00row", session="old"))
+    writer.add(row(1, "s1", session="old"))
+    writer.add(row(2, "s2", session="old"))
+    writer.flush()
+    stub.down = False
+
+    # The database goes away again part-way through replaying the spill row by row
+    insert = writer._insert
+
+    def flaky_insert(rows):
+        if rows[0]["content"] == "s2":
+            stub.down = True
+        return insert(rows)
+
+    monkeypatch.setattr(writer, "_insert", flaky_insert)
+    for i in range(4):
+        writer.add(row(10 + i, f"new{i}"))
+    writer.flush()
+
+    assert written(stub) == ["s1"]
+    assert len(rejected(writer)) == 1
+    with open(writer.spill_path) as f:
+        assert [json.loads(line)["content"] for line in f] == ["s2", "new0", "new1", "new2", "new3"]
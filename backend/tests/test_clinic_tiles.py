@@ -0,0 +1,89 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from services import clinic_tiles as tiles_module
+from services.clinic_tiles import ClinicTiles, build_clinic_tiles, ensure_clinic_tiles, refresh_clinic_tiles, respond
+from services.settings import get_settings
+
+
+def write_dataset(path, clinics):
+    with open(path, "w") as f:
+        for name, lat, lng in clinics:
+            f.write(json.dumps({"name": name, "address": "Road", "latitude": lat, "longitude": lng}) + "\n")
+
+
+@pytest.fixture
+def tiles(tmp_path, monkeypatch):
+    dataset = tmp_path / "clinic_locations.jsonl"
+    write_dataset(dataset, [("Kenyatta", -1.3, 36.8), ("Coast General", -4.05, 39.67)])
+    monkeypatch.setattr(get_settings(), "clinic_data_path", str(dataset))
+    tiles = ClinicTiles(precision=4, directory=str(tmp_path / "tiles"))
+    monkeypatch.setattr(tiles_module, "clinic_tiles", tiles)
+    submitted = []
+    monkeypatch.setattr(tiles_module.job_queue, "submit", lambda kind, payload, priority: submitted.append(payload))
+    ensure_clinic_tiles(wait=True)
+    tiles.submitted = submitted
+    tiles.dataset = dataset
+    return tiles
+
+
+def test_empty_tiles_are_not_cached(tiles):
+    before = dict(vars(tiles))
+    for i in range(500):
+        tile = tiles.tile("zz" + "0123456789bcdefghjkmnpqrstuvwxyz"[i % 32] + "0123456789bcdefghjkmnpqrstuvwxyz"[i // 32])
+        assert tile.count == 0
+    assert vars(tiles).keys() == before.keys() and len(tiles._tiles) == len(before["_tiles"])
+
+    tile = tiles.tile("zzzz")
+    assert tile.etag == tiles.tile("zzzz").etag
+    status, headers, body = respond(tile, "gzip", None)
+    assert status == 200 and json.loads(gzip.decompress(body))["geohash"] == "zzzz"
+    assert respond(tile, "br, gzip", tile.etag)[0] == 304
+
+
+def test_manifest_has_no_server_paths(tiles):
+    manifest = json.loads(gzip.decompress(tiles.manifest().gzip))
+    assert manifest["source"]["name"] == "clinic_locations.jsonl"
+    assert str(tiles.dataset.parent) not in json.dumps(manifest)
+
+
+def test_dataset_change_queues_rebuild(tiles):
+    tiles.next_check = 0
+    assert refresh_clinic_tiles() is None and tiles.submitted == []
+
+    write_dataset(tiles.dataset, [("Kenyatta", -1.3, 36.8), ("Moi Referral", 0.51, 35.27)])
+    os.utime(tiles.dataset, ns=(1, 1))
+    tiles.next_check = 0
+    refresh_clinic_tiles()
+    (payload,) = tiles.submitted
+    old_etag = tiles.manifest().etag
+    assert build_clinic_tiles(payload)["tiles"] == 2
+    assert tiles.manifest().etag != old_etag
+
+    # Touched but unchanged: nothing rebuilt
+    os.utime(tiles.dataset, ns=(2, 2))
+    tiles.next_check = 0
+    refresh_clinic_tiles()
+    assert build_clinic_tiles(tiles.submitted[-1]) == {"tiles": 2, "rebuilt": False}
+
+
+def test_restart_serves_the_stored_bodies_without_recompressing(tiles, monkeypatch):
+    built = {gh: (t.etag, t.gzip, t.brotli) for gh, t in tiles._tiles.items()}
+    manifest = tiles.manifest()
+    monkeypatch.setattr(tiles_module.gzip, "compress", lambda *a, **k: pytest.fail("recompressed a tile"))
+
+    reloaded = ClinicTiles(precision=4, directory=tiles.directory)
+    assert reloaded.load(tiles.source)
+    assert {gh: (t.etag, t.gzip, t.brotli) for gh, t in reloaded._tiles.items()} == built
+    assert (reloaded.manifest().etag, reloaded.manifest().gzip) == (manifest.etag, manifest.gzip)
+
+
+def test_restart_rejects_a_tile_that_does_not_match_its_etag(tiles):
+    gh = next(iter(tiles._tiles))
+    path = os.path.join(tiles.directory, "4", gh + ".json.gz")
+    with open(path, "wb") as f:
+        f.write(gzip.compress(b'{"v":1,"clinics":[]}'))
+    assert not ClinicTiles(precision=4, directory=tiles.directory).load(tiles.source)
@@ -0,0 +1,40 @@
+from agents.context_window import ContextManager
+from services.session_store import SQLiteSessionStore, pack_message
+
+SYSTEM = "You are a maternal health assistant."
+
+
+def turn(manager, store, session_id, role, content):
+    """What chat_agent does per message: window first, then the shared store."""
+    session = store.get(session_id)
+    payload = manager.add(session_id, session, role, content)
+    store.append(session_id, session, pack_message(role, content))
+    return payload
+
+
+def test_window_picks_up_turns_served_by_another_worker(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.create("s1", "p1", [pack_message("system", SYSTEM)], {})
+    worker_a, worker_b = ContextManager(SYSTEM), ContextManager(SYSTEM)
+
+    turn(worker_a, store, "s1", "user", "turn 1")
+    turn(worker_a, store, "s1", "assistant", "re: turn 1")
+    turn(worker_b, store, "s1", "user", "turn 2")
+    turn(worker_b, store, "s1", "assistant", "re: turn 2")
+    payload = turn(worker_a, store, "s1", "user", "turn 3")
+
+    assert [m["content"] for m in payload[1:]] == ["turn 1", "re: turn 1", "turn 2", "re: turn 2", "turn 3"]
+
+
+def test_window_rebuilt_when_session_recreated(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.create("s1", "p1", [pack_message("system", SYSTEM)], {})
+    manager = ContextManager(SYSTEM)
+    turn(manager, store, "s1", "user", "old question")
+    turn(manager, store, "s1", "assistant", "old answer")
+
+    # Same id, fresh session (e.g. the database was reset): the cached window is ahead of it
+    store = SQLiteSessionStore(str(tmp_path / "reset.db"))
+    store.create("s1", "p1", [pack_message("system", SYSTEM)], {})
+    payload = turn(manager, store, "s1", "user", "new question")
+    assert [m["content"] for m in payload[1:]] == ["new question"]
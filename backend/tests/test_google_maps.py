@@ -0,0 +1,35 @@
+import json
+
+from services import google_maps
+from services.google_maps import GoogleMapsService
+from services.settings import Settings
+
+
+def make_service(tmp_path, monkeypatch, clinics=200):
+    dataset = tmp_path / "clinics.jsonl"
+    with open(dataset, "w") as f:
+        for i in range(clinics):
+            f.write(json.dumps({"name": f"Clinic {i}", "address": "Nairobi",
+                                "latitude": -1.29 + i * 0.0001, "longitude": 36.82}) + "\n")
+    monkeypatch.delenv("GOOGLE_MAPS_API_KEY", raising=False)
+    monkeypatch.setenv("CLINIC_DATA_PATH", str(dataset))
+    return GoogleMapsService(Settings())
+
+
+def test_limit_reaches_the_top_k_ranking(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    ks = []
+    real_nearest_k = google_maps.nearest_k
+    monkeypatch.setattr(google_maps, "nearest_k", lambda *args: ks.append(args[4]) or real_nearest_k(*args))
+
+    nearest = service.find_nearby_hospitals(-1.29, 36.82, radius=5000, limit=3)
+    assert [h["name"] for h in nearest] == ["Clinic 0", "Clinic 1", "Clinic 2"]
+    assert ks == [3]
+
+    encoded = json.loads(service.encode_nearby_hospitals(-1.29, 36.82, radius=5000, limit=3))
+    assert encoded == nearest
+
+
+def test_no_limit_returns_everything_in_radius(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    assert len(service.find_nearby_hospitals(-1.29, 36.82, radius=5000)) == 200
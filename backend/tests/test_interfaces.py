@@ -0,0 +1,24 @@
+import pytest
+
+from services.session_store import MemorySessionStore, SessionStore
+from services.tts import TTSEngine, ToneEngine
+
+
+@pytest.mark.parametrize("base", [SessionStore, TTSEngine])
+def test_interfaces_cannot_be_instantiated(base):
+    with pytest.raises(TypeError):
+        base()
+
+
+def test_incomplete_implementation_fails_at_construction():
+    class NoAppend(SessionStore):
+        def create(self, session_id, patient_id, messages, context): ...
+        def get(self, session_id): ...
+        def update_context(self, session_id, context_updates): ...
+        def bytes_held(self): return 0
+        def __len__(self): return 0
+
+    with pytest.raises(TypeError, match="append"):
+        NoAppend()
+    MemorySessionStore()
+    ToneEngine()
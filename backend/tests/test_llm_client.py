@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from benchmarks.stubs import StubServer
+from services.llm_client import LLMClient, LLMProvider
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture
+def stubs():
+    started = []
+
+    def start(**kwargs):
+        stub = StubServer(**kwargs).start()
+        started.append(stub)
+        return stub
+    yield start
+    for stub in started:
+        stub.stop()
+
+
+def providers(*servers):
+    return [LLMProvider(f"p{i}", stub.url, "stub-key", "stub-model") for i, stub in enumerate(servers)]
+
+
+def run(client: LLMClient, scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_hedge_starts_the_fallback_after_the_hedge_delay(stubs):
+    slow, fast = stubs(latency=1.0, reply="primary"), stubs(reply="fallback")
+    client = LLMClient(providers(slow, fast), hedge_delay=0.3)
+
+    async def scenario():
+        start = time.perf_counter()
+        reply = await client.complete(MESSAGES)
+        return reply, time.perf_counter() - start
+
+    reply, elapsed = run(client, scenario)
+    assert reply == "fallback"
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_no_hedge_when_the_primary_answers_in_time(stubs):
+    primary, fallback = stubs(latency=0.05, reply="primary"), stubs(reply="fallback")
+    client = LLMClient(providers(primary, fallback), hedge_delay=0.5)
+    assert run(client, lambda: client.complete(MESSAGES)) == "primary"
+    assert fallback.requests == 0
+
+
+def test_first_success_wins_and_the_slower_call_is_dropped(stubs):
+    primary, fallback = stubs(latency=0.4, reply="primary"), stubs(latency=1.5, reply="fallback")
+    client = LLMClient(providers(primary, fallback), hedge_delay=0.1)
+
+    async def scenario():
+        start = time.perf_counter()
+        reply = await client.complete(MESSAGES)
+        return reply, time.perf_counter() - start
+
+    reply, elapsed = run(client, scenario)
+    assert reply == "primary"
+    assert elapsed < 1.5
+    assert fallback.requests == 1  # the hedge was sent, its answer not awaited
+    assert [p.inflight for p in client.providers] == [0, 0]
+
+
+def test_breaker_opens_then_lets_one_probe_through(stubs):
+    broken, fallback = stubs(failure_rate=1.0), stubs(latency=0.2, reply="fallback")
+    client = LLMClient(providers(broken, fallback), hedging=False)
+    breaker = client.providers[0].breaker
+    breaker.reset_timeout = 0.3
+
+    async def scenario():
+        for _ in range(breaker.failure_threshold):
+            assert await client.complete(MESSAGES) == "fallback"
+        assert breaker.state == "open"
+        assert await client.complete(MESSAGES) == "fallback"
+        assert broken.requests == breaker.failure_threshold  # skipped while open
+
+        await asyncio.sleep(breaker.reset_timeout)
+        broken.failure_rate = 0.0
+        broken.latency = 0.2
+        replies = await asyncio.gather(*(client.complete(MESSAGES) for _ in range(3)))
+        return replies
+
+    replies = run(client, scenario)
+    assert broken.requests == breaker.failure_threshold + 1  # one probe, not three
+    assert sorted(replies) == ["fallback", "fallback", "stub reply"]
+    assert breaker.state == "closed"
+
+
+def test_unused_fallback_keeps_its_half_open_probe(stubs):
+    primary, fallback = stubs(reply="primary"), stubs(reply="fallback")
+    client = LLMClient(providers(primary, fallback), hedge_delay=5.0)
+    breaker = client.providers[1].breaker
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+    assert run(client, lambda: client.complete(MESSAGES)) == "primary"
+    assert breaker.state == "half_open"
+
+
+def test_stream_failing_before_the_first_token_hands_over(stubs, caplog, capsys):
+    broken, fallback = stubs(failure_rate=1.0), stubs(reply="fallback reply")
+    client = LLMClient(providers(broken, fallback))
+    outcome = {}
+
+    async def scenario():
+        return [token async for token in client.stream(MESSAGES, outcome)]
+
+    with caplog.at_level(logging.WARNING, logger="sauti.llm"):
+        assert "".join(run(client, scenario)) == "fallback reply"
+    assert outcome == {"complete": True}
+    assert client.providers[0].breaker.failures == 1
+    assert [r.getMessage().split(":")[0] for r in caplog.records] == ["p0 stream failed"]
+    assert capsys.readouterr().out == ""
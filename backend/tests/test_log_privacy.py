@@ -0,0 +1,27 @@
+import logging
+
+from agents import voice_agent
+from agents.orchestrator_agent import Orchestrator
+from services.job_queue import JobQueue
+from services.tts import AudioStore, ToneEngine
+
+SYMPTOMS = "Nina damu nyingi na maumivu makali ya tumbo"
+
+
+def test_triage_logs_carry_no_symptom_text(caplog, capsys, tmp_path, monkeypatch):
+    # Render alerts offline (a configured ElevenLabs key would otherwise be used) on a private queue
+    queue = JobQueue(workers=1)
+    agent = voice_agent.VoiceAgent(engine=ToneEngine(), store=AudioStore(str(tmp_path)), queue=queue)
+    monkeypatch.setattr(voice_agent, "voice_agent", agent)
+
+    with caplog.at_level(logging.DEBUG, logger="sauti"):
+        try:
+            result = Orchestrator().handle_user_input("patient-42", SYMPTOMS)
+        finally:
+            queue.shutdown()
+
+    assert result["diagnosis"]["risk"] == "HIGH"
+    assert queue.get(result["audio_alert"]["job_id"]).to_dict()["status"] == "succeeded"
+    logged = caplog.text + "".join(capsys.readouterr())
+    assert "patient-42" in caplog.text
+    assert "damu" not in logged and "tumbo" not in logged
@@ -0,0 +1,40 @@
+import asyncio
+
+from services.metrics import HTTP_LATENCY, HTTP_REQUESTS, MetricsMiddleware
+
+
+class Route:
+    path = "/api/jobs/{job_id}"
+
+
+async def not_found(scope, receive, send):
+    await send({"type": "http.response.start", "status": 404, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def request(path, method="GET", route=None):
+    scope = {"type": "http", "method": method, "path": path}
+    if route is not None:
+        scope["route"] = route
+
+    async def app(scope, receive, send):
+        await not_found(scope, receive, send)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    asyncio.run(MetricsMiddleware(app)(scope, receive, send))
+
+
+def test_unmatched_paths_share_one_series():
+    for i in range(100):
+        request(f"/wp-admin/{i}.php", method="PROPFIND" if i % 2 else "GET")
+    request("/api/jobs/abc", route=Route())
+
+    exposed = "\n".join(HTTP_REQUESTS.render() + HTTP_LATENCY.render())
+    assert 'route="unmatched"' in exposed and 'route="/api/jobs/{job_id}"' in exposed
+    assert "/wp-admin" not in exposed and "PROPFIND" not in exposed
+    assert 'route="unmatched",method="OTHER",status="404"' in exposed
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from services import patient_store as patient_store_module
+from services.patient_store import PatientStore
+
+
+def write_records(path, records, trailing_newline=True):
+    text = "\n".join(json.dumps(r) for r in records)
+    with open(path, "w") as f:
+        f.write(text + ("\n" if trailing_newline else ""))
+
+
+def records(n, note=""):
+    return [{"patient_id": f"p{i}", "name": f"Mama {i}{note}", "gestational_age_weeks": 20 + i % 20} for i in range(n)]
+
+
+@pytest.mark.parametrize("scan_block", [patient_store_module._SCAN_BLOCK, 64])
+def test_jsonl_lookup(tmp_path, monkeypatch, scan_block):
+    monkeypatch.setattr(patient_store_module, "_SCAN_BLOCK", scan_block)
+    rows = records(50) + [{"patient_id": 'quoted"id', "notes": "x" * 10000}]
+    path = tmp_path / "patients.jsonl"
+    write_records(path, rows, trailing_newline=False)
+    store = PatientStore(str(path))
+
+    assert len(store) == 51
+    assert store.get("p7").name == "Mama 7"
+    assert store.get('quoted"id').extra == {"notes": "x" * 10000}
+    assert store.get("missing") is None
+
+
+def test_in_place_rewrite_is_detected_not_fatal(tmp_path):
+    path = tmp_path / "patients.jsonl"
+    write_records(path, records(100))
+    store = PatientStore(str(path), check_interval=3600)
+    assert store.get("p1").name == "Mama 1"
+
+    # Truncated and rewritten in place: the indexed offsets now point past the end or mid-line
+    write_records(path, records(20, note=" (updated)"))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert store.get("p90") is None
+    assert store.get("p5").name == "Mama 5 (updated)"
+    assert len(store) == 20
+
+
+def test_atomic_replace_keeps_serving_old_file_until_reload(tmp_path):
+    path = tmp_path / "patients.jsonl"
+    write_records(path, records(10))
+    store = PatientStore(str(path), check_interval=3600)
+    assert len(store) == 10
+
+    staged = tmp_path / "patients.jsonl.tmp"
+    write_records(staged, [{"patient_id": "p3", "name": "Renamed"}])
+    os.replace(staged, path)
+    assert store.get("p4").name == "Mama 4"
+
+    store.reload()
+    assert store.get("p4") is None
+    assert store.get("p3").name == "Renamed"
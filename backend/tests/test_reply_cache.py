@@ -0,0 +1,35 @@
+import pytest
+
+from agents.reply_cache import ReplyCache
+
+SYSTEM = {"role": "system", "content": "You are a maternal health assistant."}
+
+
+def turn(text):
+    return [SYSTEM, {"role": "user", "content": text}]
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("is it safe to drink alcohol while pregnant", "is it not safe to drink alcohol while pregnant"),
+    ("is it safe to drink alcohol while pregnant", "isn't it safe to drink alcohol while pregnant"),
+    ("should I eat fish while pregnant", "should I not eat fish while pregnant"),
+    ("is it safe to not eat fish while pregnant", "is it not safe to eat fish while pregnant"),
+    ("ni salama kunywa pombe nikiwa mjamzito", "si salama kunywa pombe nikiwa mjamzito"),
+])
+def test_negation_never_shares_a_reply(cached, asked):
+    cache = ReplyCache(similarity=0.5)
+    cache.put(cache.key(turn(cached)), "cached answer")
+    assert cache.get(cache.key(turn(asked))) is None
+
+
+def test_near_duplicates_still_served_when_enabled():
+    cache = ReplyCache(similarity=0.5)
+    cache.put(cache.key(turn("is it safe to drink alcohol while pregnant")), "cached answer")
+    assert cache.get(cache.key(turn("is it safe to drink alcohol while pregnant now"))) == "cached answer"
+
+
+def test_near_duplicate_matching_off_by_default():
+    cache = ReplyCache()
+    cache.put(cache.key(turn("is it safe to drink alcohol while pregnant")), "cached answer")
+    assert cache.get(cache.key(turn("is it safe to drink alcohol while pregnant now"))) is None
+    assert cache.get(cache.key(turn("Is it safe to drink alcohol while pregnant?"))) == "cached answer"
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+chat_agent = pytest.importorskip("agents.chat_agent")
+from services.session_store import SQLiteSessionStore, build_session_store, pack_message  # noqa: E402
+from services.settings import get_settings  # noqa: E402
+
+
+class NoDatabase:
+    writer = None
+
+
+def test_locked_sqlite_store_does_not_stall_event_loop(tmp_path, monkeypatch):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.create("s1", "p1", [pack_message("system", chat_agent.SYSTEM_PROMPT)], {})
+    monkeypatch.setattr(chat_agent, "session_store", store)
+    # Keep the turn's messages out of the Supabase project configured in .env
+    monkeypatch.setattr(chat_agent, "get_supabase_service", NoDatabase)
+
+    async def reply(messages, *args, **kwargs):
+        return "stub reply"
+    monkeypatch.setattr(chat_agent.llm_client, "complete", reply)
+
+    # Another worker holds the write lock for a while
+    other = sqlite3.connect(store.path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.5, other.rollback).start()
+
+    async def scenario():
+        gaps = []
+
+        async def ticker(until):
+            last = time.perf_counter()
+            while time.perf_counter() < until:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.ensure_future(ticker(time.perf_counter() + 0.7))
+        await asyncio.sleep(0.02)  # ticking before the chat turn starts
+        answer = await chat_agent.chat_with_agent("s1", "session io lock test question")
+        await tick
+        return answer, max(gaps)
+
+    answer, worst_gap = asyncio.run(scenario())
+    assert answer == "stub reply"
+    assert worst_gap < 0.2  # the loop kept running while the append waited ~0.5 s for the lock
+    assert [m[2] for m in store.get("s1")["messages"][1:]] == ["session io lock test question", "stub reply"]
+
+
+def test_sqlite_context_update_keeps_another_workers_change(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.create("s1", "p1", [], {})
+
+    # Another worker is mid-way through its own context update
+    other = sqlite3.connect(store.path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    update = threading.Thread(target=store.update_context, args=("s1", {"language": "sw"}))
+    update.start()
+    time.sleep(0.2)
+    other.execute("UPDATE sessions SET context = ? WHERE session_id = 's1'", (json.dumps({"trimester": 2}),))
+    other.execute("COMMIT")
+    update.join()
+
+    assert store.get("s1")["context"] == {"trimester": 2, "language": "sw"}
+
+
+def test_sqlite_store_is_built_with_the_session_cap(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "session_store", "sqlite")
+    monkeypatch.setattr(settings, "session_db_path", str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(settings, "session_max_sessions", 7)
+    assert build_session_store(settings).max_sessions == 7
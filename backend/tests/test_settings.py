@@ -0,0 +1,26 @@
+from services.llm_client import build_llm_client
+from services.session_store import MemorySessionStore, SQLiteSessionStore, build_session_store
+from services.settings import Settings
+
+
+def test_provider_keys_have_no_defaults(monkeypatch):
+    for name in ("MISTRAL_API_KEY", "AI_ML_API_KEY", "GOOGLE_MAPS_API_KEY", "ELEVENLABS_API_KEY", "SUPABASE_SERVICE_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    settings = Settings()
+
+    assert settings.ai_ml_api_key is None
+    client = build_llm_client(settings)
+    assert [p.name for p in client.providers if p.enabled] == []
+
+
+def test_builders_read_settings_not_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_DB_PATH", str(tmp_path / "sessions.db"))
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "4")
+    settings = Settings()
+    monkeypatch.setenv("SESSION_STORE", "memory")
+
+    assert isinstance(build_session_store(settings), SQLiteSessionStore)
+    assert all(p.max_concurrency == 4 for p in build_llm_client(settings).providers)
+    settings.session_store = "memory"
+    assert isinstance(build_session_store(settings), MemorySessionStore)
@@ -0,0 +1,103 @@
+import pytest
+
+import agents.triage_agent as triage_module
+from agents.triage_agent import TriageAgent
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return TriageAgent()
+
+
+def histories(n):
+    return [{"patient_id": f"p{i}"} for i in range(n)]
+
+
+@pytest.mark.parametrize("texts", [
+    ["😷😷😷😷😷 ok", "nina homa kali"],
+    ["I’m fine thanks’’’ “really”", "damu"],
+    ["Ninahisi vizuri, asanté sana 🙏", "kichwa kinauma na naona ukungu"],
+    ["İİİİ fine", "fiver since last night"],
+])
+def test_batch_matches_single_reports(agent, texts):
+    """Characters lost or expanded by folding in one report must not shift hits onto another."""
+    batch = agent.analyze_batch(texts, histories(len(texts)))
+    single = [agent.analyze_symptoms(text, history) for text, history in zip(texts, histories(len(texts)))]
+    assert batch == single
+
+
+def test_batch_non_ascii_ahead_of_swahili_symptom(agent):
+    first, second = agent.analyze_batch(["😷😷😷😷😷 ok", "nina homa kali"], histories(2))
+    assert first["risk"] == "LOW" and first["matches"] == []
+    assert second["condition"] == "fever"
+
+    first, second = agent.analyze_batch(["I’m fine thanks’’’", "damu"], histories(2))
+    assert first["risk"] == "LOW" and first["matches"] == []
+    assert second["condition"] == "bleeding" and second["risk"] == "HIGH"
+
+
+def test_alias_spans_index_original_text(agent):
+    text = "🤒 Nina homa kali"
+    (match,) = agent.find_matches(text)
+    start, end = match["span"]
+    assert text[start:end] == "Nina homa"
+
+
+CUSTOM_RULES = {
+    "hyperemesis": {"keywords": ["vomit", "dizzy spell", "cramp"], "risk": "MEDIUM", "recommendation": "See a nurse."},
+    "normal": {"risk": "LOW", "recommendation": "All good."},
+}
+
+
+@pytest.mark.parametrize("text, keyword, alias", [
+    ("she vomited twice", "vomit", "vomited"),
+    ("vomiting all day", "vomit", "vomiting"),
+    ("bad cramps at night", "cramp", "cramps"),
+    ("Dizzy  Spells since monday", "dizzy spell", "Dizzy  Spells"),
+])
+def test_inflected_keywords_match_rules_the_normalizer_does_not_know(text, keyword, alias):
+    """The old substring matcher caught inflections of any rule keyword; the word-bounded regex must too."""
+    (match,) = TriageAgent(CUSTOM_RULES).find_matches(text)
+    assert (match["keyword"], match["alias"]) == (keyword, alias)
+    assert text[match["span"][0]:match["span"][1]] == alias
+
+
+@pytest.mark.parametrize("text", ["the vomitorium", "a hotel room", "photos of the baby", "a flu shot"])
+def test_inflections_do_not_reopen_substring_false_positives(text):
+    assert TriageAgent(CUSTOM_RULES).find_matches(text) == []
+    assert TriageAgent().analyze_symptoms(text, {})["risk"] == "LOW"
+
+
+@pytest.mark.parametrize("text, keyword", [
+    ("kichwa, kinauma sana", "headache"),
+    ("my feet are swolen", "swelling"),
+    ("nimevimbaa... miguu imevimba", "swelling"),
+    ("damu inatoka", "blood"),
+])
+def test_reports_the_scan_sends_to_the_normalizer(agent, text, keyword):
+    """Only reports where the regex sees a lexicon word are normalized; these must still be."""
+    assert keyword in [match["keyword"] for match in agent.find_matches(text)]
+
+
+def test_reports_without_lexicon_words_skip_the_normalizer(agent, monkeypatch):
+    monkeypatch.setattr(triage_module, "normalize", lambda text: pytest.fail("normalized " + text))
+    assert [m["keyword"] for m in agent.find_matches("my back is sore and I have a headache")] == ["headache"]
+
+
+@pytest.mark.parametrize("text", ["I see spots", "seeing spots since morning"])
+def test_seeing_spots_is_a_vision_symptom_not_bleeding(agent, text):
+    assert agent.analyze_symptoms(text, {})["condition"] == "pre_eclampsia"
+
+
+def test_batch_endpoint_refuses_batches_over_the_limit(monkeypatch):
+    main = pytest.importorskip("main")
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main.settings, "triage_batch_max", 2)
+    client = TestClient(main.app)
+    item = {"patient_id": "p1", "symptom_text": "I feel fine"}
+
+    assert client.post("/api/analyze-symptoms/batch", json={"items": [item] * 2}).status_code == 200
+    response = client.post("/api/analyze-symptoms/batch", json={"items": [item] * 3})
+    assert response.status_code == 413
+    assert "limit of 2" in response.json()["detail"]
@@ -0,0 +1,23 @@
+import json
+import os
+
+from agents.voice_agent import VoiceAgent
+from services.job_queue import JobQueue
+from services.tts import AudioStore, ToneEngine
+
+
+def test_job_result_is_the_audio_url_not_a_server_path(tmp_path):
+    queue = JobQueue(workers=1)
+    agent = VoiceAgent(engine=ToneEngine(), store=AudioStore(str(tmp_path)), queue=queue)
+    try:
+        alert = agent.alert("Nenda hospitali sasa", "sw")
+        job = queue.get(alert["job_id"])
+        job.wait(timeout=10)
+        snapshot = job.to_dict()
+    finally:
+        queue.shutdown()
+
+    assert snapshot["status"] == "succeeded"
+    assert snapshot["result"] == alert["audio_url"]
+    assert str(tmp_path) not in json.dumps(snapshot)
+    assert os.path.exists(agent.audio_path(alert["audio_url"].rsplit("/", 1)[1]))